@@ -4,7 +4,7 @@ VOZ VISIBLE - Aplicación Web Flask
 Sistema de Reconocimiento de Lenguaje de Señas Colombiano en Tiempo Real
 """
 
-from flask import Flask, render_template, request, jsonify, Response, current_app
+from flask import Flask, render_template, request, jsonify, current_app, send_file
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 import os
@@ -16,6 +16,7 @@ from PIL import Image
 import io
 import time
 import logging
+import mimetypes
 
 # Configurar paths de manera robusta ANTES de los imports
 def setup_import_paths():
@@ -39,13 +40,19 @@ src_path, project_root = setup_import_paths()
 # Ahora importar los módulos (después de configurar paths)
 from config.settings import AppSettings
 from repositories.sign_language_repository import SignLanguageRepository
+from services.batch_scheduler import SchedulerOverloadedError
 from services.prediction_service import PredictionService
 from services.tts_service import TTSService
 
+# Formatos aceptados para un vector de landmarks: binario, lista o con nombre
+LANDMARK_PAYLOAD_TYPES = (bytes, bytearray, list, dict)
+
 # Importar validadores
 try:
     from utils.validators import (
+        decode_base64_image,
         validate_base64_image,
+        validate_image_bytes,
         validate_text_for_tts,
         validate_session_id
     )
@@ -171,6 +178,9 @@ def api_predict():
         "image": "data:image/jpeg;base64,...",
         "include_landmarks": true/false (opcional, default: false)
     }
+    
+    Body binario (Content-Type: application/octet-stream, image/jpeg o image/webp):
+        la imagen comprimida sin base64; include_landmarks y session_id como query parameters
     """
     service = get_prediction_service()
     
@@ -182,26 +192,35 @@ def api_predict():
         }), 503
     
     try:
-        data = request.get_json() or {}
+        if request.mimetype == 'application/octet-stream' or request.mimetype.startswith('image/'):
+            data = request.args
+            image_bytes = request.get_data()
+            error_msg = 'Se requiere imagen' if not image_bytes else None
+            if image_bytes and VALIDATORS_AVAILABLE:
+                _, error_msg = validate_image_bytes(image_bytes)
+        else:
+            data = request.get_json() or {}
+            if 'image' not in data:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Datos inválidos',
+                    'error': 'Se requiere imagen'
+                }), 400
+            # Validar y decodificar el base64 una sola vez
+            if VALIDATORS_AVAILABLE:
+                image_bytes, error_msg = decode_base64_image(data['image'])
+            else:
+                image_data = data['image'].split(',')[-1]
+                image_bytes, error_msg = base64.b64decode(image_data), None
         
-        if 'image' not in data:
+        if error_msg:
             return jsonify({
                 'status': 'error',
-                'message': 'Datos inválidos',
-                'error': 'Se requiere imagen'
+                'message': 'Imagen inválida',
+                'error': error_msg
             }), 400
         
-        # Validar imagen
-        if VALIDATORS_AVAILABLE:
-            is_valid, error_msg = validate_base64_image(data['image'])
-            if not is_valid:
-                return jsonify({
-                    'status': 'error',
-                    'message': 'Imagen inválida',
-                    'error': error_msg
-                }), 400
-        
-        include_landmarks = data.get('include_landmarks', False)
+        include_landmarks = str(data.get('include_landmarks', False)).lower() == 'true'
         session_id = data.get('session_id') or request.remote_addr
         
         # Validar session_id
@@ -210,14 +229,26 @@ def api_predict():
             if not is_valid:
                 session_id = request.remote_addr  # Usar IP como fallback
         
-        response_data = service.predict_from_base64(data['image'], include_landmarks=include_landmarks, session_id=session_id)
+        response_data = service.predict_from_bytes(image_bytes, include_landmarks=include_landmarks, session_id=session_id)
         if response_data:
             return jsonify(response_data)
         return jsonify({
             'status': 'error',
             'message': 'No se pudieron extraer características'
         }), 422
-            
+    
+    except SchedulerOverloadedError as e:
+        return jsonify({
+            'status': 'busy',
+            'message': 'Servidor ocupado, intenta de nuevo',
+            'error': str(e)
+        }), 429
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': 'Imagen inválida',
+            'error': str(e)
+        }), 400
     except Exception as e:
         logging.exception("❌ Error en predicción")
         return jsonify({
@@ -226,6 +257,93 @@ def api_predict():
             'error': str(e)
         }), 500
 
+@app.route('/api/predict/landmarks', methods=['POST'])
+def api_predict_landmarks():
+    """
+    Clasificar landmarks extraídos en el cliente (MediaPipe en el navegador)
+    
+    Body binario (Content-Type: application/octet-stream):
+        258 float32 little-endian en el orden de feature_info.json
+        (session_id e include_landmarks como query parameters)
+    
+    Body JSON:
+    {
+        "features": [258 números] | "landmarks": {"pose_0": ..., ...} o {"pose": [...], ...},
+        "include_landmarks": true/false (opcional, default: false),
+        "session_id": "..." (opcional)
+    }
+    """
+    service = get_prediction_service()
+    
+    if not service.is_ready():
+        return jsonify({
+            'status': 'error',
+            'message': 'Sistema no disponible',
+            'error': 'Inicializa el predictor antes de realizar predicciones'
+        }), 503
+    
+    try:
+        if request.mimetype == 'application/octet-stream':
+            payload = request.get_data()
+            options = request.args
+        else:
+            options = request.get_json(silent=True) or {}
+            payload = options.get('features', options.get('landmarks'))
+        
+        if payload is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'Datos inválidos',
+                'error': 'Se requieren features o landmarks'
+            }), 400
+        if not isinstance(payload, LANDMARK_PAYLOAD_TYPES):
+            return jsonify({
+                'status': 'error',
+                'message': 'Landmarks inválidos',
+                'error': f'Formato de landmarks no soportado: {type(payload).__name__}'
+            }), 400
+        if len(payload) == 0:
+            return jsonify({
+                'status': 'error',
+                'message': 'Datos inválidos',
+                'error': 'Se requieren features o landmarks'
+            }), 400
+        
+        include_landmarks = str(options.get('include_landmarks', False)).lower() == 'true'
+        session_id = options.get('session_id') or request.remote_addr
+        if VALIDATORS_AVAILABLE and session_id:
+            is_valid, error_msg = validate_session_id(session_id)
+            if not is_valid:
+                session_id = request.remote_addr
+        
+        response_data = service.predict_from_features(payload, include_landmarks=include_landmarks, session_id=session_id)
+        if response_data:
+            return jsonify(response_data)
+        return jsonify({
+            'status': 'error',
+            'message': 'Predicción omitida por control de frecuencia'
+        }), 429
+    
+    except SchedulerOverloadedError as e:
+        return jsonify({
+            'status': 'busy',
+            'message': 'Servidor ocupado, intenta de nuevo',
+            'error': str(e)
+        }), 429
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': 'Landmarks inválidos',
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        logging.exception("❌ Error en predicción desde landmarks")
+        return jsonify({
+            'status': 'error',
+            'message': 'Error interno del servidor',
+            'error': str(e)
+        }), 500
+
 @app.route('/api/upload', methods=['POST'])
 def api_upload():
     """
@@ -252,20 +370,18 @@ def api_upload():
                 'message': 'No se seleccionó archivo'
             }), 400
         
-        filename = f"temp_{int(time.time())}.jpg"
-        upload_folder = current_app.config['SETTINGS'].upload_folder
-        filepath = upload_folder / filename
-        file.save(filepath)
-        
-        image = cv2.imread(str(filepath))
-        filepath.unlink(missing_ok=True)
-        if image is None:
+        # Decodificar en memoria (sin archivo temporal) directamente a RGB
+        image_bytes = file.read()
+        try:
+            image = service.frame_ingest.decode(image_bytes)
+        except ValueError:
             return jsonify({
                 'status': 'error',
                 'message': 'Imagen inválida'
             }), 400
         
-        response_data = service.predict_from_frame(image)
+        session_id = request.form.get('session_id') or request.remote_addr
+        response_data = service.predict_from_frame(image, session_id=session_id, rgb=True)
         if response_data:
             return jsonify(response_data)
         return jsonify({
@@ -273,6 +389,12 @@ def api_upload():
             'message': 'No se pudieron extraer características de la imagen'
         }), 422
             
+    except SchedulerOverloadedError as e:
+        return jsonify({
+            'status': 'busy',
+            'message': 'Servidor ocupado, intenta de nuevo',
+            'error': str(e)
+        }), 429
     except Exception as e:
         logging.exception("❌ Error en upload")
         return jsonify({
@@ -338,9 +460,14 @@ def api_tts():
                 'message': 'El texto no puede estar vacío'
             }), 400
         
+        # Frases: se arman con los clips de las palabras del vocabulario (TTS_PHRASE_ENABLED)
+        phrase_mode = current_app.config['SETTINGS'].tts.phrase_enabled
         format_type = data.get('format', 'base64')
         if format_type == 'base64':
-            audio_data = tts_service.generate_audio_base64(text)
+            if phrase_mode:
+                audio_data = tts_service.generate_phrase_base64(text)
+            else:
+                audio_data = tts_service.generate_audio_base64(text)
             if not audio_data:
                 return jsonify({
                     'status': 'error',
@@ -353,7 +480,10 @@ def api_tts():
                 'timestamp': time.time()
             })
         
-        file_path = tts_service.save_audio_file(text)
+        if phrase_mode:
+            file_path = tts_service.save_phrase_file(text)
+        else:
+            file_path = tts_service.save_audio_file(text)
         if not file_path:
             return jsonify({
                 'status': 'error',
@@ -388,24 +518,27 @@ def api_tts_file(filename):
         }), 503
     
     try:
-        cache_path = current_app.config['SETTINGS'].tts.cache_dir / filename
-        if not cache_path.exists():
+        # Solo audios del cache: el nombre no puede salir del directorio ni apuntar al índice
+        cache_path = tts_service.resolve_audio_file(filename)
+        if cache_path is None:
             return jsonify({
                 'status': 'error',
                 'message': 'Archivo no encontrado'
             }), 404
         
-        with open(cache_path, 'rb') as f:
-            audio_data = f.read()
-        
-        return Response(
-            audio_data,
-            mimetype='audio/mpeg',
-            headers={
-                'Content-Disposition': f'inline; filename="{filename}"',
-                'Cache-Control': 'public, max-age=31536000'  # Cache por 1 año
-            }
+        # send_file entrega el archivo sin leerlo en Python y responde
+        # If-None-Match (304) y Range (206) para reproducir y adelantar
+        response = send_file(
+            cache_path,
+            mimetype=mimetypes.guess_type(filename)[0] or 'audio/mpeg',
+            conditional=True,
+            etag=tts_service.get_file_etag(cache_path),
+            max_age=31536000,
         )
+        response.headers['Content-Disposition'] = f'inline; filename="{filename}"'
+        # El nombre es el hash del texto: el contenido no cambia, cache por 1 año
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
         
     except Exception as e:
         logging.exception("❌ Error sirviendo archivo TTS")
@@ -422,13 +555,28 @@ def handle_connect():
     print(f"🔌 Cliente conectado: {request.sid}")
     service = get_prediction_service()
     payload = service.get_status_payload()
-    payload['current_prediction'] = service.current_prediction
+    payload['current_prediction'] = service.get_current_prediction(request.sid)
     emit('status', payload)
+    emit('capture_config', payload['capture'])
+    if service.flow_control is not None:
+        emit('frame_credit', service.flow_control.initial_grant(request.sid))
+    # Audios de las clases para precargar: las predicciones solo llevan su URL
+    tts_service = get_tts_service()
+    if current_app.config['SETTINGS'].tts.preload_manifest and tts_service.audio_mode == 'url':
+        manifest = tts_service.get_manifest()
+        if manifest:
+            emit('tts_manifest', {'audio': manifest})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Cliente desconectado"""
     print(f" Cliente desconectado: {request.sid}")
+    service = get_prediction_service()
+    service.end_session(request.sid)
+    # Créditos y ranura de frames existen desde la conexión, aunque no haya sesión que expulsar
+    service.frame_mailbox.discard(request.sid)
+    if service.flow_control is not None:
+        service.flow_control.discard(request.sid)
 
 @socketio.on('start_camera')
 def handle_start_camera():
@@ -450,8 +598,11 @@ def handle_process_frame(data):
     Procesar frame de cámara
     
     data puede contener:
-    - 'frame': imagen en base64
+    - 'frame': imagen en base64 o binaria (adjunto binario de Socket.IO, JPEG/WebP)
     - 'include_landmarks': boolean (opcional, default: false)
+    
+    Si llegan frames más rápido de lo que se procesan, solo se conserva el más
+    reciente de cada sesión; los descartados se notifican con 'frames_skipped'.
     """
     service = get_prediction_service()
     if not service.is_ready():
@@ -461,30 +612,66 @@ def handle_process_frame(data):
         })
         return
     
-    try:
-        # Procesar frame (data contiene imagen en base64)
-        image_data = data.get('frame', '')
-        if not image_data:
-            emit('prediction', {
-                'status': 'error',
-                'message': 'No se proporcionó frame'
-            })
-            return
-            
-        if image_data.startswith('data:image'):
-            image_data = image_data.split(',')[1]
-        
-        # Decodificar y procesar
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+    image_data = data.get('frame', '')
+    if not image_data:
+        emit('prediction', {
+            'status': 'error',
+            'message': 'No se proporcionó frame'
+        })
+        return
+    
+    include_landmarks = data.get('include_landmarks', False)
+    session_id = data.get('session_id') or request.sid
+    
+    # Dejar el frame en la ranura del socket; si otro manejador la está
+    # procesando, él recogerá este frame (o uno más reciente). La ranura y los
+    # créditos son del socket (no del session_id que envía el cliente) y se
+    # liberan al desconectarse
+    if not service.frame_mailbox.offer(request.sid, (image_data, include_landmarks, session_id)):
+        return
+    
+    while True:
+        taken = service.frame_mailbox.take(request.sid)
+        if taken is None:
+            break
+        (image_data, include_landmarks, session_id), skipped = taken
+        if skipped:
+            emit('frames_skipped', {'skipped': skipped, 'timestamp': time.time()})
+        started = time.perf_counter()
+        _process_frame_data(service, image_data, include_landmarks, session_id)
         
-        # Verificar si se solicitan landmarks
-        include_landmarks = data.get('include_landmarks', False)
-        session_id = data.get('session_id') or request.remote_addr
+        # Devolver el crédito del frame (y de los descartados) con el intervalo según la carga
+        if service.flow_control is not None:
+            emit('frame_credit', service.flow_control.on_processed(
+                request.sid,
+                processing_ms=(time.perf_counter() - started) * 1000,
+                skipped=skipped,
+                busy=service.frame_mailbox.active(),
+            ))
+
+def _process_frame_data(service, image_data, include_landmarks, session_id):
+    try:
+        if isinstance(image_data, str):
+            if image_data.startswith('data:image'):
+                image_data = image_data.split(',')[1]
+            image_bytes = base64.b64decode(image_data)
+        else:
+            # Adjunto binario: se decodifica directamente del buffer recibido
+            image_bytes = image_data
+            if VALIDATORS_AVAILABLE:
+                is_valid, error_msg = validate_image_bytes(image_bytes)
+                if not is_valid:
+                    emit('prediction', {
+                        'status': 'error',
+                        'message': 'Imagen inválida',
+                        'error': error_msg
+                    })
+                    return
         
-        prediction_data = service.predict_from_frame(cv_image, include_landmarks=include_landmarks, session_id=session_id)
+        prediction_data = service.predict_from_bytes(image_bytes, include_landmarks=include_landmarks,
+                                                     session_id=session_id, stabilize=True)
         if prediction_data:
+            # Sin cambio de palabra confirmado la respuesta es liviana (sin audio ni log)
             emit('prediction', prediction_data)
         else:
             emit('prediction', {
@@ -492,6 +679,13 @@ def handle_process_frame(data):
                 'message': 'No se pudieron extraer características'
             })
             
+    except SchedulerOverloadedError as e:
+        # Servidor saturado: el cliente conserva la última predicción y sigue enviando
+        emit('prediction', {
+            'status': 'busy',
+            'message': 'Servidor ocupado',
+            'error': str(e)
+        })
     except Exception as e:
         logging.exception("❌ Error procesando frame")
         emit('prediction', {
@@ -500,6 +694,68 @@ def handle_process_frame(data):
             'error': str(e)
         })
 
+@socketio.on('process_landmarks')
+def handle_process_landmarks(data):
+    """
+    Procesar landmarks extraídos en el navegador
+    
+    data puede contener:
+    - 'features': ArrayBuffer con 258 float32 o lista de 258 números
+    - 'landmarks': columnas con nombre de feature_info.json o {"pose": [...], ...}
+    - 'include_landmarks': boolean (opcional, default: false)
+    """
+    service = get_prediction_service()
+    if not service.is_ready():
+        emit('prediction', {
+            'status': 'error',
+            'message': 'Sistema no disponible'
+        })
+        return
+    
+    try:
+        payload = data.get('features', data.get('landmarks'))
+        if payload is None:
+            emit('prediction', {
+                'status': 'error',
+                'message': 'No se proporcionaron landmarks'
+            })
+            return
+        if not isinstance(payload, LANDMARK_PAYLOAD_TYPES):
+            emit('prediction', {
+                'status': 'error',
+                'message': 'Landmarks inválidos',
+                'error': f'Formato de landmarks no soportado: {type(payload).__name__}'
+            })
+            return
+        
+        include_landmarks = data.get('include_landmarks', False)
+        session_id = data.get('session_id') or request.sid
+        
+        prediction_data = service.predict_from_features(payload, include_landmarks=include_landmarks,
+                                                        session_id=session_id, stabilize=True)
+        if prediction_data:
+            emit('prediction', prediction_data)
+    
+    except SchedulerOverloadedError as e:
+        emit('prediction', {
+            'status': 'busy',
+            'message': 'Servidor ocupado',
+            'error': str(e)
+        })
+    except ValueError as e:
+        emit('prediction', {
+            'status': 'error',
+            'message': 'Landmarks inválidos',
+            'error': str(e)
+        })
+    except Exception as e:
+        logging.exception("❌ Error procesando landmarks")
+        emit('prediction', {
+            'status': 'error',
+            'message': 'Error procesando landmarks',
+            'error': str(e)
+        })
+
 @app.route('/api/logs', methods=['GET'])
 def api_get_logs():
     """
@@ -572,6 +828,17 @@ def api_get_logs_stats():
             'error': str(e)
         }), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def api_metrics():
+    """
+    Métricas de rendimiento (micro-lotes de inferencia)
+    """
+    service = get_prediction_service()
+    return jsonify({
+        'status': 'success',
+        'metrics': service.get_metrics()
+    })
+
 @app.route('/api/healthcheck', methods=['GET'])
 def api_healthcheck():
     """
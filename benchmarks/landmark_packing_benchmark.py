@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+SIGN-AI - Microbenchmark de empaquetado de landmarks
+
+Compara, por frame, la extracción anterior (bucles Python sobre los protobufs
+más un segundo recorrido para el diccionario de landmarks) con LandmarkPacker.
+
+Uso:
+    python benchmarks/landmark_packing_benchmark.py [--frames 20000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+
+from inference.landmark_packing import LandmarkPacker  # noqa: E402
+
+FEATURE_INFO_PATH = os.path.join(PROJECT_ROOT, 'data', 'processed', 'feature_info.json')
+
+
+def make_landmark_list(count: int, with_visibility: bool):
+    """Crear una lista de landmarks: protobuf real si MediaPipe está instalado."""
+    try:
+        from mediapipe.framework.formats import landmark_pb2
+        landmark_list = landmark_pb2.NormalizedLandmarkList()
+        for _ in range(count):
+            landmark = landmark_list.landmark.add()
+            landmark.x, landmark.y, landmark.z = random.random(), random.random(), random.random()
+            if with_visibility:
+                landmark.visibility = random.random()
+        return landmark_list
+    except ImportError:
+        landmarks = [
+            SimpleNamespace(x=random.random(), y=random.random(), z=random.random(),
+                            visibility=random.random() if with_visibility else 0.0)
+            for _ in range(count)
+        ]
+        return SimpleNamespace(landmark=landmarks)
+
+
+def legacy_extract(results):
+    """Implementación anterior de extract_landmarks + _extract_landmarks_dict."""
+    features = np.zeros(258, dtype=np.float32)
+    if results.pose_landmarks:
+        for i, landmark in enumerate(results.pose_landmarks.landmark):
+            if i < 33:
+                idx = i * 4
+                features[idx] = landmark.x
+                features[idx + 1] = landmark.y
+                features[idx + 2] = landmark.z
+                features[idx + 3] = landmark.visibility
+    if results.right_hand_landmarks:
+        for i, landmark in enumerate(results.right_hand_landmarks.landmark):
+            if i < 21:
+                idx = 132 + (i * 3)
+                features[idx] = landmark.x
+                features[idx + 1] = landmark.y
+                features[idx + 2] = landmark.z
+    if results.left_hand_landmarks:
+        for i, landmark in enumerate(results.left_hand_landmarks.landmark):
+            if i < 21:
+                idx = 195 + (i * 3)
+                features[idx] = landmark.x
+                features[idx + 1] = landmark.y
+                features[idx + 2] = landmark.z
+    return features
+
+
+def legacy_landmarks_dict(results):
+    landmarks_dict = {"pose": [], "right_hand": [], "left_hand": []}
+    if results.pose_landmarks:
+        for landmark in results.pose_landmarks.landmark:
+            landmarks_dict["pose"].append({
+                "x": landmark.x, "y": landmark.y, "z": landmark.z, "visibility": landmark.visibility
+            })
+    for name, field in (("right_hand", "right_hand_landmarks"), ("left_hand", "left_hand_landmarks")):
+        hand = getattr(results, field)
+        if hand:
+            for landmark in hand.landmark:
+                landmarks_dict[name].append({"x": landmark.x, "y": landmark.y, "z": landmark.z})
+    return landmarks_dict
+
+
+def time_per_frame(fn, frames: int) -> float:
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return (time.perf_counter() - start) / frames * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=20000, help='Frames simulados por caso')
+    args = parser.parse_args()
+
+    results = SimpleNamespace(
+        pose_landmarks=make_landmark_list(33, with_visibility=True),
+        right_hand_landmarks=make_landmark_list(21, with_visibility=False),
+        left_hand_landmarks=make_landmark_list(21, with_visibility=False),
+    )
+    packer = LandmarkPacker.from_file(FEATURE_INFO_PATH)
+    out = packer.allocate()
+
+    if not np.array_equal(legacy_extract(results), packer.pack(results)):
+        raise SystemExit("❌ El empaquetado no coincide con la implementación anterior")
+
+    cases = [
+        ("features", lambda: legacy_extract(results), lambda: packer.pack(results, out=out)),
+        ("features + landmarks",
+         lambda: (legacy_extract(results), legacy_landmarks_dict(results)),
+         lambda: packer.to_landmarks_dict(packer.pack(results, out=out))),
+    ]
+
+    print(f"📊 {args.frames} frames por caso (µs/frame)")
+    print(f"{'caso':<24}{'antes':>10}{'después':>10}{'mejora':>9}")
+    for name, before, after in cases:
+        before_us = time_per_frame(before, args.frames)
+        after_us = time_per_frame(after, args.frames)
+        print(f"{name:<24}{before_us:>10.1f}{after_us:>10.1f}{before_us / after_us:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
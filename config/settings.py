@@ -3,7 +3,7 @@ from __future__ import annotations
 """Configuración centralizada para VOZ VISIBLE."""
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List
 
@@ -38,11 +38,24 @@ class ModelConfig:
         os.getenv("FEATURE_INFO_PATH"),
         "data/processed/feature_info.json",
     )
+    # Motor de inferencia: "keras" (TensorFlow, .h5) o "numpy" (pesos .npz exportados)
+    engine: str = os.getenv("MODEL_ENGINE", "keras").lower()
+
+    @staticmethod
+    def numpy_weights_path(model_path: Path) -> Path:
+        return model_path.with_suffix(".npz")
+
+    def active_model_path(self) -> Path:
+        if self.engine == "numpy":
+            return self.numpy_weights_path(self.primary_model_path)
+        return self.primary_model_path
 
     def required_files(self) -> List[Path]:
+        model_files = [self.primary_model_path, self.secondary_model_path]
+        if self.engine == "numpy":
+            model_files = [self.active_model_path()]
         return [
-            self.primary_model_path,
-            self.secondary_model_path,
+            *model_files,
             self.scaler_path,
             self.label_encoder_path,
             self.feature_info_path,
@@ -57,6 +70,129 @@ class TTSConfig:
     )
     language: str = os.getenv("TTS_LANGUAGE", "es-co")
     slow: bool = os.getenv("TTS_SLOW", "false").lower() == "true"
+    # Frases: unir los clips por palabra del vocabulario (con silencio entre ellos) en vez de sintetizar todo
+    phrase_enabled: bool = os.getenv("TTS_PHRASE_ENABLED", "true").lower() == "true"
+    phrase_gap_ms: float = float(os.getenv("TTS_PHRASE_GAP_MS", "120"))
+    # Presupuesto del cache en disco; al superarlo se eliminan los audios menos usados (0 = sin límite)
+    max_cache_mb: float = float(os.getenv("TTS_CACHE_MAX_MB", "200"))
+    # Motor de síntesis: "gtts" (red), "espeak" o "pyttsx3" (locales, sin red)
+    backend: str = os.getenv("TTS_BACKEND", "gtts").lower()
+    # Voz de los motores locales (vacío = la del idioma)
+    voice: str = os.getenv("TTS_VOICE", "")
+    # Sintetizar al iniciar las clases de feature_info.json (en segundo plano)
+    prewarm: bool = os.getenv("TTS_PREWARM", "true").lower() == "true"
+    # Máximo de audios de textos fuera del vocabulario (frases) en memoria; 0 los desactiva.
+    # Las clases del modelo se guardan aparte y no cuentan en este límite
+    memory_cache_size: int = int(os.getenv("TTS_MEMORY_CACHE_SIZE", "128"))
+    # Audio en las predicciones: "url" (referencia a /api/tts/file/<id>) o "inline" (data URL base64)
+    audio_mode: str = os.getenv("TTS_AUDIO_MODE", "url").lower()
+    # Enviar al conectar el manifiesto de audios de las clases para precargarlos
+    preload_manifest: bool = os.getenv("TTS_PRELOAD_MANIFEST", "true").lower() == "true"
+
+
+@dataclass(slots=True)
+class BatchingConfig:
+    """Micro-lotes de inferencia compartidos entre sesiones."""
+
+    enabled: bool = os.getenv("BATCHING_ENABLED", "true").lower() == "true"
+    max_batch_size: int = int(os.getenv("BATCHING_MAX_BATCH_SIZE", "32"))
+    max_wait_ms: float = float(os.getenv("BATCHING_MAX_WAIT_MS", "5"))
+    max_queue_depth: int = int(os.getenv("BATCHING_MAX_QUEUE_DEPTH", "256"))
+    # Espera máxima por el resultado de un vector; al vencer se responde "ocupado"
+    timeout_ms: float = float(os.getenv("BATCHING_TIMEOUT_MS", "1000"))
+
+
+@dataclass(slots=True)
+class SessionConfig:
+    """Estado por sesión (control de frecuencia, último resultado y buffers)."""
+
+    idle_timeout_s: float = float(os.getenv("SESSION_IDLE_TIMEOUT_S", "300"))
+    max_sessions: int = int(os.getenv("SESSION_MAX_ENTRIES", "2000"))
+    prediction_interval_ms: float = float(os.getenv("SESSION_PREDICTION_INTERVAL_MS", "100"))
+    # Frecuencia del barrido de sesiones inactivas en segundo plano (0 = solo al recibir frames)
+    sweep_interval_s: float = float(os.getenv("SESSION_SWEEP_INTERVAL_S", "30"))
+
+
+@dataclass(slots=True)
+class ExtractorConfig:
+    """Extracción de landmarks con MediaPipe (trackers por sesión)."""
+
+    # Backend de landmarks: "holistic" o "pose_hands" (sin malla facial)
+    backend: str = os.getenv("EXTRACTOR_BACKEND", "holistic").lower()
+    pool_size: int = int(os.getenv("EXTRACTOR_POOL_SIZE", "8"))
+    tracker_idle_timeout_s: float = float(os.getenv("EXTRACTOR_TRACKER_IDLE_TIMEOUT_S", "60"))
+    # Lado mayor a partir del cual los JPEG se decodifican a resolución reducida
+    max_decode_side: int = int(os.getenv("EXTRACTOR_MAX_DECODE_SIDE", "1280"))
+    # Lado mayor máximo del frame que recibe MediaPipe y recorte alrededor de la persona
+    max_input_side: int = int(os.getenv("EXTRACTOR_MAX_INPUT_SIDE", "960"))
+    roi_enabled: bool = os.getenv("EXTRACTOR_ROI_ENABLED", "true").lower() == "true"
+    roi_margin: float = float(os.getenv("EXTRACTOR_ROI_MARGIN", "0.35"))
+    # Procesos de extracción (0 = extraer en el proceso del servidor)
+    workers: int = int(os.getenv("EXTRACTOR_WORKERS", "0"))
+    queue_depth: int = int(os.getenv("EXTRACTOR_QUEUE_DEPTH", "4"))
+    max_frame_bytes: int = int(os.getenv("EXTRACTOR_MAX_FRAME_BYTES", str(1280 * 720 * 3)))
+    start_method: str = os.getenv("EXTRACTOR_START_METHOD", "spawn")
+    timeout_s: float = float(os.getenv("EXTRACTOR_TIMEOUT_S", "5"))
+
+
+@dataclass(slots=True)
+class GatingConfig:
+    """Atajos del pipeline cuando no hay una seña que clasificar."""
+
+    # Sin manos detectadas se responde "no_sign" sin scaler, modelo, TTS ni logs
+    require_hands: bool = os.getenv("GATE_REQUIRE_HANDS", "true").lower() == "true"
+    # Pre-detector barato en miniatura antes de Holistic: "hands" (palmas), "pose" o "face"
+    presence_enabled: bool = os.getenv("GATE_PRESENCE_ENABLED", "false").lower() == "true"
+    presence_detector: str = os.getenv("GATE_PRESENCE_DETECTOR", "hands").lower()
+    presence_side: int = int(os.getenv("GATE_PRESENCE_SIDE", "256"))
+    presence_hold_ms: float = float(os.getenv("GATE_PRESENCE_HOLD_MS", "1000"))
+
+
+@dataclass(slots=True)
+class MotionGateConfig:
+    """Reutilización del último resultado cuando la escena no cambia."""
+
+    enabled: bool = os.getenv("MOTION_GATE_ENABLED", "true").lower() == "true"
+    thumbnail_side: int = int(os.getenv("MOTION_GATE_THUMBNAIL_SIDE", "32"))
+    # Diferencia media por píxel (0-255) por debajo de la cual el frame se considera estático
+    threshold: float = float(os.getenv("MOTION_GATE_THRESHOLD", "4.0"))
+    max_reuse_ms: float = float(os.getenv("MOTION_GATE_MAX_REUSE_MS", "1000"))
+
+
+@dataclass(slots=True)
+class StabilizerConfig:
+    """Suavizado de probabilidades e histéresis: solo se emiten cambios de palabra confirmados."""
+
+    enabled: bool = os.getenv("STABILIZER_ENABLED", "true").lower() == "true"
+    # Peso del frame nuevo en la media móvil exponencial de probabilidades
+    alpha: float = float(os.getenv("STABILIZER_ALPHA", "0.4"))
+    min_confidence: float = float(os.getenv("STABILIZER_MIN_CONFIDENCE", "0.6"))
+    # Ventaja mínima sobre la palabra confirmada para reemplazarla
+    margin: float = float(os.getenv("STABILIZER_MARGIN", "0.15"))
+    # Frames seguidos que una clase (o "sin seña") debe liderar para confirmarse
+    min_frames: int = int(os.getenv("STABILIZER_MIN_FRAMES", "3"))
+
+
+@dataclass(slots=True)
+class FlowControlConfig:
+    """Créditos de frames concedidos a la cámara del navegador según la carga."""
+
+    enabled: bool = os.getenv("FLOW_CONTROL_ENABLED", "true").lower() == "true"
+    window: int = int(os.getenv("FLOW_CONTROL_WINDOW", "2"))
+    min_interval_ms: float = float(os.getenv("FLOW_CONTROL_MIN_INTERVAL_MS", "66"))
+    max_interval_ms: float = float(os.getenv("FLOW_CONTROL_MAX_INTERVAL_MS", "1000"))
+    # Sesiones procesadas en paralelo sin degradarse (0 = workers de extracción o núcleos)
+    capacity: int = int(os.getenv("FLOW_CONTROL_CAPACITY", "0"))
+
+
+@dataclass(slots=True)
+class CaptureConfig:
+    """Formato de frame que se pide a los clientes (anunciado en connect y /api/status)."""
+
+    max_side: int = int(os.getenv("CAPTURE_MAX_SIDE", "640"))
+    # Códec preferido: "webp" o "jpeg" (el otro queda como alternativa)
+    codec: str = os.getenv("CAPTURE_CODEC", "webp").lower()
+    quality: float = float(os.getenv("CAPTURE_QUALITY", "0.7"))
 
 
 @dataclass(slots=True)
@@ -68,8 +204,16 @@ class AppSettings:
     )
     debug: bool = os.getenv("APP_DEBUG", "false").lower() == "true"
 
-    model: ModelConfig = ModelConfig()
-    tts: TTSConfig = TTSConfig()
+    model: ModelConfig = field(default_factory=ModelConfig)
+    tts: TTSConfig = field(default_factory=TTSConfig)
+    batching: BatchingConfig = field(default_factory=BatchingConfig)
+    sessions: SessionConfig = field(default_factory=SessionConfig)
+    extractor: ExtractorConfig = field(default_factory=ExtractorConfig)
+    gating: GatingConfig = field(default_factory=GatingConfig)
+    motion: MotionGateConfig = field(default_factory=MotionGateConfig)
+    stabilizer: StabilizerConfig = field(default_factory=StabilizerConfig)
+    flow: FlowControlConfig = field(default_factory=FlowControlConfig)
+    capture: CaptureConfig = field(default_factory=CaptureConfig)
 
 
-__all__ = ["AppSettings", "ModelConfig", "TTSConfig"]
+__all__ = ["AppSettings", "BatchingConfig", "CaptureConfig", "ExtractorConfig", "FlowControlConfig", "GatingConfig", "ModelConfig", "MotionGateConfig", "SessionConfig", "StabilizerConfig", "TTSConfig"]
@@ -1,15 +1,31 @@
 
 import numpy as np
-import tensorflow as tf
 import joblib
 import json
+import os
+import sys
 from pathlib import Path
 
+# Agregar la raíz y src al path para compartir la configuración y los motores de inferencia
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from config.settings import ModelConfig
+from inference.model_engine import load_model
+
 class SignLanguageInference:
     """Sistema de inferencia para reconocimiento de lenguaje de señas"""
 
-    def __init__(self, model_path, scaler_path, label_encoder_path, feature_info_path):
-        """Inicializar sistema de inferencia"""
+    def __init__(self, model_path, scaler_path, label_encoder_path, feature_info_path, engine=None):
+        """Inicializar sistema de inferencia
+
+        engine: "keras" para el modelo .h5 o "numpy" para los pesos .npz exportados;
+        por defecto el de ModelConfig (MODEL_ENGINE), igual que el predictor
+        """
+        self.engine = engine or ModelConfig().engine
+        if self.engine == 'numpy' and Path(model_path).suffix == '.h5':
+            model_path = ModelConfig.numpy_weights_path(Path(model_path))
         self.model = None
         self.scaler = None
         self.label_encoder = None
@@ -23,7 +39,7 @@ class SignLanguageInference:
         """Cargar todos los componentes necesarios"""
         try:
             # Cargar modelo
-            self.model = tf.keras.models.load_model(model_path)
+            self.model = load_model(str(model_path), engine=self.engine)
 
             # Cargar preprocesadores
             self.scaler = joblib.load(scaler_path)
@@ -102,6 +118,7 @@ class SignLanguageInference:
         """Obtener información del modelo"""
         return {
             'model_name': self.model.name if hasattr(self.model, 'name') else 'Unknown',
+            'engine': self.engine,
             'n_classes': len(self.class_names),
             'n_features': self.feature_info['n_features'],
             'class_names': self.class_names,
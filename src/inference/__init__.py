@@ -4,8 +4,13 @@ SIGN-AI - Módulo de Inferencia
 Sistema de predicción de lenguaje de señas
 """
 
-from .sign_language_predictor import SignLanguagePredictor
-from .real_time_camera import RealTimeCamera
+from .landmark_packing import LandmarkPacker
 
-__all__ = ['SignLanguagePredictor', 'RealTimeCamera']
+try:
+    from .sign_language_predictor import SignLanguagePredictor
+    from .real_time_camera import RealTimeCamera
+    __all__ = ['SignLanguagePredictor', 'RealTimeCamera', 'LandmarkPacker']
+except ImportError:
+    # Dependencias pesadas (TensorFlow/MediaPipe) no instaladas
+    __all__ = ['LandmarkPacker']
 
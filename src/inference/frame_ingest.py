@@ -0,0 +1,105 @@
+"""
+SIGN-AI - Ingesta de frames
+Decodifica imágenes comprimidas directamente a RGB para MediaPipe
+
+MediaPipe trabaja en RGB; decodificar a BGR con OpenCV (o con PIL y luego
+convertir) para volver a convertir a RGB antes de Holistic duplica copias
+del frame completo. Este módulo produce el RGB en una sola pasada:
+
+- ``cv2.IMREAD_COLOR_RGB`` (OpenCV >= 4.10) decodifica directamente a RGB;
+  en versiones anteriores se convierte a un buffer RGB reutilizable.
+- Si la imagen es mucho mayor que ``max_side``, los JPEG se decodifican a
+  1/2, 1/4 u 1/8 de resolución (escalado DCT, sin decodificar la imagen completa).
+"""
+
+from __future__ import annotations
+
+import io
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Decodificación a RGB sin conversión posterior (0 si OpenCV no la soporta)
+IMREAD_COLOR_RGB = getattr(cv2, "IMREAD_COLOR_RGB", 0)
+
+# (factor, bandera) de mayor a menor reducción
+_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def peek_image_size(data) -> Optional[Tuple[int, int]]:
+    """
+    Leer (ancho, alto) de la cabecera de la imagen sin decodificarla
+
+    Returns:
+        Tupla (ancho, alto) o None si el formato no se reconoce
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            return image.size
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+
+class FrameIngest:
+    """
+    Decodificador de frames a RGB listo para MediaPipe
+
+    Args:
+        max_side: Lado mayor a partir del cual se usa decodificación reducida;
+            el resultado nunca queda por debajo de este tamaño
+    """
+
+    def __init__(self, max_side: int = 1280):
+        self.max_side = max_side
+
+    def reduction_factor(self, size: Optional[Tuple[int, int]]) -> int:
+        """Mayor factor de reducción que mantiene el lado mayor >= max_side."""
+        if not size or self.max_side <= 0:
+            return 1
+        longest = max(size)
+        for factor, _ in _REDUCED_DECODE_FLAGS:
+            if longest // factor >= self.max_side:
+                return factor
+        return 1
+
+    def decode(self, data, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Decodificar una imagen comprimida (JPEG/PNG/WebP) a RGB uint8
+
+        Args:
+            data: Bytes de la imagen
+            out: Buffer RGB reutilizable (solo se usa si OpenCV no decodifica a RGB)
+
+        Raises:
+            ValueError: Si los bytes no son una imagen decodificable
+        """
+        factor = self.reduction_factor(peek_image_size(data))
+        flags = dict(_REDUCED_DECODE_FLAGS).get(factor, cv2.IMREAD_COLOR)
+
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        if IMREAD_COLOR_RGB:
+            image = cv2.imdecode(buffer, flags | IMREAD_COLOR_RGB)
+            if image is None:
+                raise ValueError("No se pudo decodificar la imagen")
+            return image
+
+        image = cv2.imdecode(buffer, flags)
+        if image is None:
+            raise ValueError("No se pudo decodificar la imagen")
+        return self.to_rgb(image, out=out)
+
+    @staticmethod
+    def to_rgb(bgr: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Convertir un frame BGR (p. ej. de cv2.VideoCapture) a RGB reutilizando ``out``."""
+        if out is None or out.shape != bgr.shape or out.dtype != bgr.dtype:
+            out = np.empty_like(bgr)
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=out)
+
+
+__all__ = ["FrameIngest", "peek_image_size", "IMREAD_COLOR_RGB"]
@@ -0,0 +1,201 @@
+"""
+SIGN-AI - Preprocesamiento de frames antes de MediaPipe
+Limita la resolución y recorta una región de interés (ROI) alrededor de la persona
+
+La ROI se calcula con los landmarks del frame anterior de la sesión (pose y
+manos). MediaPipe devuelve coordenadas normalizadas al recorte; ``restore``
+las convierte de nuevo a coordenadas normalizadas del frame completo, de modo
+que las 258 características conservan su significado:
+
+    x = (x0 + x_roi * ancho_roi) / ancho
+    y = (y0 + y_roi * alto_roi) / alto
+    z = z_roi * ancho_roi / ancho      (z usa la misma escala que x)
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .landmark_packing import LandmarkPacker
+
+# Visibilidad mínima para que un landmark de pose cuente en la ROI
+_MIN_VISIBILITY = 0.5
+
+
+@dataclass(frozen=True)
+class CropWindow:
+    """Ventana de recorte en coordenadas normalizadas del frame completo."""
+
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+
+    @property
+    def width(self) -> float:
+        return self.x1 - self.x0
+
+    @property
+    def height(self) -> float:
+        return self.y1 - self.y0
+
+    @property
+    def area(self) -> float:
+        return self.width * self.height
+
+    def contains(self, other: "CropWindow") -> bool:
+        return self.x0 <= other.x0 and self.y0 <= other.y0 and self.x1 >= other.x1 and self.y1 >= other.y1
+
+    def to_pixels(self, frame_width: int, frame_height: int) -> Tuple[int, int, int, int]:
+        left = int(np.floor(self.x0 * frame_width))
+        top = int(np.floor(self.y0 * frame_height))
+        right = int(np.ceil(self.x1 * frame_width))
+        bottom = int(np.ceil(self.y1 * frame_height))
+        return left, top, max(right, left + 1), max(bottom, top + 1)
+
+
+class FramePreprocessor:
+    """
+    Reducción de resolución y recorte de ROI previos a Holistic
+
+    Args:
+        packer: Empaquetador (define los bloques pose/manos del vector)
+        max_side: Lado mayor máximo de la imagen que recibe MediaPipe (0 = sin límite)
+        roi_enabled: Recortar alrededor de la persona detectada en el frame anterior
+        roi_margin: Margen alrededor de la caja de landmarks (fracción de su tamaño)
+        min_roi_side: Lado mínimo de la ROI (fracción del frame)
+        max_roi_area: Si la ROI cubre más que esta fracción del frame, se usa el frame completo
+    """
+
+    def __init__(self, packer: LandmarkPacker, max_side: int = 960, roi_enabled: bool = True,
+                 roi_margin: float = 0.35, min_roi_side: float = 0.4, max_roi_area: float = 0.8):
+        self.packer = packer
+        self.max_side = max_side
+        self.roi_enabled = roi_enabled
+        self.roi_margin = roi_margin
+        self.min_roi_side = min_roi_side
+        self.max_roi_area = max_roi_area
+
+        self._coordinate_blocks = [block for block in packer.blocks if block.attributes[:3] == ("x", "y", "z")]
+        self._lock = threading.Lock()
+        self.frames_total = 0
+        self.cropped_total = 0
+        self.downscaled_total = 0
+
+    def plan(self, previous: Optional[np.ndarray], current: Optional[CropWindow]) -> Optional[CropWindow]:
+        """
+        Decidir la ROI del próximo frame a partir de las características anteriores
+
+        La ventana es estable: solo cambia si la persona sale de la ventana actual
+        o si esta quedó mucho más grande de lo necesario, para no desorientar el
+        tracking de MediaPipe con saltos de encuadre en cada frame.
+
+        Args:
+            previous: Vector de características del frame anterior (coordenadas completas)
+            current: Ventana usada en el frame anterior (None = frame completo)
+        """
+        if not self.roi_enabled or previous is None:
+            return None
+        bounds = self._landmark_bounds(previous)
+        if bounds is None:
+            return None
+        x0, y0, x1, y1 = bounds
+
+        # Mantener la ventana actual mientras la persona (con un margen de guarda) siga dentro
+        guard_x = (x1 - x0) * self.roi_margin / 3
+        guard_y = (y1 - y0) * self.roi_margin / 3
+        needed = CropWindow(max(0.0, x0 - guard_x), max(0.0, y0 - guard_y),
+                            min(1.0, x1 + guard_x), min(1.0, y1 + guard_y))
+        if current is not None and current.contains(needed) and current.area <= 2.5 * max(needed.area, 1e-6):
+            return current
+
+        margin_x = max((x1 - x0) * self.roi_margin, (self.min_roi_side - (x1 - x0)) / 2, 0.0)
+        margin_y = max((y1 - y0) * self.roi_margin, (self.min_roi_side - (y1 - y0)) / 2, 0.0)
+        window = CropWindow(
+            max(0.0, x0 - margin_x), max(0.0, y0 - margin_y),
+            min(1.0, x1 + margin_x), min(1.0, y1 + margin_y),
+        )
+        if window.area >= self.max_roi_area:
+            return None
+        return window
+
+    def _landmark_bounds(self, features: np.ndarray) -> Optional[Tuple[float, float, float, float]]:
+        xs, ys = [], []
+        for block in self._coordinate_blocks:
+            values = features[block.slice].reshape(block.num_landmarks, block.width)
+            if not np.any(values):
+                continue
+            if "visibility" in block.attributes:
+                values = values[values[:, block.attributes.index("visibility")] >= _MIN_VISIBILITY]
+            xs.append(values[:, 0])
+            ys.append(values[:, 1])
+        if not xs:
+            return None
+        xs_all = np.clip(np.concatenate(xs), 0.0, 1.0)
+        ys_all = np.clip(np.concatenate(ys), 0.0, 1.0)
+        if xs_all.size == 0:
+            return None
+        return float(xs_all.min()), float(ys_all.min()), float(xs_all.max()), float(ys_all.max())
+
+    def prepare(self, frame: np.ndarray, window: Optional[CropWindow]) -> Tuple[np.ndarray, Optional[CropWindow]]:
+        """
+        Recortar y reducir el frame para MediaPipe
+
+        Returns:
+            Tupla (imagen para MediaPipe, ventana efectiva en coordenadas completas);
+            la ventana es None si se usa el frame completo
+        """
+        height, width = frame.shape[:2]
+        effective = None
+        if window is not None:
+            left, top, right, bottom = window.to_pixels(width, height)
+            frame = frame[top:bottom, left:right]
+            effective = CropWindow(left / width, top / height, right / width, bottom / height)
+
+        # La escala se calcula sobre el frame completo: la ROI nunca tiene más
+        # píxeles que el frame completo reducido
+        crop_height, crop_width = frame.shape[:2]
+        downscaled = self.max_side > 0 and max(height, width) > self.max_side
+        if downscaled:
+            scale = self.max_side / max(height, width)
+            size = (max(1, round(crop_width * scale)), max(1, round(crop_height * scale)))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        elif effective is not None:
+            frame = np.ascontiguousarray(frame)
+
+        with self._lock:
+            self.frames_total += 1
+            self.cropped_total += effective is not None
+            self.downscaled_total += downscaled
+        return frame, effective
+
+    def restore(self, features: np.ndarray, window: Optional[CropWindow]) -> np.ndarray:
+        """Convertir en sitio las coordenadas de la ROI a coordenadas del frame completo."""
+        if window is None:
+            return features
+        for block in self._coordinate_blocks:
+            values = features[block.slice].reshape(block.num_landmarks, block.width)
+            if not np.any(values):
+                continue
+            values[:, 0] = window.x0 + values[:, 0] * window.width
+            values[:, 1] = window.y0 + values[:, 1] * window.height
+            values[:, 2] *= window.width
+        return features
+
+    def get_metrics(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "max_side": self.max_side,
+                "roi_enabled": self.roi_enabled,
+                "frames_total": self.frames_total,
+                "cropped_total": self.cropped_total,
+                "downscaled_total": self.downscaled_total,
+            }
+
+
+__all__ = ["CropWindow", "FramePreprocessor"]
@@ -0,0 +1,158 @@
+"""
+SIGN-AI - Backends de extracción de landmarks
+Implementaciones intercambiables que producen pose y manos para LandmarkPacker
+
+El modelo usa solo pose (132) y manos (126). ``mp.solutions.holistic``
+calcula además la malla facial de 468 puntos en cada frame, que se descarta.
+Cada backend expone la misma interfaz que las soluciones de MediaPipe
+(``process``, ``reset``, ``close``) y devuelve un objeto con
+``pose_landmarks``, ``right_hand_landmarks`` y ``left_hand_landmarks``, de modo
+que el vector de 258 características conserva el mismo orden y significado.
+
+Backends:
+- ``holistic``: MediaPipe Holistic (referencia, incluye malla facial).
+- ``pose_hands``: MediaPipe Pose + Hands, sin malla facial. Las manos se
+  asignan a izquierda/derecha por cercanía a las muñecas de la pose. Como en
+  Holistic (que ubica las manos a partir de la pose), sin pose no se buscan
+  manos: así un frame vacío no paga la detección de palmas.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+import mediapipe as mp
+
+# Índices de las muñecas en los 33 landmarks de pose (lado de la persona)
+_LEFT_WRIST = 15
+_RIGHT_WRIST = 16
+
+# Umbrales iguales a los que usaba el predictor con Holistic
+_MIN_DETECTION_CONFIDENCE = 0.3
+_MIN_TRACKING_CONFIDENCE = 0.3
+
+
+@dataclass
+class LandmarkResults:
+    """Resultado mínimo que consume LandmarkPacker."""
+
+    pose_landmarks: Any = None
+    right_hand_landmarks: Any = None
+    left_hand_landmarks: Any = None
+
+
+class HolisticExtractor:
+    """MediaPipe Holistic con la configuración de tiempo real del predictor."""
+
+    def __init__(self):
+        self.holistic = mp.solutions.holistic.Holistic(
+            min_detection_confidence=_MIN_DETECTION_CONFIDENCE,
+            min_tracking_confidence=_MIN_TRACKING_CONFIDENCE,
+            model_complexity=1,
+            static_image_mode=False,
+        )
+
+    def process(self, rgb_frame):
+        return self.holistic.process(rgb_frame)
+
+    def reset(self) -> None:
+        self.holistic.reset()
+
+    def close(self) -> None:
+        self.holistic.close()
+
+
+class PoseHandsExtractor:
+    """MediaPipe Pose + Hands: mismas 258 características sin la malla facial."""
+
+    def __init__(self):
+        self.pose = mp.solutions.pose.Pose(
+            min_detection_confidence=_MIN_DETECTION_CONFIDENCE,
+            min_tracking_confidence=_MIN_TRACKING_CONFIDENCE,
+            model_complexity=1,
+            static_image_mode=False,
+        )
+        self.hands = mp.solutions.hands.Hands(
+            min_detection_confidence=_MIN_DETECTION_CONFIDENCE,
+            min_tracking_confidence=_MIN_TRACKING_CONFIDENCE,
+            model_complexity=1,
+            max_num_hands=2,
+            static_image_mode=False,
+        )
+
+    def process(self, rgb_frame) -> LandmarkResults:
+        pose_landmarks = self.pose.process(rgb_frame).pose_landmarks
+        results = LandmarkResults(pose_landmarks=pose_landmarks)
+        if pose_landmarks is None:
+            return results
+
+        hands = self.hands.process(rgb_frame)
+        if hands.multi_hand_landmarks:
+            self._assign_by_wrists(results, pose_landmarks, hands.multi_hand_landmarks)
+        return results
+
+    @staticmethod
+    def _assign_by_wrists(results: LandmarkResults, pose_landmarks, hand_list) -> None:
+        # Asignar cada mano a la muñeca de pose más cercana (la asignación de menor distancia total)
+        wrists = {
+            "left_hand_landmarks": pose_landmarks.landmark[_LEFT_WRIST],
+            "right_hand_landmarks": pose_landmarks.landmark[_RIGHT_WRIST],
+        }
+
+        def distance(hand, side: str) -> float:
+            wrist = wrists[side]
+            return (hand.landmark[0].x - wrist.x) ** 2 + (hand.landmark[0].y - wrist.y) ** 2
+
+        if len(hand_list) == 1:
+            hand = hand_list[0]
+            side = min(wrists, key=lambda name: distance(hand, name))
+            setattr(results, side, hand)
+            return
+
+        first, second = hand_list[0], hand_list[1]
+        straight = distance(first, "left_hand_landmarks") + distance(second, "right_hand_landmarks")
+        crossed = distance(first, "right_hand_landmarks") + distance(second, "left_hand_landmarks")
+        if straight <= crossed:
+            results.left_hand_landmarks, results.right_hand_landmarks = first, second
+        else:
+            results.left_hand_landmarks, results.right_hand_landmarks = second, first
+
+    def reset(self) -> None:
+        self.pose.reset()
+        self.hands.reset()
+
+    def close(self) -> None:
+        self.pose.close()
+        self.hands.close()
+
+
+EXTRACTOR_BACKENDS: Dict[str, Callable[[], Any]] = {
+    "holistic": HolisticExtractor,
+    "pose_hands": PoseHandsExtractor,
+}
+
+
+def create_extractor(backend: str = "holistic"):
+    """
+    Crear una instancia del backend de extracción indicado
+
+    Raises:
+        ValueError: Si el backend no existe
+    """
+    factory: Optional[Callable[[], Any]] = EXTRACTOR_BACKENDS.get(backend)
+    if factory is None:
+        raise ValueError(
+            f"Backend de extracción desconocido: {backend!r} "
+            f"(disponibles: {', '.join(sorted(EXTRACTOR_BACKENDS))})"
+        )
+    return factory()
+
+
+__all__ = [
+    "EXTRACTOR_BACKENDS",
+    "HolisticExtractor",
+    "LandmarkResults",
+    "PoseHandsExtractor",
+    "create_extractor",
+]
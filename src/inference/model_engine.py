@@ -0,0 +1,218 @@
+"""
+SIGN-AI - Motores de inferencia del modelo Dense
+Carga del modelo con Keras o con un motor NumPy sin TensorFlow
+
+El motor NumPy usa pesos exportados una sola vez desde el .h5 a un .npz:
+
+    python src/inference/model_engine.py models/Dense_Simple_patient.h5
+
+Solo necesita ``h5py`` para exportar y ``numpy`` para predecir.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+ENGINES = ("keras", "numpy")
+
+# Capas que no afectan la inferencia
+_PASSTHROUGH_LAYERS = {"Dropout", "GaussianNoise", "GaussianDropout", "ActivityRegularization"}
+
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0.0, out=x)
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    x -= x.max(axis=-1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=-1, keepdims=True)
+    return x
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": _relu,
+    "softmax": _softmax,
+    "sigmoid": _sigmoid,
+    "tanh": np.tanh,
+}
+
+
+class NumpyDenseModel:
+    """
+    Red feed-forward evaluada con NumPy
+
+    Expone el subconjunto de la API de Keras que usa el proyecto:
+    ``predict``, ``input_shape``, ``output_shape``, ``layers`` y ``name``.
+    """
+
+    def __init__(self, kernels: List[np.ndarray], biases: List[np.ndarray], activations: List[str],
+                 layer_names: List[str], name: str = "numpy_model"):
+        if not (len(kernels) == len(biases) == len(activations)):
+            raise ValueError("kernels, biases y activations deben tener la misma longitud")
+        unknown = [act for act in activations if act not in ACTIVATIONS]
+        if unknown:
+            raise ValueError(f"Activaciones no soportadas: {unknown}")
+
+        self.kernels = [np.ascontiguousarray(k, dtype=np.float32) for k in kernels]
+        self.biases = [np.ascontiguousarray(b, dtype=np.float32) for b in biases]
+        self.activations = list(activations)
+        self.layers = list(layer_names)
+        self.name = name
+
+    @property
+    def input_shape(self) -> Tuple[Optional[int], int]:
+        return (None, self.kernels[0].shape[0])
+
+    @property
+    def output_shape(self) -> Tuple[Optional[int], int]:
+        return (None, self.kernels[-1].shape[1])
+
+    @classmethod
+    def load(cls, npz_path: str) -> "NumpyDenseModel":
+        """Cargar pesos exportados con ``export_h5_to_npz``."""
+        with np.load(npz_path, allow_pickle=False) as data:
+            num_dense = int(data["num_dense"])
+            kernels = [data[f"kernel_{i}"] for i in range(num_dense)]
+            biases = [data[f"bias_{i}"] for i in range(num_dense)]
+            activations = [str(act) for act in data["activations"]]
+            layer_names = [str(layer) for layer in data["layer_names"]]
+            name = str(data["name"])
+        return cls(kernels, biases, activations, layer_names, name=name)
+
+    def predict(self, x, verbose=0, batch_size=None) -> np.ndarray:  # pylint: disable=unused-argument
+        """
+        Forward pass equivalente a ``model.predict`` de Keras
+
+        Args:
+            x: Array (n_muestras, n_características)
+
+        Returns:
+            Array float32 (n_muestras, n_clases)
+        """
+        output = np.asarray(x, dtype=np.float32)
+        if output.ndim == 1:
+            output = output[np.newaxis, :]
+        for kernel, bias, activation in zip(self.kernels, self.biases, self.activations):
+            output = output @ kernel
+            output += bias
+            output = ACTIVATIONS[activation](output)
+        return output
+
+
+def _find_weight(layer_group, suffix: str) -> np.ndarray:
+    """Buscar un dataset de pesos (kernel/bias) dentro del grupo de una capa."""
+    found = []
+
+    def visit(name, obj):
+        if hasattr(obj, "shape") and name.split("/")[-1].split(":")[0] == suffix:
+            found.append(obj[()])
+
+    layer_group.visititems(visit)
+    if len(found) != 1:
+        raise ValueError(f"No se encontró un único '{suffix}' en {layer_group.name}")
+    return found[0]
+
+
+def export_h5_to_npz(h5_path: str, npz_path: Optional[str] = None) -> Path:
+    """
+    Exportar los pesos de un modelo Keras Sequential denso a un .npz compacto
+
+    Args:
+        h5_path: Ruta al modelo .h5
+        npz_path: Ruta de salida (por defecto, la misma ruta con extensión .npz)
+
+    Returns:
+        Ruta del archivo .npz generado
+    """
+    import h5py  # Solo necesario para exportar
+
+    h5_path = Path(h5_path)
+    output_path = Path(npz_path) if npz_path else h5_path.with_suffix(".npz")
+
+    with h5py.File(h5_path, "r") as h5_file:
+        raw_config = h5_file.attrs["model_config"]
+        if isinstance(raw_config, bytes):
+            raw_config = raw_config.decode("utf-8")
+        model_config = json.loads(raw_config)
+        if model_config.get("class_name") != "Sequential":
+            raise ValueError(f"Solo se soportan modelos Sequential, no {model_config.get('class_name')}")
+
+        weights_root = h5_file["model_weights"] if "model_weights" in h5_file else h5_file
+        arrays = {}
+        activations: List[str] = []
+        layer_names: List[str] = []
+
+        for layer in model_config["config"]["layers"]:
+            class_name = layer["class_name"]
+            config = layer["config"]
+            if class_name == "InputLayer":
+                continue
+            layer_names.append(config["name"])
+            if class_name in _PASSTHROUGH_LAYERS:
+                continue
+            if class_name != "Dense":
+                raise ValueError(f"Capa no soportada por el motor NumPy: {class_name}")
+
+            index = len(activations)
+            layer_group = weights_root[config["name"]]
+            arrays[f"kernel_{index}"] = _find_weight(layer_group, "kernel").astype(np.float32)
+            if config.get("use_bias", True):
+                arrays[f"bias_{index}"] = _find_weight(layer_group, "bias").astype(np.float32)
+            else:
+                arrays[f"bias_{index}"] = np.zeros(config["units"], dtype=np.float32)
+            activations.append(config.get("activation") or "linear")
+
+    np.savez_compressed(
+        output_path,
+        num_dense=np.int64(len(activations)),
+        activations=np.array(activations),
+        layer_names=np.array(layer_names),
+        name=np.array(model_config["config"].get("name", h5_path.stem)),
+        **arrays,
+    )
+    return output_path
+
+
+def load_model(model_path: str, engine: str = "keras"):
+    """
+    Cargar el modelo con el motor indicado
+
+    Args:
+        model_path: Ruta al .h5 (keras) o al .npz (numpy)
+        engine: "keras" o "numpy"
+    """
+    if engine == "numpy":
+        return NumpyDenseModel.load(model_path)
+    if engine == "keras":
+        import tensorflow as tf  # Importación diferida: el motor NumPy no necesita TensorFlow
+
+        return tf.keras.models.load_model(model_path)
+    raise ValueError(f"Motor de inferencia desconocido: {engine} (opciones: {', '.join(ENGINES)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportar modelos .h5 al formato .npz del motor NumPy")
+    parser.add_argument("models", nargs="+", help="Rutas a modelos .h5")
+    args = parser.parse_args()
+
+    for h5_path in args.models:
+        output_path = export_h5_to_npz(h5_path)
+        print(f"✅ {h5_path} -> {output_path}")
+
+
+__all__ = ["NumpyDenseModel", "export_h5_to_npz", "load_model", "ENGINES"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+SIGN-AI - Detector de cambios por sesión
+Evita ejecutar Holistic + modelo + TTS cuando la escena no cambió
+
+Cada frame se reduce a una miniatura en escala de grises (``thumbnail_side``
+píxeles de lado mayor) y se compara con la miniatura del último frame que sí
+pasó por el pipeline completo. Si la diferencia media por píxel (0-255) es
+menor que ``threshold`` y el resultado guardado no es más antiguo que
+``max_reuse_s``, se reutiliza ese resultado.
+
+Se compara siempre contra el último frame procesado (no contra el anterior),
+para que un movimiento lento no se acumule frame a frame sin detectarse.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Compuerta de movimiento delante del pipeline de predicción
+
+    Args:
+        thumbnail_side: Lado mayor de la miniatura que se compara
+        threshold: Diferencia media absoluta (0-255) por debajo de la cual el frame es estático
+        max_reuse_s: Antigüedad máxima del resultado reutilizado (segundos)
+    """
+
+    def __init__(self, thumbnail_side: int = 32, threshold: float = 4.0, max_reuse_s: float = 1.0):
+        self.thumbnail_side = max(4, thumbnail_side)
+        self.threshold = threshold
+        self.max_reuse_s = max_reuse_s
+
+        self._lock = threading.Lock()
+        self.hits_total = 0
+        self.misses_total = 0
+        self.expired_total = 0
+
+    def thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        """Miniatura en escala de grises (float32) de un frame BGR o RGB."""
+        height, width = frame.shape[:2]
+        scale = self.thumbnail_side / max(height, width)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        # Reducir primero: la conversión a gris se hace sobre pocos píxeles
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = small.mean(axis=2, dtype=np.float32)
+        return small.astype(np.float32, copy=False)
+
+    def check(self, frame: np.ndarray, state, now: float) -> Tuple[bool, np.ndarray]:
+        """
+        Decidir si el frame puede reutilizar el último resultado de la sesión
+
+        Args:
+            frame: Frame decodificado (BGR o RGB)
+            state: Estado de la sesión (``motion_reference``, ``motion_reference_time``,
+                ``last_response``)
+            now: Marca de tiempo actual
+
+        Returns:
+            Tupla (estático, miniatura); la miniatura se pasa a ``commit`` si el
+            frame termina procesándose
+        """
+        thumbnail = self.thumbnail(frame)
+        reference = state.motion_reference
+        static = False
+        if reference is not None and reference.shape == thumbnail.shape and state.last_response is not None:
+            if now - state.motion_reference_time > self.max_reuse_s:
+                with self._lock:
+                    self.expired_total += 1
+            else:
+                static = float(np.mean(np.abs(thumbnail - reference))) < self.threshold
+
+        with self._lock:
+            if static:
+                self.hits_total += 1
+            else:
+                self.misses_total += 1
+        return static, thumbnail
+
+    @staticmethod
+    def commit(state, thumbnail: Optional[np.ndarray], now: float) -> None:
+        """Guardar la miniatura del frame procesado como nueva referencia de la sesión."""
+        state.motion_reference = thumbnail
+        state.motion_reference_time = now
+
+    def get_metrics(self) -> Dict[str, object]:
+        with self._lock:
+            checked = self.hits_total + self.misses_total
+            return {
+                "enabled": True,
+                "threshold": self.threshold,
+                "max_reuse_s": self.max_reuse_s,
+                "hits_total": self.hits_total,
+                "misses_total": self.misses_total,
+                "expired_total": self.expired_total,
+                "hit_rate": round(self.hits_total / checked, 4) if checked else 0.0,
+            }
+
+
+__all__ = ["MotionGate"]
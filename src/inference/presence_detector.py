@@ -0,0 +1,179 @@
+"""
+SIGN-AI - Pre-detector de presencia
+Comprobación barata antes de Holistic: ¿hay alguien señando en el frame?
+
+Holistic ejecuta pose, malla facial y ambas manos en cada frame, aunque no
+haya nadie frente a la cámara. Este detector analiza una miniatura de ``side``
+píxeles con un modelo más ligero, elegido con ``detector``:
+
+- ``hands`` (por defecto): detección de palmas de MediaPipe Hands en su variante
+  lite. Abre la puerta con solo las manos en cuadro, que es lo que importa en
+  lengua de señas.
+- ``pose``: solo el modelo de pose (sin manos ni malla facial). El paquete de
+  MediaPipe solo incluye la variante completa, por eso es la opción más lenta.
+- ``face``: detección de rostro de corto alcance (la más barata, ~2 ms), pero
+  un encuadre con solo las manos nunca abre la puerta.
+
+La puerta es persistente por sesión: mientras el último frame procesado tenga
+manos, o durante ``hold_s`` tras la última detección, se va directo a Holistic
+sin volver a comprobar, para no interrumpir el tracking de quien ya seña.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from .tracker_pool import TrackerPool
+
+
+class _HandsDetector:
+    """Detección de palmas en cada frame (modelo lite, sin tracking)."""
+
+    def __init__(self, min_confidence: float):
+        self.hands = mp.solutions.hands.Hands(
+            static_image_mode=True, max_num_hands=2, model_complexity=0,
+            min_detection_confidence=min_confidence,
+        )
+
+    def detect(self, rgb_image: np.ndarray) -> bool:
+        return bool(self.hands.process(rgb_image).multi_hand_landmarks)
+
+    def close(self) -> None:
+        self.hands.close()
+
+
+class _PoseDetector:
+    """Solo el modelo de pose, sin manos ni malla facial."""
+
+    def __init__(self, min_confidence: float):
+        self.pose = mp.solutions.pose.Pose(
+            static_image_mode=True, model_complexity=1, min_detection_confidence=min_confidence
+        )
+
+    def detect(self, rgb_image: np.ndarray) -> bool:
+        return self.pose.process(rgb_image).pose_landmarks is not None
+
+    def close(self) -> None:
+        self.pose.close()
+
+
+class _FaceDetector:
+    """Detector de rostro de una sesión (sin tracking)."""
+
+    def __init__(self, min_confidence: float):
+        self.face = mp.solutions.face_detection.FaceDetection(
+            model_selection=0, min_detection_confidence=min_confidence
+        )
+
+    def detect(self, rgb_image: np.ndarray) -> bool:
+        return bool(self.face.process(rgb_image).detections)
+
+    def close(self) -> None:
+        self.face.close()
+
+
+PRESENCE_DETECTORS: Dict[str, Callable[[float], Any]] = {
+    "hands": _HandsDetector,
+    "pose": _PoseDetector,
+    "face": _FaceDetector,
+}
+
+
+class PresenceDetector:
+    """
+    Puerta previa a Holistic con estado por sesión
+
+    Args:
+        side: Lado mayor de la miniatura analizada
+        detector: Modelo del pre-detector ("hands", "pose" o "face")
+        hold_s: Tiempo que la puerta sigue abierta tras una detección
+        min_confidence: Confianza mínima de la detección
+        pool_size: Máximo de detectores (uno por sesión activa)
+        idle_timeout_s: Inactividad tras la cual se libera el detector de una sesión
+
+    Raises:
+        ValueError: Si el detector no existe
+    """
+
+    def __init__(self, side: int = 256, hold_s: float = 1.0, min_confidence: float = 0.5,
+                 pool_size: int = 8, idle_timeout_s: float = 60.0, detector: str = "hands"):
+        factory = PRESENCE_DETECTORS.get(detector)
+        if factory is None:
+            raise ValueError(
+                f"Pre-detector de presencia desconocido: {detector!r} "
+                f"(disponibles: {', '.join(sorted(PRESENCE_DETECTORS))})"
+            )
+        self.side = side
+        self.hold_s = hold_s
+        self.detector = detector
+        self.detectors = TrackerPool(
+            lambda: factory(min_confidence), capacity=pool_size, idle_timeout_s=idle_timeout_s
+        )
+
+        self._lock = threading.Lock()
+        self.open_total = 0
+        self.checks_total = 0
+        self.escalated_total = 0
+        self.skipped_total = 0
+
+    def should_extract(self, frame: np.ndarray, state, has_hands: bool, rgb: bool, now: float) -> bool:
+        """
+        Decidir si el frame pasa a Holistic
+
+        Args:
+            frame: Frame completo (BGR, o RGB si rgb=True)
+            state: Estado de la sesión (usa ``presence_hold_until``)
+            has_hands: Si el último frame procesado de la sesión tenía manos
+            now: Marca de tiempo actual
+        """
+        if has_hands or now < state.presence_hold_until:
+            if has_hands:
+                state.presence_hold_until = now + self.hold_s
+            with self._lock:
+                self.open_total += 1
+            return True
+
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.side / max(height, width))
+        small = cv2.resize(frame, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+        if not rgb:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+        with self.detectors.acquire(state.session_id) as detector:
+            present = detector.detect(small)
+
+        with self._lock:
+            self.checks_total += 1
+            if present:
+                self.escalated_total += 1
+            else:
+                self.skipped_total += 1
+        if present:
+            state.presence_hold_until = now + self.hold_s
+        return present
+
+    def release(self, session_id) -> None:
+        self.detectors.release(session_id)
+
+    def close(self) -> None:
+        self.detectors.close()
+
+    def get_metrics(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "detector": self.detector,
+                "side": self.side,
+                "hold_s": self.hold_s,
+                "open_total": self.open_total,
+                "checks_total": self.checks_total,
+                "escalated_total": self.escalated_total,
+                "skipped_total": self.skipped_total,
+            }
+
+
+__all__ = ["PresenceDetector", "PRESENCE_DETECTORS"]
@@ -7,6 +7,7 @@ from typing import Optional
 # Agregar src al path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+from inference.frame_ingest import FrameIngest
 from inference.sign_language_predictor import SignLanguagePredictor
 
 class RealTimeCamera:
@@ -41,6 +42,9 @@ class RealTimeCamera:
         self.cap = None
         self.is_running = False
         
+        # Buffer RGB reutilizable para MediaPipe (el frame BGR se conserva para mostrarlo)
+        self.rgb_frame = None
+        
         # Variables para visualización
         self.current_prediction = "Iniciando..."
         self.current_confidence = 0.0
@@ -111,7 +115,8 @@ class RealTimeCamera:
             frame = cv2.flip(frame, 1)
             
             # Hacer predicción en tiempo real
-            prediction, confidence, prediction_made = self.predictor.predict_realtime(frame)
+            self.rgb_frame = FrameIngest.to_rgb(frame, out=self.rgb_frame)
+            prediction, confidence, prediction_made, _ = self.predictor.predict_realtime(self.rgb_frame, rgb=True)
             
             if prediction_made:
                 self.current_prediction = prediction
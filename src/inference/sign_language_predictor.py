@@ -1,12 +1,22 @@
-import tensorflow as tf
 import mediapipe as mp
 import cv2
 import numpy as np
 import pickle
 import json
-from typing import Tuple, Optional
+from typing import Callable, Tuple, Optional
 import time
 
+from .frame_preprocess import FramePreprocessor
+from .landmark_extractors import EXTRACTOR_BACKENDS, create_extractor
+from .landmark_packing import LandmarkPacker
+from .model_engine import load_model
+from .presence_detector import PresenceDetector
+from .tracker_pool import TrackerPool
+from services.batch_scheduler import SchedulerOverloadedError
+
+# Resultado cuando no hay manos en el frame (no se ejecuta el modelo)
+NO_SIGN_LABEL = "Sin seña"
+
 class SignLanguagePredictor:
     """
     Predictor de lenguaje de señas optimizado para SIGN-AI
@@ -19,21 +29,41 @@ class SignLanguagePredictor:
     - Total: 258 características
     """
     
-    def __init__(self, model_path: str, scaler_path: str, label_encoder_path: str, feature_info_path: str):
+    NO_SIGN_LABEL = NO_SIGN_LABEL
+    
+    def __init__(self, model_path: str, scaler_path: str, label_encoder_path: str, feature_info_path: str,
+                 engine: str = "keras", tracker_pool_size: int = 8, tracker_idle_timeout_s: float = 60.0,
+                 max_input_side: int = 960, roi_enabled: bool = True, roi_margin: float = 0.35,
+                 require_hands: bool = True, presence_enabled: bool = False, presence_side: int = 256,
+                 presence_hold_s: float = 1.0, extractor_backend: str = "holistic",
+                 presence_detector: str = "hands"):
         """
         Inicializar predictor de lenguaje de señas
         
         Args:
-            model_path: Ruta al modelo .h5 entrenado
+            model_path: Ruta al modelo .h5 entrenado (o .npz exportado si engine="numpy")
             scaler_path: Ruta al scaler .pkl
             label_encoder_path: Ruta al label encoder .pkl
             feature_info_path: Ruta al archivo feature_info.json
+            engine: Motor de inferencia ("keras" o "numpy")
+            tracker_pool_size: Máximo de instancias Holistic (una por sesión activa)
+            tracker_idle_timeout_s: Inactividad tras la cual una instancia se libera
+            max_input_side: Lado mayor máximo del frame que recibe MediaPipe (0 = sin límite)
+            roi_enabled: Recortar alrededor de la persona detectada en el frame anterior
+            roi_margin: Margen de la ROI (fracción del tamaño de la persona)
+            require_hands: Si True, un frame sin manos devuelve NO_SIGN_LABEL sin ejecutar el modelo
+            presence_enabled: Comprobar con un detector barato si hay alguien antes de Holistic
+            presence_side: Lado mayor de la miniatura del pre-detector
+            presence_hold_s: Tiempo que el pre-detector queda abierto tras una detección
+            extractor_backend: Backend de landmarks ("holistic" o "pose_hands", ver landmark_extractors)
+            presence_detector: Modelo del pre-detector ("hands", "pose" o "face", ver presence_detector)
         """
         print("🤖 Inicializando SignLanguagePredictor...")
         
         # Cargar modelo entrenado
-        self.model = tf.keras.models.load_model(model_path)
-        print(f"✅ Modelo cargado: {model_path}")
+        self.engine = engine
+        self.model = load_model(model_path, engine=engine)
+        print(f"✅ Modelo cargado ({engine}): {model_path}")
         
         # Cargar preprocesadores
         self.scaler = pickle.load(open(scaler_path, 'rb'))
@@ -44,22 +74,45 @@ class SignLanguagePredictor:
         with open(feature_info_path, 'r', encoding='utf-8') as f:
             self.feature_info = json.load(f)
         
-        # Obtener número de características (258)
-        self.num_features = 258  # Valor fijo basado en el modelo
+        # Empaquetador de landmarks según feature_columns (258 características)
+        self.packer = LandmarkPacker.from_feature_info(self.feature_info)
+        self.num_features = self.packer.num_features
         print(f"✅ Feature info cargado: {self.num_features} características")
         
-        # Inicializar MediaPipe Holistic
+        # Reducción de resolución y ROI previas a MediaPipe (mismas 258 características)
+        self.preprocessor = FramePreprocessor(
+            self.packer, max_side=max_input_side, roi_enabled=roi_enabled, roi_margin=roi_margin
+        )
+        
+        # Pool de extractores (Holistic o Pose + Hands): una instancia con tracking propio por sesión
+        if extractor_backend not in EXTRACTOR_BACKENDS:
+            raise ValueError(f"Backend de extracción desconocido: {extractor_backend!r}")
+        self.extractor_backend = extractor_backend
         self.mp_holistic = mp.solutions.holistic
-        self.holistic = self.mp_holistic.Holistic(
-            min_detection_confidence=0.3,
-            min_tracking_confidence=0.3,
-            model_complexity=1,
-            static_image_mode=False
+        self.trackers = TrackerPool(
+            self._create_extractor,
+            capacity=tracker_pool_size,
+            idle_timeout_s=tracker_idle_timeout_s,
         )
         
+        # Pre-detector opcional (palmas, pose o rostro en miniatura) con puerta persistente por sesión
+        self.presence = None
+        if presence_enabled:
+            self.presence = PresenceDetector(
+                side=presence_side,
+                detector=presence_detector,
+                hold_s=presence_hold_s,
+                pool_size=tracker_pool_size,
+                idle_timeout_s=tracker_idle_timeout_s,
+            )
+        
         # Configurar dibujo de landmarks
         self.mp_drawing = mp.solutions.drawing_utils
         
+        # Sin manos no hay seña: se evita el scaler y el modelo
+        self.require_hands = require_hands
+        self._hand_blocks = [self.packer.block(name).slice for name in ("right_hand", "left_hand")]
+        
         # Variables para tiempo real
         self.last_prediction_time = 0
         self.prediction_interval = 0.1  # Predecir cada 100ms (10 FPS)
@@ -68,105 +121,195 @@ class SignLanguagePredictor:
         print(f"📊 Características esperadas: {self.num_features}")
         print(f"📊 Clases disponibles: {len(self.label_encoder.classes_)}")
         print(f"⚡ Frecuencia de predicción: {1/self.prediction_interval} FPS")
+        print(f"🧵 Pool de extractores ({extractor_backend}): hasta {tracker_pool_size} sesiones")
     
-    def extract_landmarks(self, frame: np.ndarray) -> Tuple[np.ndarray, any]:
+    def _create_extractor(self):
+        return create_extractor(self.extractor_backend)
+    
+    def extract_landmarks(self, frame: np.ndarray, out: Optional[np.ndarray] = None,
+                          session_id: Optional[str] = None, rgb: bool = False) -> Tuple[np.ndarray, any]:
         """
         Extraer landmarks de un frame de cámara (optimizado para tiempo real)
         
         Args:
-            frame: Frame de cámara (BGR)
+            frame: Frame de cámara (BGR, o RGB si rgb=True)
+            out: Vector float32 preasignado para las características (opcional)
+            session_id: Sesión cuyo extractor se usa (None = extractor por defecto)
+            rgb: Si True, el frame ya está en RGB (p. ej. de FrameIngest) y se usa sin copiar
             
         Returns:
             Tupla (características, resultados_mediapipe)
         """
-        # Convertir BGR a RGB para MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # MediaPipe trabaja en RGB
+        rgb_frame = frame if rgb else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         
-        # Procesar con MediaPipe Holistic
-        results = self.holistic.process(rgb_frame)
+        # Procesar con el extractor de la sesión (conserva el tracking entre frames)
+        with self.trackers.acquire(session_id) as extractor:
+            results = extractor.process(rgb_frame)
         
-        # Inicializar array de características (258 características)
-        features = np.zeros(258, dtype=np.float32)
-        
-        # Extraer características de POSE (33 landmarks × 4 valores = 132 características)
-        if results.pose_landmarks:
-            for i, landmark in enumerate(results.pose_landmarks.landmark):
-                if i < 33:  # Solo 33 landmarks de pose
-                    idx = i * 4
-                    features[idx] = landmark.x      # Coordenada X
-                    features[idx + 1] = landmark.y  # Coordenada Y
-                    features[idx + 2] = landmark.z  # Coordenada Z
-                    features[idx + 3] = landmark.visibility  # Visibilidad
-        
-        # Extraer características de MANO DERECHA (21 landmarks × 3 valores = 63 características)
-        if results.right_hand_landmarks:
-            for i, landmark in enumerate(results.right_hand_landmarks.landmark):
-                if i < 21:  # Solo 21 landmarks por mano
-                    idx = 132 + (i * 3)  # Empezar después de pose (132)
-                    features[idx] = landmark.x      # Coordenada X
-                    features[idx + 1] = landmark.y  # Coordenada Y
-                    features[idx + 2] = landmark.z  # Coordenada Z
-        
-        # Extraer características de MANO IZQUIERDA (21 landmarks × 3 valores = 63 características)
-        if results.left_hand_landmarks:
-            for i, landmark in enumerate(results.left_hand_landmarks.landmark):
-                if i < 21:  # Solo 21 landmarks por mano
-                    idx = 195 + (i * 3)  # Empezar después de pose + mano derecha (195)
-                    features[idx] = landmark.x      # Coordenada X
-                    features[idx + 1] = landmark.y  # Coordenada Y
-                    features[idx + 2] = landmark.z  # Coordenada Z
+        # Empaquetar pose y manos en el vector de características
+        features = self.packer.pack(results, out=out)
         
         return features, results
     
-    def predict_realtime(self, frame: np.ndarray, include_landmarks: bool = False) -> Tuple[str, float, bool, Optional[dict]]:
+    def predict_proba(self, features_batch: np.ndarray) -> np.ndarray:
+        """
+        Normalizar y clasificar un lote de vectores de características
+        
+        Args:
+            features_batch: Array (n_muestras, 258)
+            
+        Returns:
+            Array (n_muestras, n_clases) con probabilidades
+        """
+        features_scaled = self.scaler.transform(features_batch)
+        return self.model.predict(features_scaled, verbose=0)
+    
+    def decode_prediction(self, probabilities: np.ndarray) -> Tuple[str, float]:
+        """
+        Obtener clase y confianza a partir de una fila de probabilidades
+        """
+        class_idx = int(np.argmax(probabilities))
+        return str(self.label_encoder.classes_[class_idx]), float(probabilities[class_idx])
+    
+    def predict_realtime(self, frame: np.ndarray, include_landmarks: bool = False,
+                         classifier: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                         state=None, extractor: Optional[Callable[..., np.ndarray]] = None,
+                         rgb: bool = False) -> Tuple[str, float, bool, Optional[dict]]:
         """
         Predecir lenguaje de señas en tiempo real (con control de frecuencia)
         
         Args:
-            frame: Frame de cámara (BGR)
+            frame: Frame de cámara (BGR, o RGB si rgb=True)
             include_landmarks: Si True, incluye landmarks en la respuesta
+            classifier: Función vector -> probabilidades (opcional, p. ej. el
+                planificador de micro-lotes); por defecto se usa predict_proba
+            state: Estado de sesión con last_prediction_time, prediction_interval
+                y buffer ``features`` (opcional); sin él se usa el control global
+            extractor: Función (frame, out, session_id, rgb) -> características (opcional,
+                p. ej. el pool de procesos); por defecto se usa extract_landmarks
+            rgb: Si True, el frame ya está en RGB
             
         Returns:
             Tupla (clase_predicha, confianza, prediccion_realizada, landmarks_dict)
             landmarks_dict será None si include_landmarks=False
         """
         current_time = time.time()
+        throttle = state if state is not None else self
         
         # Controlar frecuencia de predicción para optimizar rendimiento
-        if current_time - self.last_prediction_time < self.prediction_interval:
+        if current_time - throttle.last_prediction_time < throttle.prediction_interval:
             return "Esperando...", 0.0, False, None
         
         try:
-            # Extraer características del frame
-            features, results = self.extract_landmarks(frame)
-            
-            # Normalizar características usando el scaler entrenado
-            features_scaled = self.scaler.transform([features])
+            # Extraer características del frame (reutilizando el buffer de la sesión)
+            if state is not None and state.features is None:
+                state.features = self.packer.allocate()
+            out = getattr(state, 'features', None)
+            session_id = getattr(state, 'session_id', None)
+            extract = extractor or (lambda image, **kwargs: self.extract_landmarks(image, **kwargs)[0])
             
-            # Hacer predicción con el modelo
-            prediction = self.model.predict(features_scaled, verbose=0)
+            # Nadie frente a la cámara: "sin seña" sin ejecutar Holistic
+            if self.presence is not None and state is not None:
+                if not self.presence.should_extract(frame, state, self.has_hands(out), rgb, current_time):
+                    out.fill(0.0)
+                    state.crop_window = None
+                    throttle.last_prediction_time = current_time
+                    return NO_SIGN_LABEL, 0.0, True, None
             
-            # Obtener clase con mayor probabilidad
-            class_idx = np.argmax(prediction[0])
-            confidence = float(prediction[0][class_idx])
-            
-            # Decodificar índice a nombre de clase
-            class_name = self.label_encoder.inverse_transform([class_idx])[0]
-            
-            # Extraer landmarks si se solicita
-            landmarks_dict = None
-            if include_landmarks:
-                landmarks_dict = self._extract_landmarks_dict(results)
+            # Recortar alrededor de la persona del frame anterior y limitar la resolución
+            window = self.preprocessor.plan(out, getattr(state, 'crop_window', None))
+            image, window = self.preprocessor.prepare(frame, window)
+            features = extract(image, out=out, session_id=session_id, rgb=rgb)
+            if window is not None and not self.packer.has_block(features, "pose"):
+                # La persona salió de la ROI: repetir con el frame completo
+                image, window = self.preprocessor.prepare(frame, None)
+                features = extract(image, out=out, session_id=session_id, rgb=rgb)
+            self.preprocessor.restore(features, window)
+            if state is not None:
+                state.crop_window = window
             
             # Actualizar tiempo de última predicción
-            self.last_prediction_time = current_time
+            throttle.last_prediction_time = current_time
             
-            return class_name, confidence, True, landmarks_dict
+            return self._classify(features, include_landmarks, classifier)
             
+        except SchedulerOverloadedError:
+            # Servidor saturado: lo decide el llamador (429 / "busy"), no es un error de predicción
+            raise
         except Exception as e:
             print(f"❌ Error en predicción: {e}")
             return "Error", 0.0, False, None
     
+    def predict_from_features(self, features: np.ndarray, include_landmarks: bool = False,
+                              classifier: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                              state=None) -> Tuple[str, float, bool, Optional[dict]]:
+        """
+        Predecir a partir de un vector de características ya extraído (p. ej. por
+        MediaPipe en el navegador), sin decodificar imágenes ni ejecutar Holistic
+        
+        Args:
+            features: Vector de ``num_features`` valores en el orden de feature_columns
+            include_landmarks: Si True, incluye landmarks en la respuesta
+            classifier: Función vector -> probabilidades (opcional)
+            state: Estado de sesión para el control de frecuencia (opcional)
+            
+        Returns:
+            Tupla (clase_predicha, confianza, prediccion_realizada, landmarks_dict)
+        """
+        current_time = time.time()
+        throttle = state if state is not None else self
+        if current_time - throttle.last_prediction_time < throttle.prediction_interval:
+            return "Esperando...", 0.0, False, None
+        
+        try:
+            throttle.last_prediction_time = current_time
+            return self._classify(features, include_landmarks, classifier)
+        except SchedulerOverloadedError:
+            raise
+        except Exception as e:
+            print(f"❌ Error en predicción: {e}")
+            return "Error", 0.0, False, None
+    
+    def _classify(self, features: np.ndarray, include_landmarks: bool,
+                  classifier: Optional[Callable[[np.ndarray], np.ndarray]]) -> Tuple[str, float, bool, Optional[dict]]:
+        # Sin manos: resultado "sin seña" sin normalizar ni ejecutar el modelo
+        if self.require_hands and not self.has_hands(features):
+            landmarks_dict = self.packer.to_landmarks_dict(features) if include_landmarks else None
+            return NO_SIGN_LABEL, 0.0, True, landmarks_dict
+        
+        # Normalizar y clasificar (individualmente o dentro de un micro-lote)
+        if classifier is not None:
+            probabilities = classifier(features)
+        else:
+            probabilities = self.predict_proba(features[np.newaxis, :])[0]
+        
+        # Obtener clase con mayor probabilidad
+        class_name, confidence = self.decode_prediction(probabilities)
+        
+        # Extraer landmarks si se solicita
+        landmarks_dict = None
+        if include_landmarks:
+            landmarks_dict = self.packer.to_landmarks_dict(features)
+        
+        return class_name, confidence, True, landmarks_dict
+    
+    def has_hands(self, features: np.ndarray) -> bool:
+        """Indicar si el vector contiene alguna mano detectada."""
+        return any(np.any(features[block]) for block in self._hand_blocks)
+    
+    def release_session(self, session_id: Optional[str]) -> None:
+        """Liberar el tracker Holistic de una sesión terminada."""
+        self.trackers.release(session_id)
+        if self.presence is not None:
+            self.presence.release(session_id)
+    
+    def close(self) -> None:
+        """Cerrar todas las instancias de MediaPipe."""
+        self.trackers.close()
+        if self.presence is not None:
+            self.presence.close()
+    
     def _extract_landmarks_dict(self, results) -> dict:
         """
         Extraer landmarks de MediaPipe a diccionario serializable
@@ -177,41 +320,7 @@ class SignLanguagePredictor:
         Returns:
             Diccionario con landmarks normalizados (0-1)
         """
-        landmarks_dict = {
-            "pose": [],
-            "right_hand": [],
-            "left_hand": []
-        }
-        
-        # Extraer landmarks de pose (33 puntos)
-        if results.pose_landmarks:
-            for landmark in results.pose_landmarks.landmark:
-                landmarks_dict["pose"].append({
-                    "x": landmark.x,
-                    "y": landmark.y,
-                    "z": landmark.z,
-                    "visibility": landmark.visibility
-                })
-        
-        # Extraer landmarks de mano derecha (21 puntos)
-        if results.right_hand_landmarks:
-            for landmark in results.right_hand_landmarks.landmark:
-                landmarks_dict["right_hand"].append({
-                    "x": landmark.x,
-                    "y": landmark.y,
-                    "z": landmark.z
-                })
-        
-        # Extraer landmarks de mano izquierda (21 puntos)
-        if results.left_hand_landmarks:
-            for landmark in results.left_hand_landmarks.landmark:
-                landmarks_dict["left_hand"].append({
-                    "x": landmark.x,
-                    "y": landmark.y,
-                    "z": landmark.z
-                })
-        
-        return landmarks_dict
+        return self.packer.to_landmarks_dict(self.packer.pack(results))
     
     def draw_landmarks_realtime(self, frame: np.ndarray, results) -> np.ndarray:
         """
@@ -270,5 +379,11 @@ class SignLanguagePredictor:
             "num_classes": len(self.label_encoder.classes_),
             "classes": list(self.label_encoder.classes_),
             "num_features": self.num_features,
-            "prediction_fps": 1/self.prediction_interval
+            "prediction_fps": 1/self.prediction_interval,
+            "max_input_side": self.preprocessor.max_side,
+            "roi_enabled": self.preprocessor.roi_enabled,
+            "extractor_backend": self.extractor_backend,
+            "require_hands": self.require_hands,
+            "presence_gate": self.presence is not None,
+            "engine": self.engine
         }
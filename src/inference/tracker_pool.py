@@ -0,0 +1,209 @@
+"""
+SIGN-AI - Pool de trackers por sesión
+Instancias de MediaPipe (Holistic u otro extractor) asignadas a cada stream
+
+Cada sesión activa conserva su propia instancia, de modo que el estado de
+tracking no se mezcla entre clientes y MediaPipe no vuelve a la detección
+completa en cada frame. Mientras haya capacidad se crea una instancia nueva
+por sesión (fuera del lock del pool). Cuando se llena, la instancia
+menos usada recientemente que no esté procesando un frame se reinicia y se
+reasigna a la nueva sesión; si todas están en uso, la nueva sesión espera a
+que alguna termine.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Generic, Iterator, List, Optional, Set, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_SESSION = "__default__"
+
+
+class _PoolEntry(Generic[T]):
+    __slots__ = ("tracker", "lock", "session_id", "last_used", "needs_reset", "users")
+
+    def __init__(self, tracker: T, session_id: str):
+        self.tracker = tracker
+        self.lock = threading.Lock()
+        self.session_id: Optional[str] = session_id
+        self.last_used = time.time()
+        self.needs_reset = False
+        # Llamadas a acquire en curso (usando o esperando la instancia); no se reasigna mientras sea > 0
+        self.users = 0
+
+
+class TrackerPool(Generic[T]):
+    """
+    Pool acotado de trackers ligados a sesiones con expulsión LRU
+
+    Args:
+        factory: Función que crea un tracker nuevo
+        capacity: Número máximo de instancias vivas
+        idle_timeout_s: Tiempo sin uso tras el cual una instancia queda libre
+    """
+
+    def __init__(self, factory: Callable[[], T], capacity: int = 8, idle_timeout_s: float = 60.0):
+        self.factory = factory
+        self.capacity = max(1, capacity)
+        self.idle_timeout_s = idle_timeout_s
+
+        # Sesión -> instancia, en orden de último uso
+        self._bound: "OrderedDict[str, _PoolEntry[T]]" = OrderedDict()
+        self._free: List[_PoolEntry[T]] = []
+        # Sesiones cuya instancia se está construyendo (fuera del lock)
+        self._creating: Set[str] = set()
+        self._lock = threading.Lock()
+        # Avisa cuando una instancia deja de estar en uso (sesiones esperando con el pool lleno)
+        self._available = threading.Condition(self._lock)
+
+        self.created_total = 0
+        self.reassigned_total = 0
+        self.waits_total = 0
+
+    @contextmanager
+    def acquire(self, session_id: Optional[str] = None) -> Iterator[T]:
+        """Usar en exclusiva el tracker de una sesión."""
+        session_id = session_id or DEFAULT_SESSION
+        entry = self._entry_for(session_id)
+        try:
+            with entry.lock:
+                if entry.needs_reset:
+                    self._reset(entry.tracker)
+                    entry.needs_reset = False
+                try:
+                    yield entry.tracker
+                finally:
+                    entry.last_used = time.time()
+        finally:
+            with self._available:
+                entry.users -= 1
+                if entry.users == 0:
+                    self._available.notify_all()
+
+    def _entry_for(self, session_id: str) -> _PoolEntry[T]:
+        with self._available:
+            waited = False
+            while True:
+                entry = self._bound.get(session_id)
+                if entry is not None:
+                    self._bound.move_to_end(session_id)
+                    entry.users += 1
+                    return entry
+
+                if session_id not in self._creating:
+                    self._release_idle_locked(time.time())
+                    entry = self._take_free_locked()
+                    if entry is None and self._size_locked() < self.capacity:
+                        # Reservar el hueco y crear la instancia fuera del lock
+                        self._creating.add(session_id)
+                        break
+                    if entry is None:
+                        entry = self._take_lru_locked()
+                    if entry is not None:
+                        return self._bind_locked(entry, session_id)
+
+                # Pool lleno con todas las instancias en uso, o la instancia de
+                # esta sesión se está creando: esperar
+                if not waited:
+                    self.waits_total += 1
+                    waited = True
+                self._available.wait()
+
+        try:
+            tracker = self.factory()
+        except BaseException:
+            with self._available:
+                self._creating.discard(session_id)
+                self._available.notify_all()
+            raise
+
+        with self._available:
+            self._creating.discard(session_id)
+            self.created_total += 1
+            entry = self._bind_locked(_PoolEntry(tracker, session_id), session_id)
+            self._available.notify_all()
+            return entry
+
+    def _size_locked(self) -> int:
+        return len(self._bound) + len(self._free) + len(self._creating)
+
+    def _bind_locked(self, entry: _PoolEntry[T], session_id: str) -> _PoolEntry[T]:
+        entry.session_id = session_id
+        entry.users += 1
+        self._bound[session_id] = entry
+        return entry
+
+    def _take_free_locked(self) -> Optional[_PoolEntry[T]]:
+        for index in range(len(self._free) - 1, -1, -1):
+            if self._free[index].users == 0:
+                return self._free.pop(index)
+        return None
+
+    def _take_lru_locked(self) -> Optional[_PoolEntry[T]]:
+        # Solo con el pool lleno: la instancia vinculada menos usada recientemente que nadie esté usando
+        for session_id, entry in self._bound.items():
+            if entry.users == 0:
+                del self._bound[session_id]
+                entry.needs_reset = True
+                self.reassigned_total += 1
+                return entry
+        return None
+
+    def _release_idle_locked(self, now: float) -> None:
+        while self._bound:
+            oldest = next(iter(self._bound.values()))
+            if now - oldest.last_used <= self.idle_timeout_s or oldest.users:
+                break
+            self._bound.popitem(last=False)
+            self._unbind(oldest)
+
+    def release(self, session_id: Optional[str]) -> None:
+        """Liberar la instancia de una sesión terminada para reutilizarla."""
+        with self._lock:
+            entry = self._bound.pop(session_id or DEFAULT_SESSION, None)
+            if entry is not None:
+                self._unbind(entry)
+
+    def _unbind(self, entry: _PoolEntry[T]) -> None:
+        entry.session_id = None
+        entry.needs_reset = True
+        self._free.append(entry)
+
+    @staticmethod
+    def _reset(tracker) -> None:
+        reset = getattr(tracker, "reset", None)
+        if reset is not None:
+            reset()
+
+    def close(self) -> None:
+        with self._lock:
+            entries = list(self._bound.values()) + self._free
+            self._bound.clear()
+            self._free.clear()
+        for entry in entries:
+            with entry.lock:
+                close = getattr(entry.tracker, "close", None)
+                if close is not None:
+                    close()
+
+    def get_metrics(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "bound": len(self._bound),
+                "free": len(self._free),
+                "capacity": self.capacity,
+                "created_total": self.created_total,
+                "reassigned_total": self.reassigned_total,
+                "waits_total": self.waits_total,
+            }
+
+
+__all__ = ["TrackerPool", "DEFAULT_SESSION"]
@@ -29,7 +29,20 @@ class SignLanguageRepository:
                 missing_files.append(file_path)
         return missing_files
 
+    def export_numpy_weights(self) -> None:
+        """Exportar una sola vez los pesos .h5 a .npz cuando se usa el motor NumPy."""
+        model_config = self.settings.model
+        npz_path = model_config.active_model_path()
+        if model_config.engine != "numpy" or npz_path.exists() or not model_config.primary_model_path.exists():
+            return
+
+        from inference.model_engine import export_h5_to_npz  # type: ignore
+
+        logger.info("Exportando pesos %s a %s", model_config.primary_model_path, npz_path)
+        export_h5_to_npz(str(model_config.primary_model_path), str(npz_path))
+
     def load_predictor(self):
+        self.export_numpy_weights()
         missing_files = self.validate_required_files()
         if missing_files:
             raise FileNotFoundError(
@@ -38,13 +51,26 @@ class SignLanguageRepository:
             )
 
         SignLanguagePredictor = self._import_predictor()
-        logger.info("Cargando modelo de lenguaje de señas desde %s", self.settings.model.primary_model_path)
+        model_path = self.settings.model.active_model_path()
+        logger.info("Cargando modelo de lenguaje de señas desde %s (motor %s)", model_path, self.settings.model.engine)
 
         predictor = SignLanguagePredictor(
-            model_path=str(self.settings.model.primary_model_path),
+            model_path=str(model_path),
             scaler_path=str(self.settings.model.scaler_path),
             label_encoder_path=str(self.settings.model.label_encoder_path),
             feature_info_path=str(self.settings.model.feature_info_path),
+            engine=self.settings.model.engine,
+            tracker_pool_size=self.settings.extractor.pool_size,
+            tracker_idle_timeout_s=self.settings.extractor.tracker_idle_timeout_s,
+            max_input_side=self.settings.extractor.max_input_side,
+            roi_enabled=self.settings.extractor.roi_enabled,
+            roi_margin=self.settings.extractor.roi_margin,
+            require_hands=self.settings.gating.require_hands,
+            presence_enabled=self.settings.gating.presence_enabled,
+            presence_side=self.settings.gating.presence_side,
+            presence_detector=self.settings.gating.presence_detector,
+            presence_hold_s=self.settings.gating.presence_hold_ms / 1000.0,
+            extractor_backend=self.settings.extractor.backend,
         )
 
         return predictor
@@ -0,0 +1,216 @@
+"""Planificador de micro-lotes para inferencia compartida entre sesiones."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerOverloadedError(RuntimeError):
+    """La cola de inferencia alcanzó su profundidad máxima o no respondió a tiempo."""
+
+
+class MicroBatchScheduler:
+    """
+    Agrupa vectores de características de todas las sesiones en un solo lote.
+
+    Cada llamada a ``submit`` devuelve un ``Future``. Un hilo de fondo espera
+    hasta ``max_wait_ms`` (o hasta reunir ``max_batch_size`` vectores), ejecuta
+    una sola transformación del scaler y una sola llamada al modelo, y resuelve
+    el ``Future`` de cada solicitante con su fila de probabilidades.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[np.ndarray], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue_depth: int = 256,
+    ):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self.max_queue_depth = max(1, max_queue_depth)
+
+        self._queue: Deque[Tuple[np.ndarray, Future, float]] = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        self._metrics_lock = threading.Lock()
+        self._reset_metrics()
+
+    def _reset_metrics(self) -> None:
+        self._batches_total = 0
+        self._items_total = 0
+        self._rejected_total = 0
+        self._timeouts_total = 0
+        self._last_batch_size = 0
+        self._max_batch_size_seen = 0
+        self._wait_ms_total = 0.0
+        self._wait_ms_max = 0.0
+        self._model_ms_total = 0.0
+        self._max_queue_depth_seen = 0
+
+    def start(self) -> None:
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="micro-batch-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(
+            "Planificador de micro-lotes iniciado (lote máx: %d, espera máx: %.1fms, cola máx: %d)",
+            self.max_batch_size, self.max_wait_s * 1000, self.max_queue_depth,
+        )
+
+    def stop(self) -> None:
+        with self._condition:
+            self._running = False
+            pending = list(self._queue)
+            self._queue.clear()
+            self._condition.notify_all()
+        for _, future, _ in pending:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError("Planificador de micro-lotes detenido"))
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def submit(self, features: np.ndarray) -> Future:
+        """
+        Encolar un vector de características y devolver el Future de sus probabilidades
+
+        Se encola una copia: el llamador puede reutilizar su buffer (p. ej. el
+        vector de la sesión) aunque la solicitud siga en cola tras un timeout.
+        """
+        features = np.array(features, copy=True)
+        future: Future = Future()
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("El planificador de micro-lotes no está iniciado")
+            if len(self._queue) >= self.max_queue_depth:
+                with self._metrics_lock:
+                    self._rejected_total += 1
+                raise SchedulerOverloadedError(
+                    f"Cola de inferencia llena ({self.max_queue_depth} solicitudes pendientes)"
+                )
+            self._queue.append((features, future, time.perf_counter()))
+            depth = len(self._queue)
+            self._condition.notify()
+        with self._metrics_lock:
+            self._max_queue_depth_seen = max(self._max_queue_depth_seen, depth)
+        return future
+
+    def predict(self, features: np.ndarray, timeout: Optional[float] = None) -> np.ndarray:
+        """
+        Versión bloqueante de ``submit``: devuelve las probabilidades del vector
+
+        Raises:
+            SchedulerOverloadedError: Si la cola está llena o el resultado no llega
+                en ``timeout`` segundos (la solicitud se cancela si aún no entró a un lote)
+        """
+        future = self.submit(features)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._metrics_lock:
+                self._timeouts_total += 1
+            raise SchedulerOverloadedError(
+                f"Inferencia sin respuesta en {timeout * 1000:.0f} ms"
+            ) from None
+
+    def _next_batch(self):
+        with self._condition:
+            while self._running and not self._queue:
+                self._condition.wait()
+            if not self._running:
+                return None
+
+            # Esperar a que el lote se llene o a que venza el plazo del más antiguo
+            deadline = self._queue[0][2] + self.max_wait_s
+            while self._running and len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            size = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(size)]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+
+            started = time.perf_counter()
+            pending = [(features, future) for features, future, _ in batch if future.set_running_or_notify_cancel()]
+            if pending:
+                try:
+                    probabilities = self.predict_batch(np.stack([features for features, _ in pending]))
+                except Exception as exc:  # pylint: disable=broad-except
+                    logger.exception("Error ejecutando micro-lote de %d solicitudes", len(pending))
+                    for _, future in pending:
+                        future.set_exception(exc)
+                    continue
+                for row, (_, future) in zip(probabilities, pending):
+                    future.set_result(row)
+            model_ms = (time.perf_counter() - started) * 1000
+
+            waits_ms = [(started - enqueued) * 1000 for _, _, enqueued in batch]
+            with self._metrics_lock:
+                self._batches_total += 1
+                self._items_total += len(batch)
+                self._last_batch_size = len(batch)
+                self._max_batch_size_seen = max(self._max_batch_size_seen, len(batch))
+                self._wait_ms_total += sum(waits_ms)
+                self._wait_ms_max = max(self._wait_ms_max, max(waits_ms))
+                self._model_ms_total += model_ms
+
+    def queue_depth(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+    def get_metrics(self) -> Dict[str, object]:
+        depth = self.queue_depth()
+        with self._metrics_lock:
+            batches = self._batches_total or 1
+            items = self._items_total or 1
+            return {
+                "running": self._running,
+                "batches_total": self._batches_total,
+                "items_total": self._items_total,
+                "rejected_total": self._rejected_total,
+                "timeouts_total": self._timeouts_total,
+                "batch_size": {
+                    "last": self._last_batch_size,
+                    "avg": round(self._items_total / batches, 2),
+                    "max": self._max_batch_size_seen,
+                    "limit": self.max_batch_size,
+                },
+                "wait_ms": {
+                    "avg": round(self._wait_ms_total / items, 3),
+                    "max": round(self._wait_ms_max, 3),
+                    "limit": round(self.max_wait_s * 1000, 3),
+                },
+                "model_ms_avg": round(self._model_ms_total / batches, 3),
+                "queue_depth": {
+                    "current": depth,
+                    "max": self._max_queue_depth_seen,
+                    "limit": self.max_queue_depth,
+                },
+            }
+
+
+__all__ = ["MicroBatchScheduler", "SchedulerOverloadedError"]
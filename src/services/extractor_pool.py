@@ -0,0 +1,380 @@
+"""Pool de procesos para extraer landmarks con MediaPipe en varios núcleos."""
+
+from __future__ import annotations
+
+import atexit
+import functools
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import zlib
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2  # type: ignore
+import numpy as np
+
+from services.batch_scheduler import SchedulerOverloadedError
+
+logger = logging.getLogger(__name__)
+
+# Mensajes de control hacia los workers
+_EXTRACT = "extract"
+_RELEASE = "release"
+
+
+@dataclass
+class _Worker:
+    process: mp.Process
+    requests: "mp.Queue"
+    frames: shared_memory.SharedMemory
+    features: shared_memory.SharedMemory
+    free_slots: "queue.Queue[int]"
+    # Se incrementa al reiniciar el proceso: los resultados de un proceso anterior se ignoran
+    generation: int = 0
+
+
+def _worker_main(index: int, generation: int, feature_columns: Sequence[str], frames_name: str,
+                 features_name: str, num_slots: int, slot_bytes: int, requests, results,
+                 tracker_pool_size: int, tracker_idle_timeout_s: float, backend: str) -> None:
+    """
+    Bucle de un worker: cada proceso tiene su propio pool de extractores (Holistic o Pose + Hands).
+
+    Los frames llegan por memoria compartida; por la cola solo viajan el slot,
+    la forma del frame y la sesión.
+    """
+    # Cada worker carga MediaPipe por separado
+    from inference.landmark_extractors import create_extractor
+    from inference.landmark_packing import LandmarkPacker
+    from inference.tracker_pool import TrackerPool
+
+    packer = LandmarkPacker(feature_columns)
+    trackers = TrackerPool(
+        lambda: create_extractor(backend),
+        capacity=tracker_pool_size,
+        idle_timeout_s=tracker_idle_timeout_s,
+    )
+    frames_shm = shared_memory.SharedMemory(name=frames_name)
+    features_shm = shared_memory.SharedMemory(name=features_name)
+    features_out = np.ndarray((num_slots, packer.num_features), dtype=np.float32, buffer=features_shm.buf)
+    results.put((index, generation, None, None, None))  # Worker listo
+
+    try:
+        while True:
+            message = requests.get()
+            if message is None:
+                break
+            if message[0] == _RELEASE:
+                trackers.release(message[1])
+                continue
+
+            _, request_id, slot, shape, session_id, rgb = message
+            try:
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=frames_shm.buf, offset=slot * slot_bytes)
+                rgb_frame = frame if rgb else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                with trackers.acquire(session_id) as extractor:
+                    detections = extractor.process(rgb_frame)
+                packer.pack(detections, out=features_out[slot])
+                results.put((index, generation, request_id, slot, None))
+            except Exception as exc:  # pylint: disable=broad-except
+                results.put((index, generation, request_id, slot, f"{type(exc).__name__}: {exc}"))
+    finally:
+        trackers.close()
+        # Soltar las vistas antes de cerrar la memoria compartida
+        frame = features_out = None
+        frames_shm.close()
+        features_shm.close()
+
+
+class ExtractorWorkerPool:
+    """
+    Extrae vectores de características en procesos separados.
+
+    Cada worker es dueño de sus extractores de MediaPipe (``backend``). Las sesiones
+    se asignan siempre al mismo worker (hash del ``session_id``) para conservar
+    el tracking. Cada worker tiene ``queue_depth`` slots de memoria compartida
+    para frames y vectores; sin slots libres se rechaza la solicitud.
+
+    Cada ``health_check_interval_s`` se comprueba que los procesos sigan vivos:
+    un worker muerto se reinicia con sus slots libres y sus solicitudes
+    pendientes fallan en lugar de esperar hasta el timeout.
+    """
+
+    def __init__(self, feature_columns: Sequence[str], workers: int = 2, queue_depth: int = 4,
+                 max_frame_bytes: int = 1280 * 720 * 3, tracker_pool_size: int = 8,
+                 tracker_idle_timeout_s: float = 60.0, start_method: str = "spawn",
+                 timeout_s: float = 5.0, startup_timeout_s: float = 120.0, backend: str = "holistic",
+                 health_check_interval_s: float = 1.0):
+        self.feature_columns = list(feature_columns)
+        self.num_features = len(self.feature_columns)
+        self.num_workers = max(1, workers)
+        self.queue_depth = max(1, queue_depth)
+        self.max_frame_bytes = max_frame_bytes
+        self.tracker_pool_size = tracker_pool_size
+        self.tracker_idle_timeout_s = tracker_idle_timeout_s
+        self.backend = backend
+        self.timeout_s = timeout_s
+        self.startup_timeout_s = startup_timeout_s
+        self.health_check_interval_s = health_check_interval_s
+        self._context = mp.get_context(start_method)
+
+        self._workers: List[_Worker] = []
+        self._results: Optional["mp.Queue"] = None
+        self._pending: Dict[Tuple[int, int], Future] = {}
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._collector: Optional[threading.Thread] = None
+        self._running = False
+
+        self._metrics_lock = threading.Lock()
+        self._frames_total = 0
+        self._rejected_total = 0
+        self._errors_total = 0
+        self._timeouts_total = 0
+        self._resized_total = 0
+        self._restarts_total = 0
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._results = self._context.Queue()
+        for index in range(self.num_workers):
+            frames = shared_memory.SharedMemory(create=True, size=self.queue_depth * self.max_frame_bytes)
+            features = shared_memory.SharedMemory(create=True, size=self.queue_depth * self.num_features * 4)
+            self._workers.append(self._spawn_worker(index, frames, features, generation=0))
+
+        # Esperar a que todos los workers carguen MediaPipe antes de aceptar frames
+        try:
+            for _ in range(self.num_workers):
+                self._results.get(timeout=self.startup_timeout_s)
+        except queue.Empty:
+            self.stop(force=True)
+            raise RuntimeError("Los workers de extracción no iniciaron a tiempo") from None
+
+        self._running = True
+        atexit.register(self.stop)  # Liberar la memoria compartida al salir
+        self._collector = threading.Thread(target=self._collect, name="landmark-extractor-results", daemon=True)
+        self._collector.start()
+        logger.info(
+            "Pool de extracción iniciado (%d workers, %d slots por worker, %.1f MB por frame)",
+            self.num_workers, self.queue_depth, self.max_frame_bytes / 1e6,
+        )
+
+    def stop(self, force: bool = False) -> None:
+        if not self._running and not force:
+            return
+        self._running = False
+        for worker in self._workers:
+            worker.requests.put(None)
+        for worker in self._workers:
+            worker.process.join(timeout=2.0)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        if self._collector:
+            self._results.put(None)
+            self._collector.join(timeout=1.0)
+            self._collector = None
+
+        with self._pending_lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Pool de extracción detenido"))
+
+        for worker in self._workers:
+            for shm in (worker.frames, worker.features):
+                shm.close()
+                shm.unlink()
+        self._workers.clear()
+
+    def _spawn_worker(self, index: int, frames: shared_memory.SharedMemory,
+                      features: shared_memory.SharedMemory, generation: int) -> _Worker:
+        requests = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, generation, self.feature_columns, frames.name, features.name, self.queue_depth,
+                  self.max_frame_bytes, requests, self._results,
+                  self.tracker_pool_size, self.tracker_idle_timeout_s, self.backend),
+            name=f"landmark-extractor-{index}",
+            daemon=True,
+        )
+        process.start()
+        free_slots: "queue.Queue[int]" = queue.Queue()
+        for slot in range(self.queue_depth):
+            free_slots.put(slot)
+        return _Worker(process, requests, frames, features, free_slots, generation)
+
+    def _restart_dead_workers(self) -> None:
+        for index, worker in enumerate(self._workers):
+            if not self._running or worker.process.is_alive():
+                continue
+            logger.warning("Worker de extracción %d terminó (código %s): reiniciando",
+                           index, worker.process.exitcode)
+            # La memoria compartida es del proceso principal: el nuevo worker reutiliza la misma.
+            # Los slots quedan todos libres y los resultados del proceso anterior se ignoran
+            self._workers[index] = self._spawn_worker(index, worker.frames, worker.features,
+                                                      generation=worker.generation + 1)
+            with self._pending_lock:
+                lost = [key for key in self._pending if key[0] == index]
+                futures = [self._pending.pop(key) for key in lost]
+            for future in futures:
+                if not future.done():
+                    future.set_exception(RuntimeError(f"Worker de extracción {index} terminó inesperadamente"))
+            with self._metrics_lock:
+                self._restarts_total += 1
+
+    def _worker_index(self, session_id: Optional[str]) -> int:
+        key = (session_id or "").encode("utf-8")
+        return zlib.crc32(key) % self.num_workers
+
+    def _fit_frame(self, frame: np.ndarray) -> np.ndarray:
+        """Reducir frames que no caben en un slot (los landmarks son coordenadas normalizadas)."""
+        if frame.nbytes <= self.max_frame_bytes:
+            return frame
+        scale = (self.max_frame_bytes / frame.nbytes) ** 0.5
+        height = max(1, int(frame.shape[0] * scale))
+        width = max(1, int(frame.shape[1] * scale))
+        with self._metrics_lock:
+            self._resized_total += 1
+        return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+    def submit(self, frame: np.ndarray, session_id: Optional[str] = None,
+               rgb: bool = False) -> Tuple[Future, int, int]:
+        """
+        Copiar el frame (BGR, o RGB si rgb=True; uint8) a un slot libre del worker de la sesión
+
+        Returns:
+            Tupla (future con el slot de resultado, índice del worker, id de solicitud)
+        """
+        if not self._running:
+            raise RuntimeError("El pool de extracción no está iniciado")
+        index = self._worker_index(session_id)
+        worker = self._workers[index]
+        try:
+            slot = worker.free_slots.get_nowait()
+        except queue.Empty:
+            with self._metrics_lock:
+                self._rejected_total += 1
+            raise SchedulerOverloadedError(
+                f"Worker de extracción {index} ocupado ({self.queue_depth} frames pendientes)"
+            ) from None
+
+        frame = self._fit_frame(np.ascontiguousarray(frame, dtype=np.uint8))
+        target = np.ndarray(frame.shape, dtype=np.uint8, buffer=worker.frames.buf,
+                            offset=slot * self.max_frame_bytes)
+        np.copyto(target, frame)
+
+        request_id = next(self._request_ids)
+        future: Future = Future()
+        with self._pending_lock:
+            self._pending[(index, request_id)] = future
+        worker.requests.put((_EXTRACT, request_id, slot, frame.shape, session_id, rgb))
+        return future, index, request_id
+
+    def extract(self, frame: np.ndarray, out: Optional[np.ndarray] = None,
+                session_id: Optional[str] = None, rgb: bool = False) -> np.ndarray:
+        """
+        Extraer el vector de características de un frame en un worker
+
+        Args:
+            frame: Frame BGR (o RGB si rgb=True)
+            out: Vector float32 donde copiar el resultado (opcional)
+            session_id: Sesión (define el worker y su extractor)
+            rgb: Si True, el worker usa el frame sin convertir
+        """
+        future, index, request_id = self.submit(frame, session_id, rgb=rgb)
+        worker = self._workers[index]
+        try:
+            slot = future.result(timeout=self.timeout_s)
+        except FutureTimeoutError:
+            with self._pending_lock:
+                abandoned = self._pending.pop((index, request_id), None) is not None
+            if not abandoned:
+                # El colector ya tomó el resultado pero aún no completa el future:
+                # el slot vuelve al worker cuando lo haga
+                future.add_done_callback(functools.partial(self._return_slot, worker))
+            with self._metrics_lock:
+                self._timeouts_total += 1
+            raise SchedulerOverloadedError(
+                f"Extracción sin respuesta en {self.timeout_s:.1f} s"
+            ) from None
+        # El slot no se libera hasta copiar el vector fuera de la memoria compartida
+        try:
+            features = np.ndarray((self.num_features,), dtype=np.float32, buffer=worker.features.buf,
+                                  offset=slot * self.num_features * 4)
+            if out is None:
+                return features.copy()
+            np.copyto(out, features)
+            return out
+        finally:
+            worker.free_slots.put(slot)
+
+    @staticmethod
+    def _return_slot(worker: _Worker, future: Future) -> None:
+        # Solicitud abandonada cuyo resultado llegó tarde (con error el colector ya liberó el slot)
+        if not future.cancelled() and future.exception() is None:
+            worker.free_slots.put(future.result())
+
+    def _collect(self) -> None:
+        while True:
+            try:
+                message = self._results.get(timeout=self.health_check_interval_s)
+            except queue.Empty:
+                self._restart_dead_workers()
+                continue
+            if message is None:
+                break
+            index, generation, request_id, slot, error = message
+            worker = self._workers[index]
+            if generation != worker.generation or request_id is None:
+                # Resultado de un proceso ya reiniciado, o aviso de worker listo
+                continue
+            with self._pending_lock:
+                future = self._pending.pop((index, request_id), None)
+            with self._metrics_lock:
+                self._frames_total += 1
+                if error:
+                    self._errors_total += 1
+            if future is None:
+                # Solicitud abandonada (timeout): recuperar el slot
+                worker.free_slots.put(slot)
+            elif error:
+                worker.free_slots.put(slot)
+                future.set_exception(RuntimeError(f"Error extrayendo landmarks: {error}"))
+            else:
+                future.set_result(slot)
+            self._restart_dead_workers()
+
+    def release_session(self, session_id: Optional[str]) -> None:
+        """Liberar el tracker de una sesión en su worker."""
+        if self._running:
+            self._workers[self._worker_index(session_id)].requests.put((_RELEASE, session_id))
+
+    def get_metrics(self) -> Dict[str, object]:
+        with self._metrics_lock:
+            metrics = {
+                "running": self._running,
+                "workers": self.num_workers,
+                "backend": self.backend,
+                "alive": sum(worker.process.is_alive() for worker in self._workers),
+                "frames_total": self._frames_total,
+                "rejected_total": self._rejected_total,
+                "errors_total": self._errors_total,
+                "timeouts_total": self._timeouts_total,
+                "resized_total": self._resized_total,
+                "restarts_total": self._restarts_total,
+            }
+        metrics["slots"] = {
+            "busy": sum(self.queue_depth - worker.free_slots.qsize() for worker in self._workers),
+            "limit": self.queue_depth * len(self._workers),
+        }
+        return metrics
+
+
+__all__ = ["ExtractorWorkerPool"]
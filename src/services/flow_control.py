@@ -0,0 +1,110 @@
+"""Control de flujo por créditos entre la cámara del navegador y el servidor."""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict
+
+
+@dataclass
+class _SessionFlow:
+    interval_ms: float
+    processing_ms: float = 0.0
+
+
+class FrameCreditController:
+    """
+    Concede créditos de frames a cada sesión según la carga medida.
+
+    El cliente solo captura y codifica un frame cuando tiene crédito y ha pasado
+    ``interval_ms`` desde el anterior. Cada frame procesado (o descartado por
+    llegar otro más reciente) devuelve su crédito junto con un nuevo intervalo:
+
+        intervalo = tiempo_de_proceso_medio * max(1, sesiones_ocupadas / capacidad)
+
+    acotado a [min_interval_ms, max_interval_ms]. Si hubo descartes, el
+    intervalo crece al menos un 50 %; con el servidor libre vuelve a bajar
+    (como máximo un 20 % por frame) hacia el tiempo de proceso.
+
+    Args:
+        window: Créditos máximos en manos de un cliente (frames en vuelo)
+        min_interval_ms: Intervalo mínimo entre frames de una sesión
+        max_interval_ms: Intervalo máximo (servidor saturado)
+        capacity: Sesiones que el servidor procesa en paralelo sin degradarse
+    """
+
+    _SMOOTHING = 0.3
+
+    def __init__(self, window: int = 2, min_interval_ms: float = 66.0, max_interval_ms: float = 1000.0,
+                 capacity: int = 1):
+        self.window = max(1, window)
+        self.min_interval_ms = min_interval_ms
+        self.max_interval_ms = max(min_interval_ms, max_interval_ms)
+        self.capacity = max(1, capacity)
+
+        self._sessions: Dict[str, _SessionFlow] = {}
+        self._lock = threading.Lock()
+        self.granted_total = 0
+        self.slowdowns_total = 0
+
+    def initial_grant(self, session_id: str) -> Dict[str, object]:
+        """Créditos iniciales de una sesión recién conectada."""
+        with self._lock:
+            flow = self._sessions.setdefault(session_id, _SessionFlow(interval_ms=self.min_interval_ms))
+            self.granted_total += self.window
+            return self._grant(flow, self.window)
+
+    def on_processed(self, session_id: str, processing_ms: float, skipped: int, busy: int) -> Dict[str, object]:
+        """
+        Devolver créditos tras procesar un frame
+
+        Args:
+            processing_ms: Tiempo que tomó el frame (decodificación + predicción)
+            skipped: Frames de la sesión descartados antes de este
+            busy: Sesiones procesando frames en este momento (todas)
+        """
+        with self._lock:
+            flow = self._sessions.setdefault(session_id, _SessionFlow(interval_ms=self.min_interval_ms))
+            if flow.processing_ms:
+                flow.processing_ms += self._SMOOTHING * (processing_ms - flow.processing_ms)
+            else:
+                flow.processing_ms = processing_ms
+
+            target = flow.processing_ms * max(1.0, busy / self.capacity)
+            if skipped:
+                target = max(target, flow.interval_ms * 1.5)
+            elif target < flow.interval_ms:
+                # Acelerar de forma gradual para no oscilar tras un pico
+                target = max(target, flow.interval_ms * 0.8)
+            interval = min(self.max_interval_ms, max(self.min_interval_ms, target))
+            if interval > flow.interval_ms:
+                self.slowdowns_total += 1
+            flow.interval_ms = interval
+
+            credits = min(self.window, 1 + skipped)
+            self.granted_total += credits
+            return self._grant(flow, credits)
+
+    def _grant(self, flow: _SessionFlow, credits: int) -> Dict[str, object]:
+        return {"credits": credits, "window": self.window, "interval_ms": round(flow.interval_ms)}
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def get_metrics(self) -> Dict[str, object]:
+        with self._lock:
+            intervals = [flow.interval_ms for flow in self._sessions.values()]
+            return {
+                "enabled": True,
+                "window": self.window,
+                "capacity": self.capacity,
+                "sessions": len(intervals),
+                "avg_interval_ms": round(sum(intervals) / len(intervals), 1) if intervals else 0.0,
+                "granted_total": self.granted_total,
+                "slowdowns_total": self.slowdowns_total,
+            }
+
+
+__all__ = ["FrameCreditController"]
@@ -0,0 +1,117 @@
+"""Buzón de frames por sesión: siempre se procesa el más reciente."""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass
+class _FrameSlot:
+    pending: Any = None
+    has_pending: bool = False
+    draining: bool = False
+    # Frames descartados desde el último aviso al cliente
+    skipped: int = 0
+
+
+class FrameMailbox:
+    """
+    Ranura acotada (un frame) por sesión con política "el último gana".
+
+    El manejador que entrega un frame a una sesión sin procesamiento en curso
+    se convierte en el procesador de esa sesión y vacía la ranura en bucle; los
+    demás solo dejan su frame y vuelven. Si llega un frame mientras otro espera,
+    el anterior se descarta. Así nunca hay más de un frame en espera por sesión
+    y la latencia queda acotada a ~2 tiempos de procesamiento aunque el
+    cliente envíe más rápido de lo que el servidor procesa.
+
+    Las ranuras se indexan por socket (``request.sid``), no por el
+    ``session_id`` que envía el cliente, y se liberan con ``discard`` al
+    desconectarse: rotar ``session_id`` no crea ranuras nuevas.
+    """
+
+    def __init__(self):
+        self._slots: Dict[str, _FrameSlot] = {}
+        self._lock = threading.Lock()
+        self._draining = 0
+
+        self.received_total = 0
+        self.processed_total = 0
+        self.dropped_total = 0
+
+    def offer(self, session_id: str, item: Any) -> bool:
+        """
+        Dejar un frame en la ranura de la sesión
+
+        Returns:
+            True si quien llama debe procesar la sesión (con ``take`` en bucle);
+            False si ya hay un procesador activo que lo recogerá
+        """
+        with self._lock:
+            slot = self._slots.get(session_id)
+            if slot is None:
+                slot = self._slots[session_id] = _FrameSlot()
+            self.received_total += 1
+            if slot.has_pending:
+                slot.skipped += 1
+                self.dropped_total += 1
+            slot.pending = item
+            slot.has_pending = True
+            if slot.draining:
+                return False
+            slot.draining = True
+            self._draining += 1
+            return True
+
+    def take(self, session_id: str) -> Optional[Tuple[Any, int]]:
+        """
+        Retirar el frame más reciente de la sesión
+
+        Returns:
+            Tupla (frame, descartados desde el último take con aviso) o None si la
+            ranura está vacía; en ese caso el procesador debe terminar
+        """
+        with self._lock:
+            slot = self._slots.get(session_id)
+            if slot is None:
+                return None
+            if not slot.has_pending:
+                if slot.draining:
+                    slot.draining = False
+                    self._draining -= 1
+                return None
+            item, skipped = slot.pending, slot.skipped
+            slot.pending, slot.has_pending, slot.skipped = None, False, 0
+            self.processed_total += 1
+            return item, skipped
+
+    def discard(self, session_id: str) -> None:
+        """Olvidar la ranura de una sesión terminada (el frame pendiente se descarta)."""
+        with self._lock:
+            slot = self._slots.pop(session_id, None)
+            if slot is None:
+                return
+            if slot.has_pending:
+                self.dropped_total += 1
+            if slot.draining:
+                self._draining -= 1
+
+    def active(self) -> int:
+        """Sesiones con un procesador en curso."""
+        with self._lock:
+            return self._draining
+
+    def get_metrics(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "sessions": len(self._slots),
+                "pending": sum(1 for slot in self._slots.values() if slot.has_pending),
+                "received_total": self.received_total,
+                "processed_total": self.processed_total,
+                "dropped_total": self.dropped_total,
+            }
+
+
+__all__ = ["FrameMailbox"]
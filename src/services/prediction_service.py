@@ -3,21 +3,39 @@
 from __future__ import annotations
 
 import base64
-import io
+import functools
 import logging
+import math
+import os
+import threading
 import time
 from typing import Dict, Optional
 
-import cv2  # type: ignore
 import numpy as np
-from PIL import Image
 
 from config.settings import AppSettings
+from inference.frame_ingest import FrameIngest
+from inference.motion_gate import MotionGate
 from repositories.sign_language_repository import SignLanguageRepository
+from services.batch_scheduler import MicroBatchScheduler
+from services.extractor_pool import ExtractorWorkerPool
+from services.flow_control import FrameCreditController
+from services.frame_mailbox import FrameMailbox
+from services.prediction_stabilizer import PredictionStabilizer, StabilizerState
+from services.session_registry import SessionRegistry
 from services.tts_service import TTSService
 
 logger = logging.getLogger(__name__)
 
+# Respuesta de streaming sin cambio de palabra confirmada: solo landmarks y confianza suavizada
+UNCHANGED_STATUS = "unchanged"
+
+# Campos de audio que no se repiten al reutilizar una respuesta
+_AUDIO_FIELDS = ("audio", "audio_id", "audio_url")
+
+# Códecs de captura que el servidor decodifica, por nombre de configuración
+_CAPTURE_CODECS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
 # Importar logging service opcionalmente
 try:
     from services.logging_service import TranslationLogger
@@ -36,11 +54,36 @@ class PredictionService:
         self.tts_service = tts_service
 
         self.predictor = None
+        self.batch_scheduler: Optional[MicroBatchScheduler] = None
+        self.extractor_pool: Optional[ExtractorWorkerPool] = None
+        self.frame_ingest = FrameIngest(max_side=settings.extractor.max_decode_side)
+        self.stabilizer: Optional[PredictionStabilizer] = None
+        self.motion_gate: Optional[MotionGate] = None
+        if settings.motion.enabled:
+            self.motion_gate = MotionGate(
+                thumbnail_side=settings.motion.thumbnail_side,
+                threshold=settings.motion.threshold,
+                max_reuse_s=settings.motion.max_reuse_ms / 1000.0,
+            )
         self.system_status: str = "initializing"
-        self.current_prediction: Dict[str, float | str] = {
-            "word": "Iniciando...",
-            "confidence": 0.0,
-        }
+        self._counters_lock = threading.Lock()
+        self.no_sign_total = 0
+        self.sessions = SessionRegistry(
+            idle_timeout_s=settings.sessions.idle_timeout_s,
+            max_sessions=settings.sessions.max_sessions,
+            prediction_interval=settings.sessions.prediction_interval_ms / 1000.0,
+        )
+        self.sessions.add_eviction_listener(self._release_session_resources)
+        # Frames de Socket.IO en espera: uno por socket (sid), el más reciente gana
+        self.frame_mailbox = FrameMailbox()
+        self.flow_control: Optional[FrameCreditController] = None
+        if settings.flow.enabled:
+            self.flow_control = FrameCreditController(
+                window=settings.flow.window,
+                min_interval_ms=settings.flow.min_interval_ms,
+                max_interval_ms=settings.flow.max_interval_ms,
+                capacity=settings.flow.capacity or settings.extractor.workers or os.cpu_count() or 1,
+            )
         
         # Inicializar servicio de logging si está disponible
         self.logger_service: Optional[TranslationLogger] = None
@@ -56,6 +99,10 @@ class PredictionService:
         try:
             logger.info("Inicializando predictor de lenguaje de señas")
             self.predictor = self.repository.load_predictor()
+            self._start_stabilizer()
+            self.sessions.start_sweeper(self.settings.sessions.sweep_interval_s)
+            self._start_batch_scheduler()
+            self._start_extractor_pool()
             self.tts_service.initialize()
             self.settings.upload_folder.mkdir(parents=True, exist_ok=True)
             self.system_status = "ready"
@@ -70,6 +117,57 @@ class PredictionService:
             logger.exception("Error inicializando predictor: %s", exc)
             return False
 
+    def _release_session_resources(self, state) -> None:
+        if self.predictor is not None:
+            self.predictor.release_session(state.session_id)
+        if self.extractor_pool is not None:
+            self.extractor_pool.release_session(state.session_id)
+
+    def _start_stabilizer(self) -> None:
+        stabilizer = self.settings.stabilizer
+        if not stabilizer.enabled:
+            return
+        self.stabilizer = PredictionStabilizer(
+            self.predictor.label_encoder.classes_,
+            alpha=stabilizer.alpha,
+            min_confidence=stabilizer.min_confidence,
+            margin=stabilizer.margin,
+            min_frames=stabilizer.min_frames,
+        )
+
+    def _start_batch_scheduler(self) -> None:
+        batching = self.settings.batching
+        if not batching.enabled:
+            return
+        if self.batch_scheduler:
+            self.batch_scheduler.stop()
+        self.batch_scheduler = MicroBatchScheduler(
+            self.predictor.predict_proba,
+            max_batch_size=batching.max_batch_size,
+            max_wait_ms=batching.max_wait_ms,
+            max_queue_depth=batching.max_queue_depth,
+        )
+        self.batch_scheduler.start()
+
+    def _start_extractor_pool(self) -> None:
+        extractor = self.settings.extractor
+        if extractor.workers <= 0:
+            return
+        if self.extractor_pool:
+            self.extractor_pool.stop()
+        self.extractor_pool = ExtractorWorkerPool(
+            self.predictor.packer.feature_columns,
+            workers=extractor.workers,
+            queue_depth=extractor.queue_depth,
+            max_frame_bytes=extractor.max_frame_bytes,
+            tracker_pool_size=extractor.pool_size,
+            tracker_idle_timeout_s=extractor.tracker_idle_timeout_s,
+            start_method=extractor.start_method,
+            timeout_s=extractor.timeout_s,
+            backend=extractor.backend,
+        )
+        self.extractor_pool.start()
+
     def is_ready(self) -> bool:
         return self.system_status == "ready" and self.predictor is not None
 
@@ -81,21 +179,209 @@ class PredictionService:
             "status": self.system_status,
             "message": self._get_status_message(),
             "model_info": model_info,
+            "capture": self.get_capture_config(),
+            "timestamp": time.time(),
+        }
+
+    def get_capture_config(self) -> Dict[str, object]:
+        """
+        Formato de frame preferido para la extracción activa
+
+        El lado mayor no supera lo que recibe MediaPipe (``max_input_side``) ni, con
+        workers de extracción, lo que cabe en una ranura de memoria compartida
+        (suponiendo 4:3); enviar más resolución solo cuesta ancho de banda y
+        decodificación.
+        """
+        capture = self.settings.capture
+        extractor = self.settings.extractor
+        max_side = capture.max_side
+        if extractor.max_input_side > 0:
+            max_side = min(max_side, extractor.max_input_side)
+        if extractor.workers > 0:
+            max_side = min(max_side, int(math.sqrt(extractor.max_frame_bytes / (3 * 0.75))))
+        preferred = _CAPTURE_CODECS.get(capture.codec, "image/jpeg")
+        codecs = [preferred] + [codec for codec in _CAPTURE_CODECS.values() if codec != preferred]
+        return {
+            "max_side": max_side,
+            "codecs": codecs,
+            "quality": capture.quality,
+            "binary": True,
+        }
+
+    def get_metrics(self) -> Dict[str, object]:
+        return {
+            "batching": self.batch_scheduler.get_metrics() if self.batch_scheduler else {"enabled": False},
+            "sessions": self.sessions.get_metrics(),
+            "ingest": self.frame_mailbox.get_metrics(),
+            "flow_control": self.flow_control.get_metrics() if self.flow_control else {"enabled": False},
+            "trackers": self.predictor.trackers.get_metrics() if self.predictor else {},
+            "preprocess": self.predictor.preprocessor.get_metrics() if self.predictor else {},
+            "extractor": self.extractor_pool.get_metrics() if self.extractor_pool else {"enabled": False},
+            "gating": self._get_gating_metrics(),
+            "motion_gate": self.motion_gate.get_metrics() if self.motion_gate else {"enabled": False},
+            "stabilizer": self.stabilizer.get_metrics() if self.stabilizer else {"enabled": False},
+            "tts": self.tts_service.get_metrics(),
             "timestamp": time.time(),
         }
 
-    def predict_from_frame(self, cv_image, include_landmarks: bool = False, session_id: Optional[str] = None):
+    def _get_gating_metrics(self) -> Dict[str, object]:
+        presence = self.predictor.presence if self.predictor else None
+        with self._counters_lock:
+            return {
+                "require_hands": self.settings.gating.require_hands,
+                "no_sign_total": self.no_sign_total,
+                "presence": presence.get_metrics() if presence else {"enabled": False},
+            }
+
+    def get_current_prediction(self, session_id: Optional[str]) -> Dict[str, float | str]:
+        state = self.sessions.peek(session_id) if session_id else None
+        if state is None or state.last_result is None:
+            return {"word": "Iniciando...", "confidence": 0.0}
+        return dict(state.last_result)
+
+    def end_session(self, session_id: Optional[str]) -> None:
+        if session_id:
+            self.sessions.remove(session_id)
+
+    def predict_from_frame(self, cv_image, include_landmarks: bool = False, session_id: Optional[str] = None,
+                           rgb: bool = False, stabilize: bool = False):
+        """
+        Predecir desde un frame decodificado (BGR de OpenCV, o RGB con rgb=True)
+
+        Con stabilize=True (streaming) solo se devuelve una predicción completa cuando
+        cambia la palabra confirmada por el estabilizador; en otro caso la respuesta
+        tiene estado ``UNCHANGED_STATUS`` (palabra actual, confianza suavizada y
+        landmarks) y no se sintetiza audio ni se registra.
+        """
         if not self.is_ready():
             raise RuntimeError("Sistema no disponible")
         
         start_time = time.time()
-        word, confidence, success, landmarks = self.predictor.predict_realtime(cv_image, include_landmarks=include_landmarks)  # type: ignore[arg-type]
+        extractor = self.extractor_pool.extract if self.extractor_pool else None
+        state = self.sessions.get(session_id or "anonymous")
+        with state.lock:
+            stabilizer_state = self._stabilizer_state(state) if stabilize else None
+            # Escena sin cambios: reutilizar el último resultado sin MediaPipe, modelo, TTS ni log
+            thumbnail = None
+            if self.motion_gate is not None:
+                static, thumbnail = self.motion_gate.check(cv_image, state, start_time)
+                if static and stabilizer_state is None:
+                    return self._reuse_response(state, start_time)
+                if static:
+                    # El frame cuenta para el estabilizador con las probabilidades del anterior
+                    change = self.stabilizer.repeat(stabilizer_state)
+                    return self._stabilized_response(state, stabilizer_state, change, None, start_time,
+                                                     session_id)
+            classifier, captured = self._make_classifier(stabilizer_state)
+            word, confidence, success, landmarks = self.predictor.predict_realtime(  # type: ignore[union-attr]
+                cv_image, include_landmarks=include_landmarks, classifier=classifier, state=state,
+                extractor=extractor, rgb=rgb,
+            )
+            if success and self.motion_gate is not None:
+                self.motion_gate.commit(state, thumbnail, start_time)
+            if success and stabilizer_state is not None:
+                change = self.stabilizer.update(stabilizer_state, captured[0] if captured else None)
+                return self._stabilized_response(state, stabilizer_state, change, landmarks, start_time, session_id)
+        return self._build_response(state, word, confidence, success, landmarks, start_time, session_id)
+
+    def predict_from_features(self, payload, include_landmarks: bool = False, session_id: Optional[str] = None,
+                              stabilize: bool = False):
+        """
+        Clasificar landmarks extraídos por el cliente (sin imagen ni MediaPipe en el servidor)
+
+        Args:
+            payload: Vector binario float32, lista de valores o landmarks con nombre
+                (ver ``LandmarkPacker.parse``)
+
+            stabilize: Emitir solo cambios de palabra confirmados (ver predict_from_frame)
+
+        Raises:
+            ValueError: Si el vector no coincide con feature_info.json
+        """
+        if not self.is_ready():
+            raise RuntimeError("Sistema no disponible")
+
+        start_time = time.time()
+        state = self.sessions.get(session_id or "anonymous")
+        with state.lock:
+            stabilizer_state = self._stabilizer_state(state) if stabilize else None
+            classifier, captured = self._make_classifier(stabilizer_state)
+            if state.features is None:
+                state.features = self.predictor.packer.allocate()  # type: ignore[union-attr]
+            features = self.predictor.packer.parse(payload, out=state.features)  # type: ignore[union-attr]
+            word, confidence, success, landmarks = self.predictor.predict_from_features(  # type: ignore[union-attr]
+                features, include_landmarks=include_landmarks, classifier=classifier, state=state
+            )
+            if success and stabilizer_state is not None:
+                change = self.stabilizer.update(stabilizer_state, captured[0] if captured else None)
+                return self._stabilized_response(state, stabilizer_state, change, landmarks, start_time, session_id)
+        return self._build_response(state, word, confidence, success, landmarks, start_time, session_id)
+
+    def _stabilizer_state(self, state) -> Optional[StabilizerState]:
+        if self.stabilizer is None:
+            return None
+        if state.stabilizer_state is None:
+            state.stabilizer_state = StabilizerState()
+        return state.stabilizer_state
+
+    def _make_classifier(self, stabilizer_state: Optional[StabilizerState]):
+        """
+        Clasificador para el predictor y lista donde queda la fila de probabilidades
+
+        Sin estabilizador se usa el planificador de micro-lotes (o predict_proba del
+        predictor). Con él, el clasificador además guarda las probabilidades del
+        frame para alimentar el suavizado; la lista queda vacía si el frame no llegó
+        al modelo (sin manos).
+        """
+        base = None
+        if self.batch_scheduler:
+            base = functools.partial(self.batch_scheduler.predict,
+                                     timeout=self.settings.batching.timeout_ms / 1000.0)
+        captured = []
+        if stabilizer_state is None:
+            return base, captured
+        if base is None:
+            base = lambda features: self.predictor.predict_proba(features[np.newaxis, :])[0]  # noqa: E731
+
+        def classifier(features):
+            probabilities = base(features)
+            captured.append(probabilities)
+            return probabilities
+
+        return classifier, captured
+
+    def _stabilized_response(self, state, stabilizer_state: StabilizerState, change, landmarks,
+                             start_time: float, session_id: Optional[str]):
+        # Solo un cambio de palabra confirmado genera respuesta completa (con TTS y log);
+        # los demás frames llevan lo necesario para actualizar la superposición
+        if change is None:
+            word, confidence = self.stabilizer.current(stabilizer_state)
+            response = {
+                "status": UNCHANGED_STATUS,
+                "word": word or "",
+                "confidence": confidence,
+                "timestamp": time.time(),
+                "response_time_ms": round((time.time() - start_time) * 1000, 2),
+            }
+            if landmarks:
+                response["landmarks"] = landmarks
+            return response
+        word, confidence = change
+        if word is None:
+            word = self.predictor.NO_SIGN_LABEL
+        return self._build_response(state, word, confidence, True, landmarks, start_time, session_id)
+
+    def _build_response(self, state, word, confidence, success, landmarks, start_time: float,
+                        session_id: Optional[str]):
         response_time_ms = (time.time() - start_time) * 1000
         
         if not success:
             return None
         
-        self.current_prediction = {"word": word, "confidence": float(confidence)}
+        if word == self.predictor.NO_SIGN_LABEL:
+            return self._no_sign_response(state, landmarks, response_time_ms)
+        
+        state.last_result = {"word": word, "confidence": float(confidence)}
         
         # Registrar en logs si está disponible
         if self.logger_service:
@@ -109,7 +395,7 @@ class PredictionService:
             except Exception as exc:
                 logger.warning("Error registrando traducción en logs: %s", exc)
         
-        audio_data = self.tts_service.generate_audio_base64(word)
+        audio_fields = self.tts_service.audio_fields(word)
         response = {
             "status": "success",
             "word": word,
@@ -117,19 +403,58 @@ class PredictionService:
             "timestamp": time.time(),
             "response_time_ms": round(response_time_ms, 2),
         }
-        if audio_data:
-            response["audio"] = audio_data
+        response.update(audio_fields)
         if landmarks:
             response["landmarks"] = landmarks
+        state.last_response = response
         return response
 
-    def predict_from_base64(self, image_data: str, include_landmarks: bool = False, session_id: Optional[str] = None):
+    def _no_sign_response(self, state, landmarks, response_time_ms: float) -> Dict[str, object]:
+        # Frame sin manos: sin TTS ni registro en logs
+        with self._counters_lock:
+            self.no_sign_total += 1
+        response = {
+            "status": "no_sign",
+            "message": "No se detectaron manos",
+            "word": "",
+            "confidence": 0.0,
+            "timestamp": time.time(),
+            "response_time_ms": round(response_time_ms, 2),
+        }
+        if landmarks:
+            response["landmarks"] = landmarks
+        state.last_response = response
+        return response
+
+    @staticmethod
+    def _reuse_response(state, start_time: float) -> Dict[str, object]:
+        # El audio ya se envió con la respuesta original: no se repite
+        response = {key: value for key, value in state.last_response.items() if key not in _AUDIO_FIELDS}
+        response["cached"] = True
+        response["timestamp"] = time.time()
+        response["response_time_ms"] = round((time.time() - start_time) * 1000, 2)
+        return response
+
+    def predict_from_base64(self, image_data: str, include_landmarks: bool = False, session_id: Optional[str] = None,
+                            stabilize: bool = False):
         if image_data.startswith('data:image'):
             image_data = image_data.split(',')[1]
         image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        return self.predict_from_frame(cv_image, include_landmarks=include_landmarks, session_id=session_id)
+        return self.predict_from_bytes(image_bytes, include_landmarks=include_landmarks, session_id=session_id,
+                                       stabilize=stabilize)
+
+    def predict_from_bytes(self, image_bytes, include_landmarks: bool = False, session_id: Optional[str] = None,
+                           stabilize: bool = False):
+        """
+        Predecir desde una imagen comprimida (JPEG/PNG/WebP) tal como llegó del cliente
+
+        Raises:
+            ValueError: Si los bytes no son una imagen decodificable
+        """
+        # Decodificar directamente a RGB: Holistic recibe el frame sin más conversiones
+        rgb_image = self.frame_ingest.decode(image_bytes)
+        return self.predict_from_frame(rgb_image, include_landmarks=include_landmarks, session_id=session_id, rgb=True,
+                                       stabilize=stabilize)
 
     def _get_status_message(self) -> str:
         messages = {
@@ -141,4 +466,4 @@ class PredictionService:
         return messages.get(self.system_status, "Estado desconocido")
 
 
-__all__ = ["PredictionService"]
+__all__ = ["PredictionService", "UNCHANGED_STATUS"]
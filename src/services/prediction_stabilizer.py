@@ -0,0 +1,134 @@
+"""Estabilización de predicciones por sesión (suavizado + histéresis)."""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass
+class StabilizerState:
+    """Estado de estabilización de una sesión."""
+
+    smoothed: Optional[np.ndarray] = None
+    # Probabilidades del último frame (None = sin seña), para repetirlo en frames estáticos
+    last_probabilities: Optional[np.ndarray] = None
+    # Índice de clase candidata (-1 = sin seña) y frames consecutivos que lleva como candidata
+    candidate: Optional[int] = None
+    candidate_frames: int = 0
+    # Palabra confirmada (índice de clase, -1 = sin seña, None = nada confirmado aún)
+    committed: Optional[int] = None
+
+
+class PredictionStabilizer:
+    """
+    Convierte predicciones por frame en cambios de palabra confirmados.
+
+    Las probabilidades de cada frame se suavizan con una media móvil exponencial
+    (``alpha`` = peso del frame nuevo). Una clase se confirma cuando es la
+    máxima del suavizado durante ``min_frames`` frames seguidos y supera
+    ``min_confidence``; para reemplazar una palabra ya confirmada, además debe
+    superarla por ``margin`` (histéresis), lo que evita el parpadeo entre dos
+    clases parecidas. ``min_frames`` frames seguidos sin manos confirman "sin seña".
+
+    Solo los cambios confirmados deben emitirse, sintetizarse y registrarse.
+    """
+
+    NO_SIGN = -1
+
+    def __init__(self, class_names: Sequence[str], alpha: float = 0.4, min_confidence: float = 0.6,
+                 margin: float = 0.15, min_frames: int = 3):
+        self.class_names = [str(name) for name in class_names]
+        self.alpha = alpha
+        self.min_confidence = min_confidence
+        self.margin = margin
+        self.min_frames = max(1, min_frames)
+
+        self._lock = threading.Lock()
+        self.frames_total = 0
+        self.commits_total = 0
+
+    def update(self, state: StabilizerState,
+               probabilities: Optional[np.ndarray]) -> Optional[Tuple[Optional[str], float]]:
+        """
+        Incorporar un frame y decidir si cambia la palabra confirmada
+
+        Args:
+            state: Estado de la sesión
+            probabilities: Probabilidades del frame; None si el frame no tiene seña
+
+        Returns:
+            (palabra, confianza suavizada) si la palabra confirmada cambió; la
+            palabra es None cuando se confirma "sin seña". None si no hay cambio.
+        """
+        state.last_probabilities = probabilities
+        if probabilities is None:
+            state.smoothed = None
+            candidate, confidence = self.NO_SIGN, 0.0
+        else:
+            if state.smoothed is None or state.smoothed.shape != probabilities.shape:
+                state.smoothed = np.array(probabilities, dtype=np.float32)
+            else:
+                state.smoothed *= 1.0 - self.alpha
+                state.smoothed += self.alpha * probabilities
+            candidate = int(np.argmax(state.smoothed))
+            confidence = float(state.smoothed[candidate])
+
+        if candidate == state.candidate:
+            state.candidate_frames += 1
+        else:
+            state.candidate, state.candidate_frames = candidate, 1
+
+        change = None
+        if candidate != state.committed and self._should_commit(state, candidate, confidence):
+            state.committed = candidate
+            change = (None if candidate == self.NO_SIGN else self.class_names[candidate], confidence)
+
+        with self._lock:
+            self.frames_total += 1
+            if change is not None:
+                self.commits_total += 1
+        return change
+
+    def repeat(self, state: StabilizerState) -> Optional[Tuple[Optional[str], float]]:
+        """Contar otra vez el último frame (escena sin cambios según la compuerta de movimiento)."""
+        if state.candidate is None:
+            return None
+        return self.update(state, state.last_probabilities)
+
+    def _should_commit(self, state: StabilizerState, candidate: int, confidence: float) -> bool:
+        if state.candidate_frames < self.min_frames:
+            return False
+        if candidate == self.NO_SIGN:
+            return True
+        if confidence < self.min_confidence:
+            return False
+        # Histéresis: para reemplazar una palabra confirmada hay que superarla por el margen
+        if state.committed is not None and state.committed != self.NO_SIGN:
+            return confidence - float(state.smoothed[state.committed]) >= self.margin
+        return True
+
+    def current(self, state: StabilizerState) -> Tuple[Optional[str], float]:
+        """Palabra confirmada actual y su confianza suavizada."""
+        if state.committed is None or state.committed == self.NO_SIGN or state.smoothed is None:
+            return None, 0.0
+        return self.class_names[state.committed], float(state.smoothed[state.committed])
+
+    def get_metrics(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "enabled": True,
+                "alpha": self.alpha,
+                "min_confidence": self.min_confidence,
+                "margin": self.margin,
+                "min_frames": self.min_frames,
+                "frames_total": self.frames_total,
+                "commits_total": self.commits_total,
+                "suppressed_total": self.frames_total - self.commits_total,
+            }
+
+
+__all__ = ["PredictionStabilizer", "StabilizerState"]
@@ -0,0 +1,174 @@
+"""Registro de estado por sesión (Socket.IO sid / session_id)."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SessionState:
+    """Estado de predicción de una sesión: control de frecuencia, último resultado y buffers."""
+
+    session_id: str
+    prediction_interval: float
+    created_at: float = field(default_factory=time.time)
+    last_seen: float = field(default_factory=time.time)
+    last_prediction_time: float = 0.0
+    last_result: Optional[Dict[str, object]] = None
+    # Última respuesta completa y miniatura del frame que la produjo (compuerta de movimiento)
+    last_response: Optional[Dict[str, object]] = None
+    motion_reference: Optional[np.ndarray] = None
+    motion_reference_time: float = 0.0
+    features: Optional[np.ndarray] = None
+    # Ventana de recorte (ROI) usada en el último frame; None = frame completo
+    crop_window: Optional[object] = None
+    # Pre-detector de presencia: la puerta sigue abierta hasta este instante
+    presence_hold_until: float = 0.0
+    # Estabilizador de predicciones (StabilizerState); se crea con el primer frame en streaming
+    stabilizer_state: Optional[object] = None
+    # Serializa los frames de una misma sesión (los buffers se reutilizan)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class SessionRegistry:
+    """
+    Registro acotado de sesiones con expiración por inactividad.
+
+    Las sesiones se guardan en orden de último acceso: las inactivas se expulsan
+    por ``idle_timeout_s`` y, si se supera ``max_sessions``, se expulsa la menos
+    reciente. Así la memoria queda acotada aunque haya miles de conexiones cortas.
+    """
+
+    def __init__(self, idle_timeout_s: float = 300.0, max_sessions: int = 2000,
+                 prediction_interval: float = 0.1):
+        self.idle_timeout_s = idle_timeout_s
+        self.max_sessions = max(1, max_sessions)
+        self.prediction_interval = prediction_interval
+
+        self._sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._eviction_listeners: List[Callable[[SessionState], None]] = []
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        self.created_total = 0
+        self.evicted_idle_total = 0
+        self.evicted_capacity_total = 0
+
+    def add_eviction_listener(self, callback: Callable[[SessionState], None]) -> None:
+        """Registrar una función que se llama al expulsar o cerrar una sesión."""
+        self._eviction_listeners.append(callback)
+
+    def get(self, session_id: str) -> SessionState:
+        """Obtener (o crear) el estado de una sesión y marcarla como activa."""
+        now = time.time()
+        evicted: List[SessionState] = []
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = SessionState(session_id=session_id, prediction_interval=self.prediction_interval)
+                self._sessions[session_id] = state
+                self.created_total += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            state.last_seen = now
+            evicted.extend(self._evict_locked(now))
+        self._notify(evicted)
+        return state
+
+    def peek(self, session_id: str) -> Optional[SessionState]:
+        """Obtener el estado sin crearlo ni actualizar su actividad."""
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def remove(self, session_id: str) -> None:
+        with self._lock:
+            state = self._sessions.pop(session_id, None)
+        if state is not None:
+            self._notify([state])
+
+    def evict_idle(self) -> int:
+        """Expulsar sesiones inactivas; devuelve cuántas se expulsaron."""
+        with self._lock:
+            evicted = self._evict_locked(time.time())
+        self._notify(evicted)
+        return len(evicted)
+
+    def start_sweeper(self, interval_s: float) -> None:
+        """
+        Expulsar sesiones inactivas cada ``interval_s`` en un hilo de fondo
+
+        Sin barrido, las sesiones inactivas solo se expulsan cuando otra sesión
+        llama a ``get``: con el servidor sin tráfico sus recursos no se liberan.
+        """
+        if interval_s <= 0 or self._sweeper is not None:
+            return
+        self._stop_event.clear()
+        self._sweeper = threading.Thread(target=self._sweep, args=(interval_s,), name="session-sweeper",
+                                         daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        self._stop_event.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=1.0)
+            self._sweeper = None
+
+    def _sweep(self, interval_s: float) -> None:
+        while not self._stop_event.wait(interval_s):
+            try:
+                evicted = self.evict_idle()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("Error expulsando sesiones inactivas: %s", exc)
+                continue
+            if evicted:
+                logger.debug("Sesiones inactivas expulsadas: %d", evicted)
+
+    def _evict_locked(self, now: float) -> List[SessionState]:
+        evicted: List[SessionState] = []
+        # El OrderedDict está ordenado por último acceso: las inactivas están al inicio
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_seen <= self.idle_timeout_s:
+                break
+            evicted.append(self._sessions.popitem(last=False)[1])
+            self.evicted_idle_total += 1
+        while len(self._sessions) > self.max_sessions:
+            evicted.append(self._sessions.popitem(last=False)[1])
+            self.evicted_capacity_total += 1
+        return evicted
+
+    def _notify(self, states: List[SessionState]) -> None:
+        for state in states:
+            for callback in self._eviction_listeners:
+                try:
+                    callback(state)
+                except Exception as exc:  # pylint: disable=broad-except
+                    logger.warning("Error liberando recursos de la sesión %s: %s", state.session_id, exc)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def get_metrics(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "active": len(self._sessions),
+                "limit": self.max_sessions,
+                "idle_timeout_s": self.idle_timeout_s,
+                "created_total": self.created_total,
+                "evicted_idle_total": self.evicted_idle_total,
+                "evicted_capacity_total": self.evicted_capacity_total,
+            }
+
+
+__all__ = ["SessionRegistry", "SessionState"]
@@ -3,21 +3,80 @@
 from __future__ import annotations
 
 import base64
+import functools
+import hashlib
+import json
 import logging
-from typing import Optional
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 from config.settings import AppSettings
-from tts.voice_synthesizer import VoiceSynthesizer
+from tts.phrase_audio import concat_audio, split_phrase
+from tts.voice_synthesizer import TTS_BACKENDS, VoiceSynthesizer
 
 logger = logging.getLogger(__name__)
 
+# Ruta pública de los archivos de audio en cache
+AUDIO_URL_PREFIX = "/api/tts/file/"
+
+# Nombres que se sirven desde el cache: solo audio, sin rutas ni archivos ocultos (índice, temporales)
+_AUDIO_FILENAME = re.compile(
+    r"^[A-Za-z0-9_-][A-Za-z0-9_.-]*\.(?:%s)$"
+    % "|".join(sorted({re.escape(backend.extension) for backend in TTS_BACKENDS.values()}))
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _content_etag(path: str, mtime_ns: int, size: int) -> str:
+    # La fecha y el tamaño forman parte de la clave: un archivo regenerado se vuelve a resumir
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
 
 class TTSService:
-    """Encapsula la lógica de síntesis de voz."""
+    """
+    Encapsula la lógica de síntesis de voz.
+
+    Los audios resueltos (referencia al archivo en cache o data URL) se guardan
+    en memoria: una palabra repetida se resuelve con una búsqueda, sin red, disco
+    ni base64. Las clases del modelo tienen su propio mapa (acotado por el
+    vocabulario), que se llena en segundo plano al iniciar para que la primera
+    predicción de cada palabra tampoco pague la síntesis; el resto de textos
+    (frases de /api/tts) van a un mapa LRU acotado (``TTS_MEMORY_CACHE_SIZE``)
+    y no pueden desalojar el vocabulario.
+
+    Con ``TTS_AUDIO_MODE=url`` las predicciones llevan ``audio_id``/``audio_url``
+    en lugar del MP3 en base64: el cliente descarga cada palabra una vez y el
+    navegador la guarda en su cache.
+    """
 
     def __init__(self, settings: AppSettings):
         self.settings = settings
         self.synthesizer: Optional[VoiceSynthesizer] = None
+        self.memory_cache_size = max(0, settings.tts.memory_cache_size)
+        self.audio_mode = settings.tts.audio_mode
+        self._audio_cache: "OrderedDict[Tuple[str, str], object]" = OrderedDict()
+        self._vocabulary_cache: Dict[Tuple[str, str], object] = {}
+        # Archivo en cache de cada referencia "url" en memoria, para olvidarla al desalojarlo
+        self._reference_keys: Dict[str, Tuple[str, str]] = {}
+        self._class_names: List[str] = []
+        self._vocabulary: frozenset = frozenset()
+        self._cache_lock = threading.Lock()
+        self._prewarm_thread: Optional[threading.Thread] = None
+        self.hits_total = 0
+        self.misses_total = 0
+        self.prewarmed_total = 0
+        self.phrases_total = 0
+        self.phrase_segments_total = 0
+        self.phrase_oov_segments_total = 0
+        self.phrase_fallback_total = 0
 
     def initialize(self) -> None:
         try:
@@ -25,20 +84,214 @@ class TTSService:
                 cache_dir=str(self.settings.tts.cache_dir),
                 language=self.settings.tts.language,
                 slow=self.settings.tts.slow,
+                backend=self.settings.tts.backend,
+                voice=self.settings.tts.voice or None,
+                max_cache_bytes=int(self.settings.tts.max_cache_mb * 1024 * 1024),
             )
+            self.synthesizer.cache_index.add_evict_listener(self._on_file_evicted)
             logger.info("Servicio TTS inicializado")
         except Exception as exc:
             self.synthesizer = None
             logger.exception("No se pudo inicializar el servicio TTS: %s", exc)
+            return
+
+        self._class_names = self._load_class_names()
+        self._vocabulary = frozenset(name.strip() for name in self._class_names)
+        if not self.synthesizer.backend.is_available():
+            # Sin motor no hay nada que precalentar (el motivo ya se registró al crear el sintetizador)
+            return
+        if self.settings.tts.prewarm:
+            self.start_prewarm(self._class_names)
+
+    def _load_class_names(self) -> List[str]:
+        try:
+            with open(self.settings.model.feature_info_path, "r", encoding="utf-8") as f:
+                return [str(name) for name in json.load(f).get("class_names", [])]
+        except (OSError, ValueError) as exc:
+            logger.warning("No se pudieron leer las clases para precalentar TTS: %s", exc)
+            return []
+
+    def start_prewarm(self, texts: Iterable[str]) -> None:
+        """Sintetizar ``texts`` en un hilo de fondo (la red no bloquea el arranque)."""
+        texts = list(texts)
+        if not texts:
+            return
+        self._prewarm_thread = threading.Thread(
+            target=self.prewarm, args=(texts,), name="tts-prewarm", daemon=True
+        )
+        self._prewarm_thread.start()
+
+    def prewarm(self, texts: Iterable[str]) -> int:
+        """Sintetizar y guardar en memoria cada texto; devuelve cuántos quedaron listos."""
+        ready = 0
+        for text in texts:
+            if self.audio_fields(text):
+                ready += 1
+        with self._cache_lock:
+            self.prewarmed_total += ready
+        logger.info("TTS precalentado: %d audios en memoria", ready)
+        return ready
+
+    def audio_fields(self, text: str) -> Dict[str, str]:
+        """
+        Campos de audio para una respuesta de predicción según ``TTS_AUDIO_MODE``
+
+        Returns:
+            ``{"audio_id", "audio_url"}``, ``{"audio"}`` (data URL) o vacío si no hay audio
+        """
+        if self.audio_mode == "inline":
+            audio_data = self.generate_audio_base64(text)
+            return {"audio": audio_data} if audio_data else {}
+        return self.get_audio_reference(text) or {}
 
     def generate_audio_base64(self, text: str) -> Optional[str]:
+        return self._cached("inline", text, self._encode_audio)
+
+    def get_audio_reference(self, text: str) -> Optional[Dict[str, str]]:
+        """Identificador estable y URL del MP3 en cache (sintetizándolo si falta)."""
+        return self._cached("url", text, self._reference_audio)
+
+    def get_manifest(self) -> Dict[str, str]:
+        """URLs de audio de las clases del modelo ya resueltas (para precarga en el cliente)."""
+        manifest = {}
+        with self._cache_lock:
+            for name in self._class_names:
+                reference = self._vocabulary_cache.get(("url", name.strip()))
+                if reference is not None:
+                    manifest[name] = reference["audio_url"]
+        return manifest
+
+    def generate_phrase_base64(self, text: str) -> Optional[str]:
+        """Como generate_audio_base64, armando la frase con los clips por palabra."""
+        return self._cached("phrase", text, self._encode_phrase)
+
+    def save_phrase_file(self, text: str) -> Optional[str]:
+        """Como save_audio_file, armando la frase con los clips por palabra."""
+        if not self.synthesizer:
+            return None
+        text = text.strip()
+        cache_path = self.synthesizer.get_phrase_cache_path(text, self.settings.tts.phrase_gap_ms)
+        if cache_path.is_file():
+            self.synthesizer.cache_index.touch(cache_path.name)
+            return str(cache_path)
+        audio_bytes, error = self.synthesize_phrase(text)
+        if error or not audio_bytes:
+            logger.warning("Error generando audio TTS: %s", error)
+            return None
+        try:
+            self.synthesizer.store_in_cache(cache_path, audio_bytes, text)
+        except OSError as exc:
+            logger.warning("Error guardando archivo TTS: %s", exc)
+            return None
+        return str(cache_path)
+
+    def synthesize_phrase(self, text: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Sintetizar una frase uniendo los clips (en cache) de las palabras del vocabulario
+
+        Las palabras fuera del vocabulario se sintetizan por tramos; si los clips no
+        se pueden unir (formatos distintos) se sintetiza la frase completa.
+
+        Returns:
+            Tupla (audio_bytes, error_message) como VoiceSynthesizer.text_to_speech
+        """
+        if not self.synthesizer:
+            return None, "Sistema TTS no disponible"
+        segments = split_phrase(text, self._class_names)
+        with self._cache_lock:
+            self.phrases_total += 1
+            self.phrase_segments_total += len(segments)
+            self.phrase_oov_segments_total += sum(1 for _, known in segments if not known)
+        if len(segments) <= 1:
+            # Una sola palabra del vocabulario reutiliza su clip con la grafía de la clase
+            return self.synthesizer.text_to_speech(segments[0][0] if segments else text)
+
+        clips = []
+        for segment, _ in segments:
+            audio_bytes, error = self.synthesizer.text_to_speech(segment)
+            if error or not audio_bytes:
+                return None, error
+            clips.append(audio_bytes)
+        audio_bytes = concat_audio(clips, self.synthesizer.backend.extension, self.settings.tts.phrase_gap_ms)
+        if audio_bytes is None:
+            with self._cache_lock:
+                self.phrase_fallback_total += 1
+            return self.synthesizer.text_to_speech(text)
+        return audio_bytes, None
+
+    def _cached(self, kind: str, text: str, factory: Callable[[str], Optional[object]]):
         if not self.synthesizer:
             return None
+        key = (kind, text.strip())
+        vocabulary = key[1] in self._vocabulary
+        with self._cache_lock:
+            if vocabulary:
+                value = self._vocabulary_cache.get(key)
+            else:
+                value = self._audio_cache.get(key)
+                if value is not None:
+                    self._audio_cache.move_to_end(key)
+            if value is not None:
+                self.hits_total += 1
+            else:
+                self.misses_total += 1
+        if value is not None:
+            if kind == "url":
+                # El archivo referenciado debe seguir contando como usado en el cache en disco
+                self.synthesizer.touch(key[1])
+            return value
+
+        value = factory(key[1])
+        if value is None or not (vocabulary or self.memory_cache_size):
+            return value
+        with self._cache_lock:
+            if kind == "url":
+                self._reference_keys[self._reference_filename(value)] = key
+            if vocabulary:
+                self._vocabulary_cache[key] = value
+                return value
+            self._audio_cache[key] = value
+            self._audio_cache.move_to_end(key)
+            while len(self._audio_cache) > self.memory_cache_size:
+                old_key, old_value = self._audio_cache.popitem(last=False)
+                if old_key[0] == "url":
+                    self._reference_keys.pop(self._reference_filename(old_value), None)
+        return value
+
+    @staticmethod
+    def _reference_filename(reference: Dict[str, str]) -> str:
+        return reference["audio_url"][len(AUDIO_URL_PREFIX):]
+
+    def _on_file_evicted(self, filename: str, text: Optional[str]) -> None:
+        # Un audio desalojado del disco deja de poder servirse por URL. Se busca por
+        # nombre: las filas que el índice reconstruyó desde el directorio no tienen texto
+        with self._cache_lock:
+            key = self._reference_keys.pop(filename, None)
+            if key is not None:
+                self._audio_cache.pop(key, None)
+                self._vocabulary_cache.pop(key, None)
+
+    def _encode_audio(self, text: str) -> Optional[str]:
         audio_bytes, error = self.synthesizer.text_to_speech(text)
         if error or not audio_bytes:
             logger.warning("Error generando audio TTS: %s", error)
             return None
-        return f"data:audio/mpeg;base64,{base64.b64encode(audio_bytes).decode('utf-8')}"
+        return f"data:{self.synthesizer.mimetype};base64,{base64.b64encode(audio_bytes).decode('utf-8')}"
+
+    def _encode_phrase(self, text: str) -> Optional[str]:
+        audio_bytes, error = self.synthesize_phrase(text)
+        if error or not audio_bytes:
+            logger.warning("Error generando audio TTS: %s", error)
+            return None
+        return f"data:{self.synthesizer.mimetype};base64,{base64.b64encode(audio_bytes).decode('utf-8')}"
+
+    def _reference_audio(self, text: str) -> Optional[Dict[str, str]]:
+        file_path = self.save_audio_file(text)
+        if not file_path:
+            return None
+        # El nombre del archivo en cache es el hash del texto: no cambia entre reinicios
+        filename = Path(file_path).name
+        return {"audio_id": Path(filename).stem, "audio_url": f"{AUDIO_URL_PREFIX}{filename}"}
 
     def save_audio_file(self, text: str) -> Optional[str]:
         if not self.synthesizer:
@@ -49,8 +302,57 @@ class TTSService:
             return None
         return file_path
 
+    def resolve_audio_file(self, filename: str) -> Optional[Path]:
+        """
+        Ruta de un archivo de audio del cache a partir de su nombre público
+
+        Returns:
+            None si el nombre no es un audio del cache (rutas, archivos ocultos,
+            el índice) o si el archivo no existe
+        """
+        if not self.synthesizer or not _AUDIO_FILENAME.match(filename):
+            return None
+        path = self.synthesizer.cache_dir / filename
+        if not path.is_file():
+            return None
+        self.synthesizer.cache_index.touch(filename)
+        return path
+
+    @staticmethod
+    def get_file_etag(path: Path) -> str:
+        """ETag por contenido (SHA-256), calculado una vez por versión del archivo."""
+        stat = os.stat(path)
+        return _content_etag(str(path), stat.st_mtime_ns, stat.st_size)
+
     def is_available(self) -> bool:
         return self.synthesizer is not None
 
+    def get_metrics(self) -> Dict[str, object]:
+        with self._cache_lock:
+            lookups = self.hits_total + self.misses_total
+            return {
+                "available": self.is_available(),
+                "memory_entries": len(self._audio_cache),
+                "memory_limit": self.memory_cache_size,
+                "vocabulary_entries": len(self._vocabulary_cache),
+                "audio_mode": self.audio_mode,
+                "backend": self.synthesizer.backend.name if self.synthesizer else None,
+                "prewarmed_total": self.prewarmed_total,
+                "hits_total": self.hits_total,
+                "misses_total": self.misses_total,
+                "hit_rate": round(self.hits_total / lookups, 4) if lookups else 0.0,
+                "synthesized_total": self.synthesizer.synthesized_total if self.synthesizer else 0,
+                "coalesced_total": self.synthesizer.coalesced_total if self.synthesizer else 0,
+                "phrases": {
+                    "enabled": self.settings.tts.phrase_enabled,
+                    "gap_ms": self.settings.tts.phrase_gap_ms,
+                    "phrases_total": self.phrases_total,
+                    "segments_total": self.phrase_segments_total,
+                    "oov_segments_total": self.phrase_oov_segments_total,
+                    "fallback_total": self.phrase_fallback_total,
+                },
+                "disk": self.synthesizer.cache_index.get_metrics() if self.synthesizer else {},
+            }
+
 
-__all__ = ["TTSService"]
+__all__ = ["AUDIO_URL_PREFIX", "TTSService"]
@@ -2,7 +2,7 @@
 Módulo de Text-to-Speech (TTS) para VOZ VISIBLE
 """
 
-from .voice_synthesizer import VoiceSynthesizer
+from .voice_synthesizer import TTS_BACKENDS, TTSBackend, VoiceSynthesizer, create_tts_backend
 
-__all__ = ['VoiceSynthesizer']
+__all__ = ['TTS_BACKENDS', 'TTSBackend', 'VoiceSynthesizer', 'create_tts_backend']
 
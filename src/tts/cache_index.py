@@ -0,0 +1,244 @@
+"""
+Índice SQLite del cache de audio TTS
+
+Guarda por archivo la clave (nombre), el tamaño, los parámetros del backend, el
+texto y el último acceso. El total de bytes se mantiene en memoria, así que
+consultar el tamaño del cache no recorre el directorio. Al superar el
+presupuesto se eliminan los archivos usados hace más tiempo (LRU).
+
+Los accesos se acumulan en memoria y se escriben en la base de datos al
+registrar, desalojar o cada ``flush_interval_s``: un acierto de cache no
+escribe en disco.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "index.sqlite3"
+# Sufijo de los archivos temporales de escritura atómica
+TEMP_SUFFIX = ".tmp"
+
+
+class TTSCacheIndex:
+    """
+    Índice de los archivos de audio de un directorio de cache
+
+    Args:
+        cache_dir: Directorio del cache
+        max_bytes: Presupuesto de bytes (0 = sin límite)
+        extensions: Extensiones de los archivos de audio indexados
+        flush_interval_s: Frecuencia máxima con que se guardan los accesos
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 0, extensions: Iterable[str] = ("mp3",),
+                 flush_interval_s: float = 30.0):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max(0, max_bytes)
+        self.extensions = sorted(set(extensions))
+        self.flush_interval_s = flush_interval_s
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.cache_dir / INDEX_FILENAME), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                filename TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                params TEXT,
+                text TEXT,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)")
+        self._conn.commit()
+
+        self._pending_access: Dict[str, float] = {}
+        self._last_flush = time.time()
+        self._evict_listeners: List[Callable[[str, Optional[str]], None]] = []
+
+        self.total_bytes = 0
+        self.entries = 0
+        self.evicted_total = 0
+
+    def add_evict_listener(self, callback: Callable[[str, Optional[str]], None]) -> None:
+        """Registrar una función (nombre, texto) que se llama al desalojar un archivo."""
+        self._evict_listeners.append(callback)
+
+    def rebuild(self) -> None:
+        """
+        Sincronizar el índice con el directorio (al iniciar)
+
+        Los archivos sin fila se agregan con su fecha de modificación como último
+        acceso; las filas sin archivo se eliminan, igual que los temporales que
+        dejó una escritura interrumpida.
+        """
+        for path in self.cache_dir.glob(f".*{TEMP_SUFFIX}"):
+            self._unlink(path.name)
+
+        on_disk = {}
+        for extension in self.extensions:
+            for path in self.cache_dir.glob(f"*.{extension}"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                on_disk[path.name] = stat
+
+        with self._lock:
+            indexed = {
+                filename: size
+                for filename, size in self._conn.execute("SELECT filename, size FROM entries")
+            }
+            missing = [(name,) for name in indexed if name not in on_disk]
+            self._conn.executemany("DELETE FROM entries WHERE filename = ?", missing)
+            self._conn.executemany(
+                "INSERT INTO entries (filename, size, params, text, created_at, last_access) "
+                "VALUES (?, ?, NULL, NULL, ?, ?)",
+                [(name, stat.st_size, stat.st_mtime, stat.st_mtime)
+                 for name, stat in on_disk.items() if name not in indexed],
+            )
+            self._conn.executemany(
+                "UPDATE entries SET size = ? WHERE filename = ?",
+                [(stat.st_size, name) for name, stat in on_disk.items()
+                 if name in indexed and indexed[name] != stat.st_size],
+            )
+            self._conn.commit()
+            self._refresh_totals_locked()
+            evicted = self._evict_locked(keep=None)
+
+        logger.info("Índice de cache TTS: %d archivos, %d bytes (%d agregados, %d eliminados)",
+                    self.entries, self.total_bytes, len(on_disk) - (len(indexed) - len(missing)), len(missing))
+        self._notify(evicted)
+
+    def touch(self, filename: str) -> None:
+        """Marcar un acceso (se guarda en lote)."""
+        now = time.time()
+        with self._lock:
+            self._pending_access[filename] = now
+            if now - self._last_flush >= self.flush_interval_s:
+                self._flush_locked(now)
+
+    def record(self, filename: str, size: int, params: Optional[str] = None, text: Optional[str] = None) -> None:
+        """Registrar un archivo recién escrito y aplicar el presupuesto."""
+        now = time.time()
+        with self._lock:
+            self._pending_access.pop(filename, None)
+            self._forget_locked(filename)
+            self._conn.execute(
+                "INSERT INTO entries (filename, size, params, text, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (filename, size, params, text, now, now),
+            )
+            self._conn.commit()
+            self.entries += 1
+            self.total_bytes += size
+            evicted = self._evict_locked(keep=filename)
+        self._notify(evicted)
+
+    def remove(self, filenames: Iterable[str]) -> int:
+        """Eliminar archivos del cache y del índice; devuelve cuántos se eliminaron."""
+        removed = 0
+        with self._lock:
+            for filename in filenames:
+                self._unlink(filename)
+                self._pending_access.pop(filename, None)
+                removed += self._forget_locked(filename)
+            self._conn.commit()
+        return removed
+
+    def filenames(self, accessed_before: Optional[float] = None) -> List[str]:
+        """Archivos indexados (opcionalmente, sin accesos desde ``accessed_before``)."""
+        with self._lock:
+            self._flush_locked(time.time())
+            if accessed_before is None:
+                rows = self._conn.execute("SELECT filename FROM entries")
+            else:
+                rows = self._conn.execute("SELECT filename FROM entries WHERE last_access < ?", (accessed_before,))
+            return [row[0] for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked(time.time())
+            self._conn.close()
+
+    def _flush_locked(self, now: float) -> None:
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE entries SET last_access = ? WHERE filename = ?",
+                [(accessed, filename) for filename, accessed in self._pending_access.items()],
+            )
+            self._conn.commit()
+            self._pending_access.clear()
+        self._last_flush = now
+
+    def _forget_locked(self, filename: str) -> int:
+        # Quitar la fila (si existe) descontando su tamaño del total
+        row = self._conn.execute("SELECT size FROM entries WHERE filename = ?", (filename,)).fetchone()
+        if row is None:
+            return 0
+        self._conn.execute("DELETE FROM entries WHERE filename = ?", (filename,))
+        self.entries -= 1
+        self.total_bytes -= row[0]
+        return 1
+
+    def _refresh_totals_locked(self) -> None:
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        self.entries, self.total_bytes = count, total
+
+    def _evict_locked(self, keep: Optional[str]) -> List[tuple]:
+        if not self.max_bytes or self.total_bytes <= self.max_bytes:
+            return []
+        self._flush_locked(time.time())
+        evicted = []
+        excess = self.total_bytes - self.max_bytes
+        rows = self._conn.execute("SELECT filename, size, text FROM entries ORDER BY last_access ASC")
+        for filename, size, text in rows.fetchall():
+            if excess <= 0:
+                break
+            if filename == keep:
+                continue
+            self._unlink(filename)
+            evicted.append((filename, text))
+            excess -= size
+            self.entries -= 1
+            self.total_bytes -= size
+        self._conn.executemany("DELETE FROM entries WHERE filename = ?", [(name,) for name, _ in evicted])
+        self._conn.commit()
+        self.evicted_total += len(evicted)
+        return evicted
+
+    def _unlink(self, filename: str) -> None:
+        try:
+            (self.cache_dir / filename).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            logger.warning("No se pudo eliminar %s del cache TTS: %s", filename, exc)
+
+    def _notify(self, evicted: List[tuple]) -> None:
+        for filename, text in evicted:
+            for callback in self._evict_listeners:
+                try:
+                    callback(filename, text)
+                except Exception as exc:  # pylint: disable=broad-except
+                    logger.warning("Error notificando desalojo del cache TTS: %s", exc)
+
+    def get_metrics(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "entries": self.entries,
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "evicted_total": self.evicted_total,
+            }
+
+
+__all__ = ["INDEX_FILENAME", "TEMP_SUFFIX", "TTSCacheIndex"]
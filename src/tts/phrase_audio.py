@@ -0,0 +1,213 @@
+"""
+Frases a partir de audios por palabra
+
+Divide un texto en palabras del vocabulario (coincidencia voraz más larga, sin
+distinguir mayúsculas ni tildes) y une los clips ya sintetizados de cada una en
+un único audio, con silencios opcionales entre ellos:
+
+- MP3 (gTTS): se quitan las etiquetas ID3 y el frame Xing/Info de cada clip y
+  se concatenan los frames; el silencio son frames MPEG Layer III vacíos con la
+  misma cabecera que el primer clip.
+- WAV (motores locales): se concatenan las muestras PCM con el módulo ``wave``.
+
+Si los clips no comparten formato, las funciones devuelven None y el llamador
+sintetiza la frase completa.
+"""
+
+import io
+import unicodedata
+import wave
+from typing import List, Optional, Sequence, Tuple
+
+# Bitrates (kbps) de MPEG Layer III por índice
+_BITRATES_V1 = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_BITRATES_V2 = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def normalize_word(word: str) -> str:
+    """Forma de comparación: minúsculas, sin tildes ni signos de puntuación."""
+    decomposed = unicodedata.normalize("NFKD", word.casefold())
+    return "".join(char for char in decomposed if char.isalnum())
+
+
+def split_phrase(text: str, vocabulary: Sequence[str]) -> List[Tuple[str, bool]]:
+    """
+    Dividir un texto en segmentos del vocabulario y fuera de él
+
+    Args:
+        text: Frase a sintetizar
+        vocabulary: Palabras o expresiones con clip propio (p. ej. "Por favor")
+
+    Returns:
+        Lista de (texto, en_vocabulario). En los segmentos del vocabulario el texto
+        es la entrada del vocabulario; las palabras desconocidas consecutivas se
+        agrupan en un solo segmento con el texto original.
+    """
+    entries = {}
+    for entry in vocabulary:
+        key = tuple(normalize_word(token) for token in entry.split())
+        if key and all(key):
+            entries.setdefault(key, entry)
+    max_length = max((len(key) for key in entries), default=0)
+
+    tokens = text.split()
+    normalized = [normalize_word(token) for token in tokens]
+    segments: List[Tuple[str, bool]] = []
+    unknown: List[str] = []
+    position = 0
+    while position < len(tokens):
+        match = None
+        for length in range(min(max_length, len(tokens) - position), 0, -1):
+            match = entries.get(tuple(normalized[position:position + length]))
+            if match is not None:
+                break
+        if match is None:
+            unknown.append(tokens[position])
+            position += 1
+            continue
+        if unknown:
+            segments.append((" ".join(unknown), False))
+            unknown = []
+        segments.append((match, True))
+        position += length
+    if unknown:
+        segments.append((" ".join(unknown), False))
+    return segments
+
+
+def strip_id3(data: bytes) -> bytes:
+    """Quitar la etiqueta ID3v2 inicial y la ID3v1 final de un MP3."""
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        data = data[10 + size + footer:]
+    if len(data) >= 128 and data[-128:-125] == b"TAG":
+        data = data[:-128]
+    return data
+
+
+def _frame_info(data: bytes, offset: int) -> Optional[Tuple[int, int, int, int]]:
+    """(longitud, muestras, frecuencia, longitud de side info) del frame Layer III en ``offset``."""
+    if offset + 4 > len(data) or data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+        return None
+    version = (data[offset + 1] >> 3) & 0x03
+    layer = (data[offset + 1] >> 1) & 0x03
+    bitrate_index = data[offset + 2] >> 4
+    rate_index = (data[offset + 2] >> 2) & 0x03
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    padding = (data[offset + 2] >> 1) & 0x01
+    mono = (data[offset + 3] >> 6) == 3
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    if version == 3:
+        bitrate = _BITRATES_V1[bitrate_index] * 1000
+        samples, side_info = 1152, 17 if mono else 32
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        bitrate = _BITRATES_V2[bitrate_index] * 1000
+        samples, side_info = 576, 9 if mono else 17
+        length = 72 * bitrate // sample_rate + padding
+    return length, samples, sample_rate, side_info
+
+
+def _mp3_frames(data: bytes) -> Optional[Tuple[bytes, bytes]]:
+    """(frames de audio, cabecera del primer frame) de un clip MP3, sin etiquetas ni Xing/Info."""
+    data = strip_id3(data)
+    offset = 0
+    while offset < len(data) and _frame_info(data, offset) is None:
+        offset += 1
+    info = _frame_info(data, offset)
+    if info is None:
+        return None
+    header = data[offset:offset + 4]
+
+    # El frame Xing/Info/VBRI describe la duración del clip: no aplica a la frase
+    side_info = info[3] + (0 if data[offset + 1] & 0x01 else 2)
+    tag = data[offset + 4 + side_info:offset + 8 + side_info]
+    if tag in (b"Xing", b"Info") or data[offset + 36:offset + 40] == b"VBRI":
+        offset += info[0]
+    return data[offset:], header
+
+
+def _mp3_silence(header: bytes, duration_ms: float) -> bytes:
+    # Frame Layer III sin datos (side info en cero = silencio), sin CRC ni relleno
+    silent_header = bytes((header[0], header[1] | 0x01, header[2] & ~0x02 & 0xFF, header[3]))
+    info = _frame_info(silent_header, 0)
+    if info is None:
+        return b""
+    length, samples, sample_rate, _ = info
+    count = round(duration_ms / 1000.0 * sample_rate / samples)
+    return (silent_header + bytes(length - 4)) * count
+
+
+def concat_mp3(clips: Sequence[bytes], gap_ms: float = 0.0) -> Optional[bytes]:
+    """
+    Unir clips MP3 en un solo flujo
+
+    Returns:
+        Bytes del MP3 resultante, o None si algún clip no es MPEG Layer III o los
+        clips no comparten versión, frecuencia y modo de canal
+    """
+    parsed = [_mp3_frames(clip) for clip in clips]
+    if not parsed or any(item is None for item in parsed):
+        return None
+    reference = parsed[0][1]
+    # Versión, frecuencia y modo de canal deben coincidir en todos los clips
+    if any((header[1] & 0x18, header[2] & 0x0C, header[3] & 0xC0)
+           != (reference[1] & 0x18, reference[2] & 0x0C, reference[3] & 0xC0)
+           for _, header in parsed):
+        return None
+    silence = _mp3_silence(reference, gap_ms) if gap_ms > 0 else b""
+    return silence.join(frames for frames, _ in parsed)
+
+
+def concat_wav(clips: Sequence[bytes], gap_ms: float = 0.0) -> Optional[bytes]:
+    """
+    Unir clips WAV (PCM) en uno solo
+
+    Returns:
+        Bytes del WAV resultante, o None si los clips no comparten canales,
+        tamaño de muestra y frecuencia
+    """
+    params = None
+    chunks = []
+    try:
+        for clip in clips:
+            with wave.open(io.BytesIO(clip), "rb") as reader:
+                clip_params = (reader.getnchannels(), reader.getsampwidth(), reader.getframerate())
+                if params is None:
+                    params = clip_params
+                elif clip_params != params:
+                    return None
+                chunks.append(reader.readframes(reader.getnframes()))
+    except (wave.Error, EOFError):
+        return None
+    if params is None:
+        return None
+
+    channels, sample_width, frame_rate = params
+    # PCM de 8 bits es sin signo: el silencio es 0x80
+    silent_sample = b"\x80" if sample_width == 1 else bytes(sample_width)
+    gap_frames = round(gap_ms / 1000.0 * frame_rate) if gap_ms > 0 else 0
+    silence = silent_sample * channels * gap_frames
+
+    output = io.BytesIO()
+    with wave.open(output, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(sample_width)
+        writer.setframerate(frame_rate)
+        writer.writeframes(silence.join(chunks))
+    return output.getvalue()
+
+
+def concat_audio(clips: Sequence[bytes], extension: str, gap_ms: float = 0.0) -> Optional[bytes]:
+    """Unir clips del formato ``extension`` ("mp3" o "wav")."""
+    if extension == "mp3":
+        return concat_mp3(clips, gap_ms)
+    if extension == "wav":
+        return concat_wav(clips, gap_ms)
+    return None
+
+
+__all__ = ["concat_audio", "concat_mp3", "concat_wav", "normalize_word", "split_phrase", "strip_id3"]
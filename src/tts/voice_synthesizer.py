@@ -1,23 +1,40 @@
 """
 Voice Synthesizer - Módulo de Text-to-Speech para VOZ VISIBLE
-Soporta síntesis de voz en español colombiano usando gTTS
+Soporta síntesis de voz en español colombiano con backends intercambiables:
+
+- ``gtts``: Google Text-to-Speech (MP3, requiere red)
+- ``pyttsx3``: motor local del sistema (WAV, sin red; espeak en Linux)
+- ``espeak``: ejecutable espeak-ng/espeak (WAV, sin red)
 """
 
 import os
+import io
 import hashlib
+from abc import ABC, abstractmethod
+import shutil
+import subprocess
+import tempfile
+import threading
 import time
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple, Type
 from pathlib import Path
 import logging
 
+from .cache_index import TEMP_SUFFIX, TTSCacheIndex
+
 try:
     from gtts import gTTS
-    import io
     GTTS_AVAILABLE = True
 except ImportError:
     GTTS_AVAILABLE = False
     logging.warning("gTTS no está disponible. Instala con: pip install gtts")
 
+try:
+    import pyttsx3
+    PYTTSX3_AVAILABLE = True
+except ImportError:
+    PYTTSX3_AVAILABLE = False
+
 try:
     import pygame
     PYGAME_AVAILABLE = True
@@ -26,18 +43,220 @@ except ImportError:
     logging.warning("pygame no está disponible para reproducción local. Instala con: pip install pygame")
 
 
+class TTSBackend(ABC):
+    """
+    Interfaz de un motor de síntesis
+    
+    Cada backend declara el formato que produce y la parte de la clave de cache
+    que lo identifica (motor + voz + parámetros), de modo que dos backends nunca
+    comparten archivos en el cache.
+    """
+    
+    name = "base"
+    extension = "mp3"
+    mimetype = "audio/mpeg"
+    
+    def __init__(self, language: str = "es-co", slow: bool = False, voice: Optional[str] = None):
+        self.language = language
+        self.slow = slow
+        self.voice = voice or None
+    
+    @abstractmethod
+    def is_available(self) -> bool:
+        """Indicar si el motor puede sintetizar en este entorno."""
+    
+    def unavailable_reason(self) -> str:
+        return f"Backend TTS '{self.name}' no disponible"
+    
+    def cache_namespace(self) -> str:
+        """Parámetros que cambian el audio generado (forman parte de la clave de cache)."""
+        return f"{self.name}|{self.language}|{self.voice or ''}|{int(self.slow)}"
+    
+    @abstractmethod
+    def synthesize(self, text: str) -> bytes:
+        """
+        Sintetizar texto
+        
+        Returns:
+            Bytes del audio en el formato ``extension``
+            
+        Raises:
+            RuntimeError: Si el motor no pudo generar audio
+        """
+
+
+class GTTSBackend(TTSBackend):
+    """Google Text-to-Speech: MP3 por red."""
+    
+    name = "gtts"
+    
+    def is_available(self) -> bool:
+        return GTTS_AVAILABLE
+    
+    def unavailable_reason(self) -> str:
+        return "gTTS no está disponible. Instala con: pip install gtts"
+    
+    def synthesize(self, text: str) -> bytes:
+        tts = gTTS(text=text, lang=self.language, slow=self.slow)
+        
+        # Guardar en buffer de memoria
+        audio_buffer = io.BytesIO()
+        tts.write_to_fp(audio_buffer)
+        return audio_buffer.getvalue()
+
+
+def _local_voice(language: str, voice: Optional[str]) -> str:
+    # espeak no distingue variantes regionales como es-co: usar el idioma base
+    return voice or language.split("-")[0]
+
+
+class EspeakBackend(TTSBackend):
+    """espeak-ng/espeak como proceso local: WAV sin red."""
+    
+    name = "espeak"
+    extension = "wav"
+    mimetype = "audio/wav"
+    
+    # Palabras por minuto (espeak usa 175 por defecto)
+    _RATE = 160
+    _SLOW_RATE = 110
+    
+    def __init__(self, language: str = "es-co", slow: bool = False, voice: Optional[str] = None):
+        super().__init__(language, slow, voice)
+        self.executable = shutil.which("espeak-ng") or shutil.which("espeak")
+    
+    def is_available(self) -> bool:
+        return self.executable is not None
+    
+    def unavailable_reason(self) -> str:
+        return "espeak no está disponible. Instala con: apt-get install espeak-ng"
+    
+    def synthesize(self, text: str) -> bytes:
+        rate = self._SLOW_RATE if self.slow else self._RATE
+        result = subprocess.run(
+            # El texto va por stdin: así nunca se interpreta como una opción
+            [self.executable, "-v", _local_voice(self.language, self.voice), "-s", str(rate), "--stdout", "--stdin"],
+            input=text.encode("utf-8"), capture_output=True, timeout=30, check=False,
+        )
+        if result.returncode != 0 or not result.stdout:
+            raise RuntimeError(result.stderr.decode("utf-8", "replace").strip() or "espeak no generó audio")
+        return result.stdout
+
+
+class Pyttsx3Backend(TTSBackend):
+    """pyttsx3 (motor de voz del sistema): WAV sin red."""
+    
+    name = "pyttsx3"
+    extension = "wav"
+    mimetype = "audio/wav"
+    
+    def __init__(self, language: str = "es-co", slow: bool = False, voice: Optional[str] = None):
+        super().__init__(language, slow, voice)
+        self._engine = None
+        # El motor de pyttsx3 no admite llamadas concurrentes
+        self._lock = threading.Lock()
+    
+    def is_available(self) -> bool:
+        return PYTTSX3_AVAILABLE
+    
+    def unavailable_reason(self) -> str:
+        return "pyttsx3 no está disponible. Instala con: pip install pyttsx3"
+    
+    def _get_engine(self):
+        if self._engine is None:
+            engine = pyttsx3.init()
+            wanted = _local_voice(self.language, self.voice).lower()
+            for candidate in engine.getProperty("voices"):
+                if wanted in str(candidate.id).lower() or wanted in str(candidate.name).lower():
+                    engine.setProperty("voice", candidate.id)
+                    break
+            if self.slow:
+                engine.setProperty("rate", int(engine.getProperty("rate") * 0.7))
+            self._engine = engine
+        return self._engine
+    
+    def synthesize(self, text: str) -> bytes:
+        with self._lock:
+            engine = self._get_engine()
+            fd, temp_path = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            try:
+                engine.save_to_file(text, temp_path)
+                engine.runAndWait()
+                with open(temp_path, "rb") as f:
+                    audio_bytes = f.read()
+            finally:
+                os.unlink(temp_path)
+        if not audio_bytes:
+            raise RuntimeError("pyttsx3 no generó audio")
+        return audio_bytes
+
+
+TTS_BACKENDS: Dict[str, Type[TTSBackend]] = {
+    GTTSBackend.name: GTTSBackend,
+    EspeakBackend.name: EspeakBackend,
+    Pyttsx3Backend.name: Pyttsx3Backend,
+}
+
+
+def create_tts_backend(name: str = "gtts", language: str = "es-co", slow: bool = False,
+                       voice: Optional[str] = None) -> TTSBackend:
+    """
+    Crear el backend de síntesis indicado
+    
+    Raises:
+        ValueError: Si el backend no existe
+    """
+    backend_class = TTS_BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(
+            f"Backend TTS desconocido: {name!r} (disponibles: {', '.join(sorted(TTS_BACKENDS))})"
+        )
+    return backend_class(language=language, slow=slow, voice=voice)
+
+
+class _Flight:
+    """Síntesis en curso de una clave: las demás llamadas esperan su resultado."""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Tuple[Optional[bytes], Optional[str]] = (None, "Síntesis interrumpida")
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """
+    Escribir un archivo de forma atómica (temporal en el mismo directorio + rename)
+    
+    Un lector nunca ve un archivo a medio escribir y dos escrituras simultáneas
+    no se mezclan: gana la última, completa.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=TEMP_SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
 class VoiceSynthesizer:
     """
     Sintetizador de voz para convertir texto a audio
     
     Características:
     - Soporte para español colombiano
-    - Cache de audio generado
+    - Backends intercambiables (gTTS o motores locales sin red)
+    - Cache de audio generado, indexado y acotado por bytes (LRU)
     - Múltiples formatos de salida
     - Reproducción opcional
     """
     
-    def __init__(self, cache_dir: str = "data/cache/tts", language: str = "es-co", slow: bool = False):
+    def __init__(self, cache_dir: str = "data/cache/tts", language: str = "es-co", slow: bool = False,
+                 backend: str = "gtts", voice: Optional[str] = None, max_cache_bytes: int = 0):
         """
         Inicializar sintetizador de voz
         
@@ -45,33 +264,57 @@ class VoiceSynthesizer:
             cache_dir: Directorio para cache de archivos de audio
             language: Código de idioma (es-co para español colombiano)
             slow: Si True, habla más lento
+            backend: Motor de síntesis ("gtts", "espeak" o "pyttsx3")
+            voice: Voz de los motores locales (por defecto, la del idioma)
+            max_cache_bytes: Presupuesto del cache en disco (0 = sin límite)
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
         self.language = language
         self.slow = slow
+        self.backend = create_tts_backend(backend, language=language, slow=slow, voice=voice)
+        self.mimetype = self.backend.mimetype
         
         self.logger = logging.getLogger(__name__)
         
-        if not GTTS_AVAILABLE:
-            self.logger.error("gTTS no está disponible. La síntesis de voz no funcionará.")
+        self._inflight: Dict[str, _Flight] = {}
+        self._inflight_lock = threading.Lock()
+        self.synthesized_total = 0
+        self.coalesced_total = 0
         
-        self.logger.info(f"✅ VoiceSynthesizer inicializado (idioma: {language}, cache: {cache_dir})")
+        # Índice del cache: se sincroniza con el directorio al iniciar
+        self.cache_index = TTSCacheIndex(
+            self.cache_dir,
+            max_bytes=max_cache_bytes,
+            extensions={backend_class.extension for backend_class in TTS_BACKENDS.values()},
+        )
+        self.cache_index.rebuild()
+        
+        if not self.backend.is_available():
+            self.logger.error(f"{self.backend.unavailable_reason()}. La síntesis de voz no funcionará.")
+        
+        self.logger.info(
+            f"✅ VoiceSynthesizer inicializado (backend: {self.backend.name}, idioma: {language}, cache: {cache_dir})"
+        )
     
     def _get_cache_path(self, text: str) -> Path:
         """
         Obtener ruta de cache para un texto
         
+        La clave incluye el backend, la voz y los parámetros, así que cambiar de
+        motor o de idioma nunca reutiliza audio de otro.
+        
         Args:
             text: Texto a convertir
             
         Returns:
             Ruta del archivo de cache
         """
-        # Crear hash del texto para nombre de archivo
-        text_hash = hashlib.md5(text.encode('utf-8')).hexdigest()
-        cache_filename = f"{text_hash}.mp3"
+        # Crear hash del texto y los parámetros del backend para nombre de archivo
+        key = f"{self.backend.cache_namespace()}|{text}"
+        text_hash = hashlib.md5(key.encode('utf-8')).hexdigest()
+        cache_filename = f"{self.backend.name}-{text_hash}.{self.backend.extension}"
         return self.cache_dir / cache_filename
     
     def text_to_speech(self, text: str, use_cache: bool = True) -> Tuple[Optional[bytes], Optional[str]]:
@@ -87,8 +330,8 @@ class VoiceSynthesizer:
             - audio_bytes: Bytes del archivo MP3, None si hay error
             - error_message: Mensaje de error, None si es exitoso
         """
-        if not GTTS_AVAILABLE:
-            return None, "gTTS no está disponible. Instala con: pip install gtts"
+        if not self.backend.is_available():
+            return None, self.backend.unavailable_reason()
         
         if not text or not text.strip():
             return None, "Texto vacío"
@@ -97,30 +340,67 @@ class VoiceSynthesizer:
         
         # Verificar cache
         cache_path = self._get_cache_path(text)
-        if use_cache and cache_path.exists():
-            self.logger.debug(f"📦 Usando cache para: {text[:50]}...")
-            try:
-                with open(cache_path, 'rb') as f:
-                    return f.read(), None
-            except Exception as e:
-                self.logger.warning(f"Error leyendo cache: {e}")
+        if use_cache:
+            audio_bytes = self._read_cache(cache_path, text)
+            if audio_bytes is not None:
+                return audio_bytes, None
+        
+        # Una sola síntesis por clave: las llamadas concurrentes esperan el mismo resultado
+        key = cache_path.name
+        with self._inflight_lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.coalesced_total += 1
+        if not leader:
+            flight.done.wait()
+            return flight.result
         
-        # Generar audio con gTTS
         try:
-            self.logger.debug(f"🎤 Generando audio para: {text[:50]}...")
-            
-            tts = gTTS(text=text, lang=self.language, slow=self.slow)
+            flight.result = self._synthesize(text, cache_path, use_cache)
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+            flight.done.set()
+        return flight.result
+    
+    def _read_cache(self, cache_path: Path, text: str) -> Optional[bytes]:
+        if not cache_path.exists():
+            return None
+        self.logger.debug(f"📦 Usando cache para: {text[:50]}...")
+        try:
+            with open(cache_path, 'rb') as f:
+                audio_bytes = f.read()
+            self.cache_index.touch(cache_path.name)
+            return audio_bytes
+        except Exception as e:
+            self.logger.warning(f"Error leyendo cache: {e}")
+            return None
+    
+    def _synthesize(self, text: str, cache_path: Path, use_cache: bool) -> Tuple[Optional[bytes], Optional[str]]:
+        # Otra llamada pudo terminar la misma síntesis entre la consulta al cache y este punto
+        if use_cache:
+            audio_bytes = self._read_cache(cache_path, text)
+            if audio_bytes is not None:
+                return audio_bytes, None
+        
+        # Generar audio con el backend configurado
+        try:
+            self.logger.debug(f"🎤 Generando audio ({self.backend.name}) para: {text[:50]}...")
             
-            # Guardar en buffer de memoria
-            audio_buffer = io.BytesIO()
-            tts.write_to_fp(audio_buffer)
-            audio_bytes = audio_buffer.getvalue()
+            audio_bytes = self.backend.synthesize(text)
+            with self._inflight_lock:
+                self.synthesized_total += 1
             
             # Guardar en cache
             if use_cache:
                 try:
-                    with open(cache_path, 'wb') as f:
-                        f.write(audio_bytes)
+                    _write_atomic(cache_path, audio_bytes)
+                    self.cache_index.record(
+                        cache_path.name, len(audio_bytes), params=self.backend.cache_namespace(), text=text
+                    )
                     self.logger.debug(f"💾 Audio guardado en cache: {cache_path}")
                 except Exception as e:
                     self.logger.warning(f"Error guardando cache: {e}")
@@ -159,6 +439,7 @@ class VoiceSynthesizer:
         cache_path = self._get_cache_path(text)
         if use_cache and cache_path.exists() and output_path == str(cache_path):
             self.logger.debug(f"📦 Usando cache para: {text[:50]}...")
+            self.cache_index.touch(cache_path.name)
             return str(cache_path), None
         
         # Generar audio
@@ -167,13 +448,16 @@ class VoiceSynthesizer:
         if error:
             return None, error
         
+        # text_to_speech ya lo escribió en el cache
+        if use_cache and output_path == str(cache_path) and cache_path.exists():
+            return str(cache_path), None
+        
         # Guardar archivo
         try:
             output_file = Path(output_path)
             output_file.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(output_file, 'wb') as f:
-                f.write(audio_bytes)
+            _write_atomic(output_file, audio_bytes)
             
             self.logger.debug(f"💾 Audio guardado en: {output_file}")
             return str(output_file), None
@@ -222,24 +506,18 @@ class VoiceSynthesizer:
         Limpiar cache de archivos de audio
         
         Args:
-            older_than_days: Si se especifica, solo elimina archivos más antiguos que X días
+            older_than_days: Si se especifica, solo elimina archivos sin usar en los últimos X días
             
         Returns:
             Número de archivos eliminados
         """
         deleted_count = 0
-        current_time = time.time()
         
         try:
-            for cache_file in self.cache_dir.glob("*.mp3"):
-                if older_than_days is None:
-                    cache_file.unlink()
-                    deleted_count += 1
-                else:
-                    file_age = current_time - cache_file.stat().st_mtime
-                    if file_age > (older_than_days * 86400):  # 86400 segundos = 1 día
-                        cache_file.unlink()
-                        deleted_count += 1
+            accessed_before = None
+            if older_than_days is not None:
+                accessed_before = time.time() - older_than_days * 86400  # 86400 segundos = 1 día
+            deleted_count = self.cache_index.remove(self.cache_index.filenames(accessed_before=accessed_before))
             
             self.logger.info(f"🗑️ Cache limpiado: {deleted_count} archivos eliminados")
             return deleted_count
@@ -250,17 +528,25 @@ class VoiceSynthesizer:
     
     def get_cache_size(self) -> int:
         """
-        Obtener tamaño total del cache en bytes
+        Obtener tamaño total del cache en bytes (según el índice, sin recorrer el directorio)
         
         Returns:
             Tamaño del cache en bytes
         """
-        total_size = 0
-        try:
-            for cache_file in self.cache_dir.glob("*.mp3"):
-                total_size += cache_file.stat().st_size
-        except Exception as e:
-            self.logger.error(f"Error calculando tamaño de cache: {e}")
-        
-        return total_size
+        return self.cache_index.total_bytes
+    
+    def get_phrase_cache_path(self, text: str, gap_ms: float) -> Path:
+        """Ruta de cache de una frase armada con clips por palabra (ver TTSService)."""
+        key = f"phrase|{self.backend.cache_namespace()}|{gap_ms:g}|{text.strip()}"
+        text_hash = hashlib.md5(key.encode('utf-8')).hexdigest()
+        return self.cache_dir / f"phrase-{self.backend.name}-{text_hash}.{self.backend.extension}"
+    
+    def store_in_cache(self, cache_path: Path, audio_bytes: bytes, text: str) -> None:
+        """Guardar en el cache un audio generado fuera del backend (escritura atómica e indexada)."""
+        _write_atomic(cache_path, audio_bytes)
+        self.cache_index.record(cache_path.name, len(audio_bytes), params=self.backend.cache_namespace(), text=text)
+    
+    def touch(self, text: str) -> None:
+        """Marcar como usado el audio en cache de un texto (p. ej. servido desde memoria)."""
+        self.cache_index.touch(self._get_cache_path(text.strip()).name)
 
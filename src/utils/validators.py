@@ -9,6 +9,11 @@ import re
 from typing import Tuple, Optional
 
 
+# Límites de tamaño de imagen comprimida
+MAX_IMAGE_BYTES = 10 * 1024 * 1024  # 10MB
+MIN_IMAGE_BYTES = 1024  # 1KB
+
+
 def validate_base64_image(image_data: str) -> Tuple[bool, Optional[str]]:
     """
     Valida que una cadena sea una imagen base64 válida
@@ -19,8 +24,22 @@ def validate_base64_image(image_data: str) -> Tuple[bool, Optional[str]]:
     Returns:
         Tupla (es_válida, mensaje_error)
     """
+    image_bytes, error = decode_base64_image(image_data)
+    return image_bytes is not None, error
+
+
+def decode_base64_image(image_data: str) -> Tuple[Optional[bytes], Optional[str]]:
+    """
+    Valida y decodifica una imagen base64 (con o sin prefijo data URI) en una sola pasada
+    
+    Args:
+        image_data: Cadena con imagen en base64
+        
+    Returns:
+        Tupla (bytes_decodificados, mensaje_error); los bytes son None si no es válida
+    """
     if not image_data:
-        return False, "La imagen no puede estar vacía"
+        return None, "La imagen no puede estar vacía"
     
     # Verificar formato data URI
     if image_data.startswith('data:image'):
@@ -28,38 +47,74 @@ def validate_base64_image(image_data: str) -> Tuple[bool, Optional[str]]:
         try:
             parts = image_data.split(',')
             if len(parts) != 2:
-                return False, "Formato de data URI inválido"
+                return None, "Formato de data URI inválido"
             
             base64_part = parts[1]
             # Validar formato de imagen
             image_type = parts[0].split(';')[0].split(':')[1]
             if image_type not in ['image/jpeg', 'image/jpg', 'image/png', 'image/webp']:
-                return False, f"Tipo de imagen no soportado: {image_type}"
+                return None, f"Tipo de imagen no soportado: {image_type}"
         except Exception:
-            return False, "Error procesando data URI"
+            return None, "Error procesando data URI"
     else:
         # Asumir que es base64 puro
         base64_part = image_data
     
     # Validar que sea base64 válido
     try:
-        # Intentar decodificar
         decoded = base64.b64decode(base64_part, validate=True)
-        if len(decoded) == 0:
-            return False, "La imagen está vacía"
-        
-        # Verificar tamaño máximo (10MB)
-        max_size = 10 * 1024 * 1024  # 10MB
-        if len(decoded) > max_size:
-            return False, f"La imagen es demasiado grande (máximo {max_size // (1024*1024)}MB)"
+    except Exception as e:
+        return None, f"Error validando base64: {str(e)}"
+    
+    is_valid, error = validate_image_size(decoded)
+    return (decoded, None) if is_valid else (None, error)
+
+
+def validate_image_size(image_bytes: bytes) -> Tuple[bool, Optional[str]]:
+    """
+    Valida el tamaño de una imagen comprimida (1KB - 10MB)
+    
+    Args:
+        image_bytes: Bytes de la imagen
         
-        # Verificar tamaño mínimo (1KB)
-        min_size = 1024  # 1KB
-        if len(decoded) < min_size:
-            return False, "La imagen es demasiado pequeña"
+    Returns:
+        Tupla (es_válida, mensaje_error)
+    """
+    if len(image_bytes) == 0:
+        return False, "La imagen está vacía"
+    
+    if len(image_bytes) > MAX_IMAGE_BYTES:
+        return False, f"La imagen es demasiado grande (máximo {MAX_IMAGE_BYTES // (1024*1024)}MB)"
+    
+    if len(image_bytes) < MIN_IMAGE_BYTES:
+        return False, "La imagen es demasiado pequeña"
+    
+    return True, None
+
+
+def validate_image_bytes(image_bytes: bytes) -> Tuple[bool, Optional[str]]:
+    """
+    Valida una imagen binaria (JPEG, PNG o WebP) recibida sin base64
+    
+    Args:
+        image_bytes: Bytes de la imagen comprimida
         
-    except Exception as e:
-        return False, f"Error validando base64: {str(e)}"
+    Returns:
+        Tupla (es_válida, mensaje_error)
+    """
+    if not isinstance(image_bytes, (bytes, bytearray, memoryview)):
+        return False, "La imagen debe ser binaria"
+    
+    is_valid, error = validate_image_size(image_bytes)
+    if not is_valid:
+        return False, error
+    
+    header = bytes(image_bytes[:12])
+    is_jpeg = header.startswith(b'\xff\xd8\xff')
+    is_png = header.startswith(b'\x89PNG\r\n\x1a\n')
+    is_webp = header[:4] == b'RIFF' and header[8:12] == b'WEBP'
+    if not (is_jpeg or is_png or is_webp):
+        return False, "Tipo de imagen no soportado (se aceptan JPEG, PNG y WebP)"
     
     return True, None
 
@@ -163,7 +218,10 @@ def sanitize_filename(filename: str) -> str:
 
 
 __all__ = [
+    "decode_base64_image",
     "validate_base64_image",
+    "validate_image_bytes",
+    "validate_image_size",
     "validate_text_for_tts",
     "validate_session_id",
     "validate_confidence",
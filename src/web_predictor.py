@@ -6,8 +6,6 @@ Predictor optimizado para aplicación web con manejo de imágenes
 import cv2
 import numpy as np
 import base64
-from PIL import Image
-import io
 from typing import Tuple, Optional, Dict, Any
 import sys
 import os
@@ -15,6 +13,7 @@ import os
 # Agregar src al path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+from inference.frame_ingest import FrameIngest
 from inference.sign_language_predictor import SignLanguagePredictor
 
 class WebSignLanguagePredictor(SignLanguagePredictor):
@@ -32,6 +31,7 @@ class WebSignLanguagePredictor(SignLanguagePredictor):
         Inicializar predictor web
         """
         super().__init__(model_path, scaler_path, label_encoder_path, feature_info_path)
+        self.frame_ingest = FrameIngest()
         print("🌐 WebSignLanguagePredictor inicializado")
     
     def predict_from_base64(self, image_base64: str) -> Tuple[str, float, bool]:
@@ -49,15 +49,12 @@ class WebSignLanguagePredictor(SignLanguagePredictor):
             if image_base64.startswith('data:image'):
                 image_base64 = image_base64.split(',')[1]
             
-            # Decodificar imagen
+            # Decodificar imagen directamente a RGB
             image_bytes = base64.b64decode(image_base64)
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # Convertir a formato OpenCV (BGR)
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+            rgb_image = self.frame_ingest.decode(image_bytes)
             
             # Realizar predicción usando el método padre
-            return self.predict_realtime(cv_image)
+            return self.predict_realtime(rgb_image, rgb=True)[:3]
             
         except Exception as e:
             print(f"❌ Error en predict_from_base64: {e}")
@@ -80,42 +77,27 @@ class WebSignLanguagePredictor(SignLanguagePredictor):
                 return "Error", 0.0, False
             
             # Realizar predicción
-            return self.predict_realtime(image)
+            return self.predict_realtime(image)[:3]
             
         except Exception as e:
             print(f"❌ Error en predict_from_file: {e}")
             return "Error", 0.0, False
     
-    def predict_from_landmarks(self, landmarks_dict: Dict[str, float]) -> Tuple[str, float, bool]:
+    def predict_from_landmarks(self, landmarks) -> Tuple[str, float, bool]:
         """
         Predecir desde landmarks directos
         
         Args:
-            landmarks_dict: Diccionario con landmarks extraídos
+            landmarks: Vector binario float32, lista de 258 valores, columnas con
+                nombre de feature_info.json o diccionario {"pose": [...], ...}
             
         Returns:
             Tupla (clase_predicha, confianza, éxito)
         """
         try:
-            # Crear array de características
-            features = np.zeros(258, dtype=np.float32)
-            
-            # Mapear landmarks al array de características
-            for i, (key, value) in enumerate(landmarks_dict.items()):
-                if i < 258:
-                    features[i] = float(value)
-            
-            # Normalizar características
-            features_scaled = self.scaler.transform([features])
-            
-            # Hacer predicción
-            prediction = self.model.predict(features_scaled, verbose=0)
-            
-            # Obtener resultado
-            class_idx = np.argmax(prediction[0])
-            confidence = float(prediction[0][class_idx])
-            class_name = self.label_encoder.inverse_transform([class_idx])[0]
-            
+            features = self.packer.parse(landmarks)
+            probabilities = self.predict_proba(features[np.newaxis, :])[0]
+            class_name, confidence = self.decode_prediction(probabilities)
             return class_name, confidence, True
             
         except Exception as e:
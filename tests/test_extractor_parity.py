@@ -0,0 +1,141 @@
+"""
+Paridad entre backends de extracción de landmarks
+
+Compara el vector de 258 características de ``pose_hands`` (Pose + Hands, sin
+malla facial) con el de ``holistic`` sobre frames grabados. Los frames se leen
+de ``data/samples`` (o de la carpeta en ``SIGN_AI_PARITY_SAMPLES``): imágenes
+.jpg/.png o videos .mp4/.avi/.webm/.mov de personas señando con ambas manos
+a la vista. El repositorio no incluye grabaciones de señas: sin ellas (o sin
+MediaPipe) la prueba se omite. Con grabaciones, las manos deben compararse en
+al menos ``MIN_HAND_FRAMES`` frames para que la paridad cuente como verificada.
+
+Uso:
+    python -m pytest tests/test_extractor_parity.py -q
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("mediapipe")
+
+from inference.landmark_extractors import create_extractor  # noqa: E402
+from inference.landmark_packing import LandmarkPacker  # noqa: E402
+
+SAMPLES_DIR = Path(os.getenv("SIGN_AI_PARITY_SAMPLES", PROJECT_ROOT / "data" / "samples"))
+FEATURE_INFO_PATH = PROJECT_ROOT / "data" / "processed" / "feature_info.json"
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+VIDEO_SUFFIXES = {".mp4", ".avi", ".webm", ".mov"}
+MAX_FRAMES_PER_VIDEO = 60
+# Repeticiones de cada imagen fija para que el tracking se estabilice
+IMAGE_REPEATS = 3
+
+# Tolerancias en coordenadas normalizadas (fracción del frame)
+MAX_POSE_XY_ERROR = 0.05
+MAX_HAND_XY_ERROR = 0.015
+# Distancia xy máxima de cualquier landmark de mano en cualquier frame
+MAX_HAND_LANDMARK_ERROR = 0.04
+MIN_HAND_AGREEMENT = 0.95
+# Manos detectadas por ambos backends necesarias para dar la paridad por buena
+MIN_HAND_FRAMES = 30
+
+
+def _load_sequences():
+    """Secuencias de frames RGB: una por video y una por imagen."""
+    if not SAMPLES_DIR.is_dir():
+        return []
+    sequences = []
+    for path in sorted(SAMPLES_DIR.iterdir()):
+        suffix = path.suffix.lower()
+        if suffix in IMAGE_SUFFIXES:
+            image = cv2.imread(str(path))
+            if image is not None:
+                sequences.append((path.name, [cv2.cvtColor(image, cv2.COLOR_BGR2RGB)] * IMAGE_REPEATS))
+        elif suffix in VIDEO_SUFFIXES:
+            capture = cv2.VideoCapture(str(path))
+            frames = []
+            while len(frames) < MAX_FRAMES_PER_VIDEO:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            capture.release()
+            if frames:
+                sequences.append((path.name, frames))
+    return sequences
+
+
+SEQUENCES = _load_sequences()
+
+pytestmark = pytest.mark.skipif(not SEQUENCES, reason=f"Sin frames grabados en {SAMPLES_DIR}")
+
+
+@pytest.fixture(scope="module")
+def packer():
+    with open(FEATURE_INFO_PATH, "r", encoding="utf-8") as f:
+        return LandmarkPacker.from_feature_info(json.load(f))
+
+
+def _extract_sequence(backend, frames, packer):
+    extractor = create_extractor(backend)
+    try:
+        return [packer.pack(extractor.process(frame)) for frame in frames]
+    finally:
+        extractor.close()
+
+
+def _block_xy(packer, features, name):
+    block = packer.block(name)
+    values = features[block.slice].reshape(block.num_landmarks, block.width)
+    return values
+
+
+def test_pose_hands_matches_holistic_layout_and_landmarks(packer):
+    pose_errors, hand_errors = [], []
+    hand_agreements = []
+
+    for name, frames in SEQUENCES:
+        reference = _extract_sequence("holistic", frames, packer)
+        candidate = _extract_sequence("pose_hands", frames, packer)
+
+        for holistic_features, pose_hands_features in zip(reference, candidate):
+            assert pose_hands_features.shape == (packer.num_features,), name
+            assert pose_hands_features.dtype == np.float32, name
+
+            # Pose: comparar landmarks visibles cuando ambos backends detectan a la persona
+            if packer.has_block(holistic_features, "pose") and packer.has_block(pose_hands_features, "pose"):
+                expected = _block_xy(packer, holistic_features, "pose")
+                actual = _block_xy(packer, pose_hands_features, "pose")
+                visible = expected[:, 3] > 0.5
+                if visible.any():
+                    pose_errors.append(float(np.abs(expected[visible, :2] - actual[visible, :2]).mean()))
+
+            # Manos: misma presencia por lado y posiciones cercanas
+            for hand in ("right_hand", "left_hand"):
+                expected_present = packer.has_block(holistic_features, hand)
+                actual_present = packer.has_block(pose_hands_features, hand)
+                hand_agreements.append(expected_present == actual_present)
+                if expected_present and actual_present:
+                    expected = _block_xy(packer, holistic_features, hand)
+                    actual = _block_xy(packer, pose_hands_features, hand)
+                    distances = np.linalg.norm(expected[:, :2] - actual[:, :2], axis=1)
+                    assert distances.max() < MAX_HAND_LANDMARK_ERROR, f"{name}: {hand}"
+                    hand_errors.append(float(distances.mean()))
+
+    assert len(hand_errors) >= MIN_HAND_FRAMES, (
+        f"Manos comparadas en {len(hand_errors)} frames (mínimo {MIN_HAND_FRAMES}); "
+        "las muestras deben mostrar a alguien señando con las manos visibles"
+    )
+    assert np.mean(hand_errors) < MAX_HAND_XY_ERROR
+    assert np.mean(hand_agreements) >= MIN_HAND_AGREEMENT
+    if pose_errors:
+        assert np.mean(pose_errors) < MAX_POSE_XY_ERROR
@@ -0,0 +1,57 @@
+"""
+Timeout del pool de procesos de extracción
+
+Un worker que no responde a tiempo debe reportarse como servidor ocupado
+(``SchedulerOverloadedError`` → 429 / ``busy``), no como fallo de extracción,
+y su slot debe volver al worker cuando llegue el resultado tardío.
+
+Uso:
+    python -m pytest tests/test_extractor_pool.py -q
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+pytest.importorskip("cv2")
+pytest.importorskip("mediapipe")
+
+from services.batch_scheduler import SchedulerOverloadedError  # noqa: E402
+from services.extractor_pool import ExtractorWorkerPool  # noqa: E402
+
+FEATURE_INFO_PATH = PROJECT_ROOT / "data" / "processed" / "feature_info.json"
+
+
+@pytest.fixture(scope="module")
+def feature_columns():
+    with open(FEATURE_INFO_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)["feature_columns"]
+
+
+def test_worker_timeout_raises_overloaded_and_returns_slot(feature_columns):
+    # Con timeout 0 ningún resultado puede llegar a tiempo desde otro proceso
+    pool = ExtractorWorkerPool(feature_columns, workers=1, queue_depth=2,
+                               max_frame_bytes=64 * 64 * 3, timeout_s=0.0)
+    pool.start()
+    try:
+        frame = np.zeros((64, 64, 3), dtype=np.uint8)
+        with pytest.raises(SchedulerOverloadedError):
+            pool.extract(frame, session_id="timeout")
+
+        metrics = pool.get_metrics()
+        assert metrics["timeouts_total"] == 1
+
+        # El resultado tardío devuelve el slot al worker
+        deadline = time.time() + 30
+        while pool.get_metrics()["slots"]["busy"] and time.time() < deadline:
+            time.sleep(0.05)
+        assert pool.get_metrics()["slots"]["busy"] == 0
+    finally:
+        pool.stop()
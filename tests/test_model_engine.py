@@ -0,0 +1,67 @@
+"""
+Paridad del motor NumPy con Keras
+
+Compara las probabilidades de cada modelo ``.h5`` de ``models/`` con las de su
+exportación ``.npz`` sobre entradas fijas: el frame de landmarks grabado en
+``data/test_output`` y filas aleatorias con semilla fija, todas normalizadas con
+el scaler del proyecto. La clase predicha debe coincidir en todas las filas.
+Sin TensorFlow la prueba se omite.
+
+Uso:
+    python -m pytest tests/test_model_engine.py -q
+"""
+
+import csv
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+pytest.importorskip("tensorflow")
+joblib = pytest.importorskip("joblib")
+
+from inference.model_engine import load_model  # noqa: E402
+
+MODELS_DIR = PROJECT_ROOT / "models"
+PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
+RECORDED_DIR = PROJECT_ROOT / "data" / "test_output"
+
+MODEL_PATHS = sorted(path for path in MODELS_DIR.glob("*.h5") if path.with_suffix(".npz").exists())
+RANDOM_ROWS = 256
+MAX_PROBABILITY_ERROR = 1e-5
+
+
+@pytest.fixture(scope="module")
+def inputs():
+    """Filas ya normalizadas: frames grabados más filas aleatorias reproducibles."""
+    with open(PROCESSED_DIR / "feature_info.json", "r", encoding="utf-8") as f:
+        feature_columns = json.load(f)["feature_columns"]
+    scaler = joblib.load(PROCESSED_DIR / "scaler_optimized.pkl")
+
+    rows = []
+    for path in sorted(RECORDED_DIR.glob("*_landmarks.csv")):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for record in csv.DictReader(f):
+                rows.append([float(record.get(column) or 0.0) for column in feature_columns])
+    recorded = np.asarray(rows, dtype=np.float32).reshape(-1, len(feature_columns))
+
+    rng = np.random.default_rng(0)
+    synthetic = rng.uniform(0.0, 1.0, size=(RANDOM_ROWS, len(feature_columns))).astype(np.float32)
+    return scaler.transform(np.vstack([recorded, synthetic])).astype(np.float32)
+
+
+@pytest.mark.skipif(not MODEL_PATHS, reason=f"Sin modelos .h5 con su .npz en {MODELS_DIR}")
+@pytest.mark.parametrize("model_path", MODEL_PATHS, ids=lambda path: path.stem)
+def test_numpy_engine_matches_keras(model_path, inputs):
+    expected = load_model(str(model_path), engine="keras").predict(inputs, verbose=0)
+    actual = load_model(str(model_path.with_suffix(".npz")), engine="numpy").predict(inputs)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_array_equal(actual.argmax(axis=1), expected.argmax(axis=1))
+    np.testing.assert_allclose(actual.max(axis=1), expected.max(axis=1), atol=MAX_PROBABILITY_ERROR)
+    assert np.abs(actual - expected).max() < MAX_PROBABILITY_ERROR
@@ -0,0 +1,122 @@
+"""
+Pruebas de concurrencia del sintetizador de voz
+
+Usa un backend falso y lento (sin red) para comprobar que las solicitudes
+simultáneas del mismo texto comparten una sola síntesis y que el cache en
+disco solo contiene archivos completos.
+
+Uso:
+    python -m pytest tests/test_voice_synthesizer.py -q
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from tts import voice_synthesizer  # noqa: E402
+from tts.cache_index import TEMP_SUFFIX  # noqa: E402
+from tts.voice_synthesizer import TTSBackend, VoiceSynthesizer  # noqa: E402
+
+CONCURRENT_CALLERS = 40
+
+
+class FakeBackend(TTSBackend):
+    """Backend que tarda ``delay_s`` y cuenta las síntesis por texto."""
+
+    name = "fake"
+    delay_s = 0.1
+    fail = False
+
+    calls = {}
+    _calls_lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        return True
+
+    def synthesize(self, text: str) -> bytes:
+        with self._calls_lock:
+            FakeBackend.calls[text] = FakeBackend.calls.get(text, 0) + 1
+        time.sleep(self.delay_s)
+        if self.fail:
+            raise RuntimeError("fallo simulado")
+        return ("ID3" + text).encode("utf-8") * 1000
+
+
+@pytest.fixture
+def synthesizer(tmp_path, monkeypatch):
+    monkeypatch.setitem(voice_synthesizer.TTS_BACKENDS, FakeBackend.name, FakeBackend)
+    monkeypatch.setattr(FakeBackend, "calls", {})
+    monkeypatch.setattr(FakeBackend, "fail", False)
+    synth = VoiceSynthesizer(cache_dir=str(tmp_path), backend=FakeBackend.name)
+    yield synth
+    synth.cache_index.close()
+
+
+def _call_concurrently(func, args):
+    barrier = threading.Barrier(len(args))
+
+    def call(arg):
+        barrier.wait()
+        return func(arg)
+
+    with ThreadPoolExecutor(max_workers=len(args)) as executor:
+        return list(executor.map(call, args))
+
+
+def test_concurrent_requests_for_same_text_synthesize_once(synthesizer, tmp_path):
+    results = _call_concurrently(synthesizer.text_to_speech, ["Hola"] * CONCURRENT_CALLERS)
+
+    assert FakeBackend.calls == {"Hola": 1}
+    expected = ("ID3Hola".encode("utf-8")) * 1000
+    assert all(audio == expected and error is None for audio, error in results)
+    assert synthesizer.coalesced_total + synthesizer.synthesized_total == CONCURRENT_CALLERS
+
+    cache_file = synthesizer._get_cache_path("Hola")
+    assert cache_file.read_bytes() == expected
+    assert not list(tmp_path.glob(f".*{TEMP_SUFFIX}"))
+    assert synthesizer.get_cache_size() == len(expected)
+
+
+def test_one_synthesis_per_distinct_key(synthesizer):
+    words = ["Hola", "Agua", "Casa", "Gracias"]
+    _call_concurrently(synthesizer.text_to_speech, words * (CONCURRENT_CALLERS // len(words)))
+
+    assert FakeBackend.calls == {word: 1 for word in words}
+
+
+def test_cached_text_is_not_synthesized_again(synthesizer):
+    synthesizer.text_to_speech("Hola")
+    _call_concurrently(synthesizer.text_to_speech, ["Hola"] * CONCURRENT_CALLERS)
+
+    assert FakeBackend.calls == {"Hola": 1}
+
+
+def test_failure_is_shared_and_retried_later(synthesizer, tmp_path, monkeypatch):
+    monkeypatch.setattr(FakeBackend, "fail", True)
+    results = _call_concurrently(synthesizer.text_to_speech, ["Hola"] * CONCURRENT_CALLERS)
+
+    assert FakeBackend.calls == {"Hola": 1}
+    assert all(audio is None and error for audio, error in results)
+    assert not synthesizer._get_cache_path("Hola").exists()
+    assert not list(tmp_path.glob(f".*{TEMP_SUFFIX}"))
+
+    # El error no queda en cache: la siguiente solicitud vuelve a sintetizar
+    monkeypatch.setattr(FakeBackend, "fail", False)
+    audio, error = synthesizer.text_to_speech("Hola")
+    assert error is None and audio
+    assert FakeBackend.calls == {"Hola": 2}
+
+
+def test_concurrent_file_requests_share_cache_file(synthesizer):
+    results = _call_concurrently(synthesizer.text_to_speech_file, ["Hola"] * CONCURRENT_CALLERS)
+
+    cache_file = str(synthesizer._get_cache_path("Hola"))
+    assert FakeBackend.calls == {"Hola": 1}
+    assert all(path == cache_file and error is None for path, error in results)
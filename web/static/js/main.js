@@ -126,7 +126,7 @@ async function analyzeImage() {
         const data = await response.json();
         
         if (data.status === 'success') {
-            showPrediction(data.word, data.confidence, data.audio);
+            showPrediction(data.word, data.confidence, data.audio_url || data.audio);
             closeImageUpload();
         } else {
             alert('Error en la predicción: ' + data.message);